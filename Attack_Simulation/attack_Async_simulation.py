@@ -0,0 +1,52 @@
+from attack_async_runtime import run_async_simulation
+from attack_block import HEADER_VERSION_BINARY
+from attack_mining_engine import MiningEngine
+
+# --- CONFIGURACION ---
+NUM_NODES = 4
+INITIAL_DIFFICULTY = 5
+SIMULATION_TIME = 40  # segundos
+MINING_WORKERS = 0 # 0 = minado en los hilos del executor; >0 = procesos del motor de minado compartido
+
+# --- CONFIGURACION DEL ATAQUE ---
+ATTACKER_NODE_ID = "Node-0"
+ATTACKER_SPEED_MULTIPLIER = 150 # Veces mas rapido que va el atacante
+
+NORMAL_NODE_SPEED_MULTIPLIER = 0.2
+
+
+if __name__ == "__main__":
+    mining_engine = MiningEngine(MINING_WORKERS) if MINING_WORKERS > 0 else None
+    print("Iniciando la simulacion asyncio...")
+    try:
+        result = run_async_simulation(num_nodes=NUM_NODES,
+                                      difficulty=INITIAL_DIFFICULTY,
+                                      simulation_time=SIMULATION_TIME,
+                                      header_version=HEADER_VERSION_BINARY,
+                                      mining_engine=mining_engine,
+                                      attacker_node_id=ATTACKER_NODE_ID,
+                                      attacker_speed=ATTACKER_SPEED_MULTIPLIER,
+                                      normal_speed=NORMAL_NODE_SPEED_MULTIPLIER)
+    finally:
+        if mining_engine is not None:
+            mining_engine.close()
+
+    print("\nFin de la simulacion.")
+    print(f"Duración {result['wall_time']:.2f} segundos.")
+
+    print("\nEstado final de los nodos:")
+    for node in result["nodes"]:
+        print(f"Nodo {node.node_id}: Bloques={len(node.blockchain.chain)}, hash={node.blockchain.last_block.calculate_hash()[:8]}..., mempool= {len(node.mempool)}")
+        blocks = len(node.blockchain.chain) - 1
+        attacker_blocks = result["blocks_mined_by"][node.node_id].get(ATTACKER_NODE_ID, 0)
+        if blocks > 0:
+            print(f"   Bloques del atacante: {attacker_blocks}/{blocks} ({100 * attacker_blocks / blocks:.1f}%)")
+
+    print(f"Cadena mas laga: {result['max_chain_length']} bloques")
+    print("Hashes finales:")
+    for hash_val, node_ids in result["final_hashes"].items():
+        print(f" - Hash {hash_val[:8]}...: {len(node_ids)} nodos ({','. join(node_ids)})")
+    if result["consensus"]:
+        print("CONSENSO")
+    else:
+        print("INCONSISTENCIA")
@@ -0,0 +1,21 @@
+from attack_campaign import run_campaign
+
+# --- CONFIGURACION DE LA CAMPANA ---
+# Cada combinacion se ejecuta con el simulador de eventos discretos una vez por semilla
+GRID = {
+    "num_nodes": [4],
+    "difficulty": [4],
+    "attacker_speed": [0.5, 1, 2, 5, 150],
+    "normal_speed": [1],
+    "simulation_time": [300],
+}
+SEEDS = range(5)
+RESULTS_FILE = "attack_campaign_results.csv"
+WORKERS = None # Procesos del pool (None = numero de nucleos)
+
+if __name__ == "__main__": # Necesario para el pool de procesos con spawn (Windows)
+    rows = run_campaign(GRID, SEEDS, results_file=RESULTS_FILE, workers=WORKERS)
+    consensus_runs = sum(1 for row in rows if row["consensus"])
+    print(f"\nFin de la campana: {len(rows)} ejecuciones, {consensus_runs} con consenso. Resultados en {RESULTS_FILE}")
+    for row in rows:
+        print(f" - atacante x{row['attacker_speed']} semilla {row['seed']}: {100 * row['attacker_share']:.1f}% de la cadena mas larga")
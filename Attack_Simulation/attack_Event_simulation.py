@@ -0,0 +1,64 @@
+from attack_event_runtime import run_event_simulation
+from attack_block import HEADER_VERSION_BINARY
+
+# --- CONFIGURACION ---
+NUM_NODES = 4
+INITIAL_DIFFICULTY = 4 # Solo afecta al coste real de la PoW, el tiempo virtual lo marca HASH_RATE
+HASH_RATE = 400 # Hashes por segundo virtual de un nodo con mining_speed = 1
+SIMULATION_TIME = 60  # segundos virtuales
+SEED = 42
+# --- RED ---
+LATENCY_RANGE = (0.05, 0.3) # Latencia base de cada enlace en segundos (None = entrega instantanea)
+BANDWIDTH_RANGE = (1e6, 1e7) # Ancho de banda de cada enlace en bytes/s
+PARTITIONS = [] # Particiones programadas: (inicio, fin, [[node_id, ...], ...])
+INVENTORY_RELAY = False # Anunciar hashes (inv/getdata) en lugar de reenviar Tx y bloques completos
+COMPACT_BLOCKS = False # Enviar bloques como cabecera + short IDs y reconstruirlos con el mempool
+
+# --- CONFIGURACION DEL ATAQUE ---
+ATTACKER_NODE_ID = "Node-0"
+ATTACKER_SPEED_MULTIPLIER = 150 # Veces mas rapido que va el atacante
+
+NORMAL_NODE_SPEED_MULTIPLIER = 0.2
+
+
+print("Iniciando la simulacion de eventos discretos...")
+result = run_event_simulation(num_nodes=NUM_NODES,
+                              difficulty=INITIAL_DIFFICULTY,
+                              simulation_time=SIMULATION_TIME,
+                              seed=SEED,
+                              latency_range=LATENCY_RANGE,
+                              bandwidth_range=BANDWIDTH_RANGE,
+                              partitions=PARTITIONS,
+                              inventory_relay=INVENTORY_RELAY,
+                              compact_blocks=COMPACT_BLOCKS,
+                              hash_rate=HASH_RATE,
+                              header_version=HEADER_VERSION_BINARY,
+                              attacker_node_id=ATTACKER_NODE_ID,
+                              attacker_speed=ATTACKER_SPEED_MULTIPLIER,
+                              normal_speed=NORMAL_NODE_SPEED_MULTIPLIER)
+
+print("\nFin de la simulacion.")
+print(f"Tiempo simulado {result['simulated_time']:.0f} s en {result['wall_time']:.2f} s reales ({result['processed_events']} eventos).")
+if "messages_sent" in result:
+    print(f"Red: {result['messages_sent']} mensajes ({result['bytes_sent'] / 1e6:.2f} MB), {result['messages_dropped']} descartados por particiones.")
+if "compact_savings" in result:
+    print("Compact blocks (ahorro frente al bloque completo, todos los enlaces):")
+    for block_hash, savings in result["compact_savings"].items():
+        print(f" - Bloque {block_hash[:8]}...: {savings['bytes_saved']} bytes, {savings['time_saved'] * 1000:.1f} ms")
+
+print("\nEstado final de los nodos:")
+for node in result["nodes"]:
+    print(f"Nodo {node.node_id}: Bloques={len(node.blockchain.chain)}, hash={node.blockchain.last_block.calculate_hash()[:8]}..., mempool= {len(node.mempool)}")
+    blocks = len(node.blockchain.chain) - 1
+    attacker_blocks = result["blocks_mined_by"][node.node_id].get(ATTACKER_NODE_ID, 0)
+    if blocks > 0:
+        print(f"   Bloques del atacante: {attacker_blocks}/{blocks} ({100 * attacker_blocks / blocks:.1f}%)")
+
+print(f"Cadena mas laga: {result['max_chain_length']} bloques")
+print("Hashes finales:")
+for hash_val, node_ids in result["final_hashes"].items():
+    print(f" - Hash {hash_val[:8]}...: {len(node_ids)} nodos ({','. join(node_ids)})")
+if result["consensus"]:
+    print("CONSENSO")
+else:
+    print("INCONSISTENCIA")
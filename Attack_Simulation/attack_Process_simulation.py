@@ -0,0 +1,45 @@
+from attack_process_runtime import run_process_simulation
+from attack_block import HEADER_VERSION_BINARY
+
+# --- CONFIGURACION ---
+NUM_NODES = 4
+INITIAL_DIFFICULTY = 6 # Mas que en attack_Thread_simulation: cada nodo mina con un nucleo propio
+SIMULATION_TIME = 40  # segundos
+SEED = None # Semilla de carteras y acciones aleatorias de cada proceso (None = aleatoria)
+
+# --- CONFIGURACION DEL ATAQUE ---
+ATTACKER_NODE_ID = "Node-0"
+ATTACKER_SPEED_MULTIPLIER = 150 # Veces mas rapido que va el atacante
+
+NORMAL_NODE_SPEED_MULTIPLIER = 0.2
+
+if __name__ == "__main__": # Necesario para multiprocessing con spawn (Windows)
+    print("Iniciando la simulacion con un proceso por nodo...")
+    result = run_process_simulation(num_nodes=NUM_NODES,
+                                    difficulty=INITIAL_DIFFICULTY,
+                                    simulation_time=SIMULATION_TIME,
+                                    header_version=HEADER_VERSION_BINARY,
+                                    seed=SEED,
+                                    attacker_node_id=ATTACKER_NODE_ID,
+                                    attacker_speed=ATTACKER_SPEED_MULTIPLIER,
+                                    normal_speed=NORMAL_NODE_SPEED_MULTIPLIER)
+
+    print("\nFin de la simulacion.")
+    print(f"Duración {result['wall_time']:.2f} segundos.")
+
+    print("\nEstado final de los nodos:")
+    for node in result["nodes"]:
+        print(f"Nodo {node.node_id}: Bloques={len(node.blockchain.chain)}, hash={node.blockchain.last_block.calculate_hash()[:8]}..., mempool= {node.mempool_size}, CPU= {node.cpu_time:.2f} s ({node.cpu_percent:.0f}%)")
+        blocks = len(node.blockchain.chain) - 1
+        attacker_blocks = result["blocks_mined_by"][node.node_id].get(ATTACKER_NODE_ID, 0)
+        if blocks > 0:
+            print(f"   Bloques del atacante: {attacker_blocks}/{blocks} ({100 * attacker_blocks / blocks:.1f}%)")
+
+    print(f"Cadena mas laga: {result['max_chain_length']} bloques")
+    print("Hashes finales:")
+    for hash_val, node_ids in result["final_hashes"].items():
+        print(f" - Hash {hash_val[:8]}...: {len(node_ids)} nodos ({','. join(node_ids)})")
+    if result["consensus"]:
+        print("CONSENSO")
+    else:
+        print("INCONSISTENCIA")
@@ -0,0 +1,184 @@
+import heapq
+import json
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+from attack_transactions import Transaction
+
+MEMPOOL_MAX_TXS = 5000 # Tx pendientes como maximo
+MEMPOOL_MAX_BYTES = 2000000 # Bytes (serializados) de Tx pendientes como maximo
+MEMPOOL_MAX_AGE = 3600.0 # Segundos en el mempool antes de expirar (None = sin expiracion)
+
+
+def transaction_size(transaction: Transaction) -> int:
+    '''Bytes de la Tx serializada, para el fee rate y los limites de memoria y de bloque'''
+    return len(json.dumps(transaction.to_dict(), sort_keys=True).encode())
+
+
+class MempoolEntry:
+    __slots__ = ("tx", "txid", "size", "fee_rate", "added_at", "sequence")
+
+    def __init__(self, tx: Transaction, size: int, added_at: float, sequence: int):
+        self.tx = tx
+        self.txid = tx.calculate_hash()
+        self.size = size
+        self.fee_rate = tx.fee / size # Monedas por byte
+        self.added_at = added_at
+        self.sequence = sequence # Orden de llegada, desempata a igual fee rate
+
+
+class Mempool:
+    '''
+    Tx pendientes indexadas por txid. Un heap de minimos por fee rate da la Tx que se expulsa
+    cuando se supera max_txs o max_bytes (solo si la nueva paga mas por byte), y un
+    OrderedDict por orden de llegada la que expira al pasar max_age segun `clock`. on_remove
+    se llama con cada Tx que sale y el motivo ("evicted", "expired" o None si se ha quitado),
+    para mantener otros indices y quitar las Tx que dependian de ella.
+    Se puede usar como el set de Tx de antes: in, len, iteracion y difference_update.
+    '''
+    def __init__(self,
+                 max_txs: int = MEMPOOL_MAX_TXS,
+                 max_bytes: int = MEMPOOL_MAX_BYTES,
+                 max_age: Optional[float] = MEMPOOL_MAX_AGE,
+                 clock: Callable[[], float] = time.time,
+                 on_remove: Callable[[Transaction, Optional[str]], None] = None):
+        if max_txs <= 0 or max_bytes <= 0:
+            raise ValueError("Los limites del mempool deben ser positivos")
+        self.max_txs = max_txs
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.clock = clock
+        self.on_remove = on_remove
+        self._entries: "OrderedDict[str, MempoolEntry]" = OrderedDict() # txid -> entrada, del mas antiguo al mas reciente
+        self._heap: List[tuple] = [] # (fee_rate, sequence, txid); las de Tx ya quitadas se descartan al salir
+        self._sequence = 0
+        self.total_bytes = 0
+        self.stats = {"evicted": 0, "expired": 0, "rejected": 0}
+
+    @staticmethod
+    def _txid(item: Union[Transaction, str]) -> str:
+        return item if isinstance(item, str) else item.calculate_hash()
+
+    def __contains__(self, item: Union[Transaction, str]) -> bool:
+        return self._txid(item) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return iter([entry.tx for entry in self._entries.values()])
+
+    @property
+    def next_sequence(self) -> int:
+        '''Secuencia que tendra la proxima Tx admitida: las anteriores ya estan (o estuvieron) en el mempool'''
+        return self._sequence
+
+    def _entries_since(self, sequence: int) -> List[MempoolEntry]:
+        '''Entradas admitidas con secuencia >= sequence. Se recorre desde el final: O(nuevas)'''
+        entries = []
+        for entry in reversed(self._entries.values()):
+            if entry.sequence < sequence:
+                break
+            entries.append(entry)
+        entries.reverse()
+        return entries
+
+    def get(self, txid: str) -> Optional[Transaction]:
+        entry = self._entries.get(txid)
+        return entry.tx if entry is not None else None
+
+    def add(self, tx: Transaction) -> bool:
+        '''Admite la Tx. Si no cabe expulsa las de menor fee rate, o la rechaza si ella es la que menos paga'''
+        self.expire()
+        if tx.calculate_hash() in self._entries:
+            return False
+        entry = MempoolEntry(tx, transaction_size(tx), self.clock(), self._sequence)
+        if entry.size > self.max_bytes:
+            self.stats["rejected"] += 1
+            return False
+
+        # Victimas de menor fee rate hasta hacer sitio; si alguna paga lo mismo o mas se rechaza la nueva
+        victims: List[MempoolEntry] = []
+        freed = 0
+        while len(self._entries) - len(victims) >= self.max_txs or self.total_bytes - freed + entry.size > self.max_bytes:
+            victim = self._pop_lowest()
+            if victim is None or victim.fee_rate >= entry.fee_rate:
+                for restored in victims + ([victim] if victim is not None else []):
+                    heapq.heappush(self._heap, (restored.fee_rate, restored.sequence, restored.txid))
+                self.stats["rejected"] += 1
+                return False
+            victims.append(victim)
+            freed += victim.size
+        for victim in victims:
+            self._remove(victim.txid, "evicted")
+
+        self._sequence += 1
+        self._entries[entry.txid] = entry
+        self.total_bytes += entry.size
+        heapq.heappush(self._heap, (entry.fee_rate, entry.sequence, entry.txid))
+        return True
+
+    def _pop_lowest(self) -> Optional[MempoolEntry]:
+        while self._heap:
+            _, sequence, txid = heapq.heappop(self._heap)
+            entry = self._entries.get(txid)
+            if entry is not None and entry.sequence == sequence:
+                return entry
+        return None
+
+    def _remove(self, txid: str, reason: str = None) -> Optional[Transaction]:
+        entry = self._entries.pop(txid, None)
+        if entry is None:
+            return None
+        self.total_bytes -= entry.size
+        if reason is not None:
+            self.stats[reason] += 1
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # Demasiadas entradas obsoletas en el heap: reconstruirlo, O(n) amortizado
+            self._heap = [(e.fee_rate, e.sequence, e.txid) for e in self._entries.values()]
+            heapq.heapify(self._heap)
+        if self.on_remove is not None:
+            self.on_remove(entry.tx, reason)
+        return entry.tx
+
+    def remove(self, item: Union[Transaction, str]) -> Optional[Transaction]:
+        return self._remove(self._txid(item))
+
+    def difference_update(self, items: Iterable[Union[Transaction, str]]):
+        '''Quita las Tx indicadas (objetos o txids), p.ej. las confirmadas en un bloque'''
+        for item in items:
+            self._remove(self._txid(item))
+
+    def expire(self):
+        '''Quita las Tx que llevan mas de max_age en el mempool. O(expiradas)'''
+        if self.max_age is None:
+            return
+        limit = self.clock() - self.max_age
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest.added_at >= limit:
+                break
+            self._remove(oldest.txid, "expired")
+
+    def build_block_template(self, max_txs: Optional[int] = None, max_bytes: Optional[int] = None, since: Optional[int] = None) -> List[Transaction]:
+        '''
+        Tx para el siguiente bloque: las de mayor fee rate que quepan en max_txs y max_bytes,
+        ordenadas por timestamp para que una Tx vaya despues de la que le da sus entradas.
+        Con since solo se miran las admitidas desde esa secuencia (next_sequence): ampliar
+        un bloque candidato cuesta O(nuevas), no ordenar todo el mempool
+        '''
+        self.expire()
+        entries = self._entries.values() if since is None else self._entries_since(since)
+        template: List[MempoolEntry] = []
+        total = 0
+        for entry in sorted(entries, key=lambda e: (-e.fee_rate, e.sequence)):
+            if max_txs is not None and len(template) >= max_txs:
+                break
+            if max_bytes is not None and total + entry.size > max_bytes:
+                continue # Otra mas pequena aun puede caber
+            template.append(entry)
+            total += entry.size
+        return [entry.tx for entry in sorted(template, key=lambda e: (e.tx.timestamp, e.sequence))]
+
+    def info(self) -> Dict[str, int]:
+        return {"txs": len(self._entries), "bytes": self.total_bytes, **self.stats}
@@ -0,0 +1,99 @@
+import multiprocessing
+import itertools
+import queue
+import threading
+from collections import deque
+from typing import Optional, Tuple, Callable
+from attack_block import HeaderTemplate
+
+CHUNK_SIZE = 50000 # Nonces por tarea enviada al pool
+CHECK_INTERVAL = 10000 # Nonces entre comprobaciones de cancelacion dentro de una tarea
+MAX_JOBS = 64 # Trabajos de minado simultaneos (uno por nodo minando)
+NO_JOB = -1
+
+_active_jobs = None # Array compartido: trabajo activo en cada hueco, lo instala el initializer
+
+
+def _init_worker(active_jobs):
+    global _active_jobs
+    _active_jobs = active_jobs
+
+
+def _search_range(template: HeaderTemplate, difficulty: int, start: int, stop: int, slot: int, job_id: int) -> Optional[Tuple[int, str]]:
+    '''Ejecutada en un proceso del pool: busca un nonce valido en [start, stop) mientras el trabajo siga activo'''
+    nonce = start
+    while nonce < stop:
+        if _active_jobs[slot] != job_id: # Trabajo cancelado o terminado
+            return None
+        result = template.search(difficulty, start=nonce, stop=min(nonce + CHECK_INTERVAL, stop))
+        if result is not None:
+            return result
+        nonce += CHECK_INTERVAL
+    return None
+
+
+class MiningEngine:
+    '''
+    Motor de minado multiproceso. Reparte el espacio de nonces en rangos entre
+    un pool de procesos, evitando el GIL. Se puede compartir entre varios nodos:
+    cada llamada a mine() es un trabajo independiente que se cancela en cuanto
+    termina, sin esperar a los rangos que quedan en cola.
+    '''
+    def __init__(self, num_workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE):
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.completed_ranges = 0 # Rangos recorridos enteros sin encontrar solucion (estadistica)
+        self._stats_lock = threading.Lock() # mine() se llama desde los hilos de todos los nodos
+        self._job_ids = itertools.count()
+        self._free_slots = queue.Queue()
+        for slot in range(MAX_JOBS):
+            self._free_slots.put(slot)
+        # Con fork los procesos no vuelven a ejecutar el script principal. Crear el motor
+        # antes de arrancar los hilos de los nodos para no hacer fork con hilos activos
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self._active_jobs = context.Array('q', [NO_JOB] * MAX_JOBS, lock=False)
+        self._pool = context.Pool(self.num_workers, initializer=_init_worker, initargs=(self._active_jobs,))
+        print(f"Motor de minado iniciado con {self.num_workers} procesos")
+
+    def mine(self, template: HeaderTemplate, difficulty: int, should_stop: Optional[Callable[[], bool]] = None, poll_interval: float = 0.05) -> Optional[Tuple[int, str]]:
+        '''
+        Busca un nonce valido para la plantilla. Devuelve (nonce, hash), o None si
+        should_stop() devuelve True antes (p.ej. el nodo ha recibido un bloque valido)
+        '''
+        slot = self._free_slots.get() # Bloquea si hay MAX_JOBS trabajos en curso
+        job_id = next(self._job_ids)
+        self._active_jobs[slot] = job_id
+        pending = deque()
+        next_nonce = 0
+        completed_ranges = 0 # Del trabajo; se suma al total del motor al terminar
+
+        def submit_range():
+            nonlocal next_nonce
+            args = (template, difficulty, next_nonce, next_nonce + self.chunk_size, slot, job_id)
+            pending.append(self._pool.apply_async(_search_range, args))
+            next_nonce += self.chunk_size
+
+        try:
+            for _ in range(2 * self.num_workers): # Dos rangos por proceso para no dejarlos ociosos
+                submit_range()
+            while True:
+                if should_stop is not None and should_stop():
+                    return None
+                pending[0].wait(poll_interval)
+                for async_result in [r for r in pending if r.ready()]:
+                    pending.remove(async_result)
+                    result = async_result.get()
+                    if result is not None:
+                        return result
+                    completed_ranges += 1
+                    submit_range()
+        finally:
+            self._active_jobs[slot] = NO_JOB # Los rangos pendientes de este trabajo terminan al empezar
+            self._free_slots.put(slot)
+            with self._stats_lock:
+                self.completed_ranges += completed_ranges
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
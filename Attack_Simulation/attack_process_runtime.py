@@ -0,0 +1,152 @@
+import multiprocessing
+import os
+import queue
+import random
+import time
+from typing import List, Dict, Any
+from attack_blockchain import Blockchain, INITIAL_BALANCE
+from attack_block import HEADER_VERSION_BINARY
+from attack_transactions import Wallet
+from attack_node import Node
+from attack_topology import build_topology
+from attack_event_runtime import summarize_nodes
+
+
+class RemotePeer:
+    '''Lo que un nodo necesita de un peer que vive en otro proceso: su id y su direccion'''
+    def __init__(self, node_id: str, address: str):
+        self.node_id = node_id
+        self.address = address
+
+    def get_address(self) -> str:
+        return self.address
+
+
+class NodeReport:
+    '''Estado final que cada proceso devuelve al principal, con el uso de CPU del proceso'''
+    def __init__(self, node_id: str, blockchain: Blockchain, mempool_size: int, cpu_time: float, wall_time: float):
+        self.node_id = node_id
+        self.blockchain = blockchain
+        self.mempool_size = mempool_size
+        self.cpu_time = cpu_time # Segundos de CPU de todos los hilos del proceso
+        self.wall_time = wall_time
+
+    @property
+    def cpu_percent(self) -> float:
+        return 100 * self.cpu_time / self.wall_time if self.wall_time > 0 else 0.0
+
+
+def _node_process(node_id: str,
+                  blockchain: Blockchain,
+                  wallet_seed: str,
+                  mining_speed: float,
+                  inbox: multiprocessing.JoinableQueue,
+                  peers_queues: Dict[str, multiprocessing.JoinableQueue],
+                  peers: List[RemotePeer],
+                  stop_event,
+                  report_queue: multiprocessing.Queue,
+                  gossip_fanout: int = None,
+                  inventory_relay: bool = False,
+                  compact_blocks: bool = False):
+    '''Punto de entrada de cada proceso: crea su nodo y ejecuta el mismo bucle que el hilo'''
+    random.seed(wallet_seed) # Con fork todos los procesos heredarian el mismo estado de random
+    start_wall = time.time()
+    start_cpu = time.process_time()
+    node = Node(node_id=node_id,
+                blockchain_instance=blockchain,
+                node_list=peers,
+                stop_event=stop_event,
+                mining_speed=mining_speed,
+                wallet=Wallet(seed=wallet_seed),
+                gossip_fanout=gossip_fanout,
+                inventory_relay=inventory_relay,
+                compact_blocks=compact_blocks)
+    node.incoming_queue = inbox
+    node.peers_queues = peers_queues
+    node.run() # Minado en hilos dentro del proceso, sin competir por el GIL con otros nodos
+
+    # Los mensajes pendientes hacia otros nodos ya no importan, no esperar a vaciarlos al salir
+    for peer_queue in peers_queues.values():
+        peer_queue.cancel_join_thread()
+    with node.data_lock:
+        mempool_size = len(node.mempool)
+    report_queue.put(NodeReport(node_id, node.blockchain, mempool_size,
+                                time.process_time() - start_cpu, time.time() - start_wall))
+
+
+def run_process_simulation(num_nodes: int = 4,
+                           difficulty: int = 6, # Un nucleo por nodo: los bloques deben tardar mucho mas que la entrega de un mensaje
+                           simulation_time: float = 60.0,
+                           header_version: int = HEADER_VERSION_BINARY,
+                           seed: Any = None,
+                           report_timeout: float = 30.0,
+                           attacker_node_id: str = "Node-0",
+                           attacker_speed: float = 150.0,
+                           normal_speed: float = 0.2,
+                           topology: str = "full",
+                           degree: int = 8,
+                           gossip_fanout: int = None,
+                           inventory_relay: bool = False,
+                           compact_blocks: bool = False) -> Dict[str, Any]:
+    '''
+    Un proceso del sistema operativo por nodo. Los nodos intercambian mensajes por colas de
+    multiprocessing con los mismos manejadores que en attack_Thread_simulation, asi que la
+    simulacion escala con los nucleos. Devuelve el resumen y el uso de CPU de cada nodo.
+    '''
+    start_time = time.time()
+    stop_event = multiprocessing.Event()
+    report_queue = multiprocessing.Queue()
+    base_seed = seed if seed is not None else os.urandom(8).hex()
+
+    node_ids = [f"Node-{i}" for i in range(num_nodes)]
+    wallet_seeds = {node_id: f"{base_seed}-{node_id}" for node_id in node_ids}
+    peers = [RemotePeer(node_id, Wallet(seed=wallet_seeds[node_id]).get_address()) for node_id in node_ids]
+    initial_blockchain_template = Blockchain(difficulty=difficulty, header_version=header_version,
+                                             genesis_allocations={peer.get_address(): INITIAL_BALANCE for peer in peers})
+    inboxes = {node_id: multiprocessing.JoinableQueue() for node_id in node_ids}
+
+    graph = build_topology(num_nodes, topology, degree, seed=base_seed)
+
+    processes: List[multiprocessing.Process] = []
+    for i, node_id in enumerate(node_ids):
+        peers_queues = {node_ids[j]: inboxes[node_ids[j]] for j in graph.neighbors(i)}
+        speed = attacker_speed if node_id == attacker_node_id else normal_speed
+        process = multiprocessing.Process(target=_node_process,
+                                          args=(node_id, initial_blockchain_template, wallet_seeds[node_id], speed,
+                                                inboxes[node_id], peers_queues, peers, stop_event, report_queue,
+                                                gossip_fanout, inventory_relay, compact_blocks),
+                                          name=node_id,
+                                          daemon=True)
+        processes.append(process)
+
+    for process in processes:
+        process.start()
+    try:
+        time.sleep(simulation_time)
+    except KeyboardInterrupt:
+        print("Simulacion detenida por el usuario.")
+    finally:
+        stop_event.set()
+
+    # Recoger los informes antes de join, si no el proceso espera a que se vacie su cola
+    reports: List[NodeReport] = []
+    for _ in processes:
+        try:
+            reports.append(report_queue.get(timeout=report_timeout))
+        except queue.Empty:
+            break
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            print(f"{process.name} no ha terminado correctamente.")
+            process.terminate()
+    if not reports:
+        raise RuntimeError("Ningun nodo ha devuelto su estado")
+    reports.sort(key=lambda report: node_ids.index(report.node_id))
+
+    summary = summarize_nodes(reports)
+    summary["cpu_time"] = {report.node_id: report.cpu_time for report in reports}
+    summary["cpu_percent"] = {report.node_id: report.cpu_percent for report in reports}
+    summary["wall_time"] = time.time() - start_time
+    summary["nodes"] = reports
+    return summary
@@ -0,0 +1,111 @@
+from typing import Dict, List, Optional, Set, Tuple
+from attack_transactions import Transaction
+
+Outpoint = Tuple[str, int] # (txid, posicion de la salida)
+Coin = Tuple[str, float] # (direccion propietaria, cantidad)
+
+GENESIS_SENDER = "0" * 128 # Emisor de las asignaciones iniciales del bloque genesis (no se puede firmar)
+MAX_OUTPUTS = 2 # Pago y cambio
+
+
+def transaction_outputs(transaction: Transaction, input_value: float) -> List[Coin]:
+    '''Salidas de una Tx: el pago al destinatario y, si sobra, el cambio de vuelta al emisor. La fee no crea salida'''
+    outputs = [(transaction.recipient, transaction.amount)]
+    change = round(input_value - transaction.amount - transaction.fee, 8)
+    if change > 0:
+        outputs.append((transaction.sender, change))
+    return outputs
+
+
+def transaction_outpoints(transaction: Transaction) -> List[Outpoint]:
+    '''Salidas que gasta la Tx. Tras pasar por JSON las entradas pueden llegar como listas'''
+    return [tuple(outpoint) for outpoint in transaction.inputs]
+
+
+class UTXOSet:
+    '''
+    Salidas no gastadas indexadas por outpoint, con un indice por direccion para elegir
+    monedas y consultar saldos sin recorrer el conjunto. Gastar y deshacer una Tx cuesta
+    O(entradas + salidas), independiente de la longitud de la cadena.
+    '''
+    def __init__(self):
+        self._coins: Dict[Outpoint, Coin] = {}
+        self._by_address: Dict[str, Set[Outpoint]] = {}
+
+    def __contains__(self, outpoint: Outpoint) -> bool:
+        return outpoint in self._coins
+
+    def __len__(self) -> int:
+        return len(self._coins)
+
+    def get(self, outpoint: Outpoint) -> Optional[Coin]:
+        return self._coins.get(outpoint)
+
+    def add(self, outpoint: Outpoint, address: str, amount: float):
+        self._coins[outpoint] = (address, amount)
+        self._by_address.setdefault(address, set()).add(outpoint)
+
+    def remove(self, outpoint: Outpoint) -> Optional[Coin]:
+        coin = self._coins.pop(outpoint, None)
+        if coin is not None:
+            outpoints = self._by_address[coin[0]]
+            outpoints.discard(outpoint)
+            if not outpoints:
+                del self._by_address[coin[0]]
+        return coin
+
+    def coins(self, address: str) -> List[Outpoint]:
+        return sorted(self._by_address.get(address, ())) # Orden fijo: seleccion de monedas determinista
+
+    def balance(self, address: str) -> float:
+        return round(sum(self._coins[outpoint][1] for outpoint in self._by_address.get(address, ())), 8)
+
+    def add_outputs(self, transaction: Transaction, input_value: float):
+        txid = transaction.calculate_hash()
+        for index, (address, amount) in enumerate(transaction_outputs(transaction, input_value)):
+            self.add((txid, index), address, amount)
+
+    def remove_outputs(self, transaction: Transaction):
+        '''Borra las salidas de la Tx que queden (son consecutivas desde la 0)'''
+        txid = transaction.calculate_hash()
+        index = 0
+        while self.remove((txid, index)) is not None:
+            index += 1
+
+    def input_value(self, transaction: Transaction, fallback: 'UTXOSet' = None) -> Optional[float]:
+        '''
+        Suma de las monedas que gasta la Tx, o None si alguna no existe, no es del emisor o
+        esta repetida. Las que no estan aqui se buscan en `fallback` (p.ej. salidas del mempool)
+        '''
+        outpoints = transaction_outpoints(transaction)
+        if not outpoints or len(set(outpoints)) != len(outpoints):
+            return None
+        total = 0.0
+        for outpoint in outpoints:
+            coin = self._coins.get(outpoint)
+            if coin is None and fallback is not None:
+                coin = fallback.get(outpoint)
+            if coin is None or coin[0] != transaction.sender:
+                return None
+            total += coin[1]
+        total = round(total, 8)
+        valid = transaction.amount > 0 and transaction.fee >= 0 and total >= round(transaction.amount + transaction.fee, 8)
+        return total if valid else None
+
+    def apply(self, transaction: Transaction) -> Optional[List[Tuple[Outpoint, Coin]]]:
+        '''Gasta las entradas y crea las salidas. Devuelve las monedas gastadas (para deshacer) o None si no es valida'''
+        input_value = self.input_value(transaction)
+        if input_value is None:
+            return None
+        spent = [(outpoint, self.remove(outpoint)) for outpoint in transaction_outpoints(transaction)]
+        self.add_outputs(transaction, input_value)
+        return spent
+
+    def revert(self, transaction: Transaction, spent: List[Tuple[Outpoint, Coin]]):
+        '''Deshace apply: borra las salidas de la Tx y devuelve las monedas gastadas'''
+        txid = transaction.calculate_hash()
+        input_value = round(sum(amount for _, (_, amount) in spent), 8) if spent else transaction.amount
+        for index in range(len(transaction_outputs(transaction, input_value))):
+            self.remove((txid, index))
+        for outpoint, (address, amount) in spent:
+            self.add(outpoint, address, amount)
@@ -0,0 +1,59 @@
+import multiprocessing
+from typing import List, Optional, Tuple
+from attack_transactions import Transaction, SignatureCache, verify_signature
+
+CHUNK_SIZE = 16 # Firmas por tarea enviada al pool
+MIN_BATCH = 8 # Con menos firmas pendientes se verifica en el hilo del nodo, no compensa el envio al pool
+
+
+def _verify_chunk(items: List[Tuple[str, str, str]]) -> int:
+    '''Ejecutada en un proceso del pool: posicion de la primera firma no valida del trozo, o -1'''
+    for position, (sender, signature, tx_hash) in enumerate(items):
+        if not verify_signature(sender, signature, tx_hash):
+            return position
+    return -1
+
+
+class VerificationEngine:
+    '''
+    Verificacion de firmas multiproceso. Reparte las Tx de un bloque (o de una rafaga de Tx
+    entrantes) en trozos entre un pool de procesos, evitando el GIL, y responde en cuanto un
+    trozo encuentra una firma no valida sin esperar al resto. Se puede compartir entre nodos.
+    '''
+    def __init__(self, num_workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE, min_batch: int = MIN_BATCH):
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.min_batch = min_batch
+        self.verified = 0 # Firmas verificadas por el pool (estadistica)
+        # Igual que el motor de minado: crearlo antes de arrancar los hilos de los nodos
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self._pool = context.Pool(self.num_workers)
+        print(f"Motor de verificacion iniciado con {self.num_workers} procesos")
+
+    def verify_batch(self, transactions: List[Transaction], signature_cache: Optional[SignatureCache] = None) -> bool:
+        '''
+        True si todas las firmas son validas. Las que ya estan en signature_cache no se
+        vuelven a verificar y las verificadas se anaden al terminar.
+        '''
+        pending = [tx for tx in transactions if signature_cache is None or tx not in signature_cache]
+        if not all(tx.signature for tx in pending):
+            print("Transaction no firmada")
+            return False
+        if len(pending) < self.min_batch:
+            return all(tx.is_valid(signature_cache) for tx in pending) # all() para en la primera no valida
+
+        items = [(tx.sender, tx.signature, tx.calculate_hash()) for tx in pending]
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        for first_invalid in self._pool.imap_unordered(_verify_chunk, chunks):
+            if first_invalid >= 0:
+                return False # Los trozos que quedan terminan en el pool, pero no se esperan
+        self.verified += len(pending)
+        if signature_cache is not None:
+            for tx in pending:
+                signature_cache.add(tx)
+        return True
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
@@ -1,68 +1,49 @@
-import pennylane as qml
-from pennylane import numpy as np
+import numpy as np
 import networkx as nx 
 import time
 import threading
 from typing import Optional, List, Tuple
+from quantum_qaoa_kernel import MaxCutStatevector, AdamOptimizer as StatevectorAdamOptimizer
+from quantum_maxcut import graph_cut_size, graph_cut_sizes, bitstrings_to_partitions, as_networkx, AnyGraph
 
-def _calculate_cut_size(graph: nx.Graph, partition: List[int]) -> int:
+QAOA_BACKENDS = ("numpy", "pennylane")
+DEFAULT_QAOA_BACKEND = "numpy" # Vector de estado propio con gradiente adjunto; "pennylane": default.qubit + autograd (original)
+EXTRACTION_MODES = ("samples", "argmax")
+DEFAULT_EXTRACTION = "samples" # Muestrear `shots` bitstrings en cada paso y quedarse con el mejor corte; "argmax": estado mas probable del vector 2^N (original)
+DEFAULT_SHOTS = 1000 # Bitstrings muestreados por paso del optimizador
+
+def _calculate_cut_size(graph: AnyGraph, partition: List[int]) -> int:
     '''Calcula el numero de cortes de una particion dada'''
-    n_nodes = graph.number_of_nodes()
-    if n_nodes == 0: return 0
-    
-    if len(partition) != n_nodes:
+    try:
+        return graph_cut_size(graph, partition)
+    except ValueError:
         print(f"Error! Tamano de particion y de numero de nodos no coincide")
         return -1
-    
-    cut_size = 0
-    
-    for u, v in graph.edges():
-        # Asegurar que los indices estén dentro de los limites de la particion
-        if u >= n_nodes or v >= n_nodes or u < 0 or v < 0:
-            print(f"Error! Arista ({u}, {v}) fuera de los limites. Numero de nodos {n_nodes}")
-            continue
-        try: 
-            if partition[u] != partition[v]:
-                cut_size +=1
-        except IndexError:
-            print(f"Indice fuera del rango de particion")
-            return -1
-        
-    return cut_size
 
-def solve_max_cut_qaoa(
-    graph: nx.Graph,
-    target_cut: int,
-    stop_event: threading.Event,
-    node_id: str = "QAOA_solver", # Para logs
-    n_layer: int = 2, # Capas QAOA
-    optim_steps: int = 20, # Pasos optimizador clasico
-    check_interval: int = 10 # Cada cuando verifica si se alcanzo el target_cut
-    ) -> Optional[List[int]]:
-        
-    num_nodes = graph.number_of_nodes()
-    start_time = time.time()
-    
-    if num_nodes == 0:
-        print(f"Nodo {node_id}: Grafo vacio")
-        return None
-    
-    print(f"Nodo {node_id}: Iniciando QAOA (N={num_nodes}, Target: {target_cut}, Capas: {n_layer}, Pasos: {optim_steps})")
-    
+def _pennylane_solver(graph: AnyGraph, num_nodes: int, n_layer: int, node_id: str, shots: Optional[int]):
+    '''
+    Circuito QAOA en default.qubit. Devuelve (paso del optimizador, probabilidades, muestras) o
+    (None, None, None) si falla. Sin shots no hay muestras (ni se consume la semilla global).
+    PennyLane solo se importa aqui: el backend "numpy" no lo necesita
+    '''
+    import pennylane as qml
+    from pennylane import numpy as pnp
+
     # --- 1. Definir Hamiltoniano desde el grafo ---
-    
     try:
-        cost_h, mixer_h = qml.qaoa.maxcut(graph=graph)
+        cost_h, mixer_h = qml.qaoa.maxcut(graph=as_networkx(graph))
     except Exception as e:
         print(f"Nodo {node_id}: Error al generar Hamiltoniano - {e}")
-        return None
+        return None, None, None
     
     #  --- 2. Configurar dispositivo simulacion ---
     try: 
         dev = qml.device('default.qubit', wires=num_nodes)
+        if shots is not None: # Muestras reproducibles con la semilla global
+            sample_dev = qml.device('default.qubit', wires=num_nodes, seed=np.random.randint(2 ** 31))
     except qml.DeviceError as e:
         print(f"Nodo {node_id}: Error al crear simulador Pennylane - {e}")
-        return None
+        return None, None, None
     
     # --- 3. Definir circuito QAOA en la funcion
     
@@ -89,14 +70,68 @@ def solve_max_cut_qaoa(
     def probability_circuit(params):
         circuit(params, wires=range(num_nodes))
         return qml.probs(wires=range(num_nodes))
+
+    sample_partitions = None
+    if shots is not None:
+        @qml.qnode(sample_dev, shots=shots)
+        def sample_circuit(params):
+            circuit(params, wires=range(num_nodes))
+            return qml.sample() # (shots, N): bits de cada qubit, qubit 0 primero
+
+        sample_partitions = lambda params: pnp.asarray(sample_circuit(params)).numpy().astype(np.uint8)
     
     # --- 4. Configurar optimizador
     optimizer = qml.AdamOptimizer(stepsize=0.1)
+    return (lambda params: optimizer.step(cost_function, params)), (lambda params: probability_circuit(params).numpy()), sample_partitions
+
+
+def solve_max_cut_qaoa(
+    graph: AnyGraph, # nx.Graph o EdgeListGraph (GRAPH_VERSION_NUMPY)
+    target_cut: int,
+    stop_event: threading.Event,
+    node_id: str = "QAOA_solver", # Para logs
+    n_layer: int = 2, # Capas QAOA
+    optim_steps: int = 20, # Pasos optimizador clasico
+    check_interval: int = 10, # Cada cuando verifica si se alcanzo el target_cut (solo con extraction="argmax")
+    backend: str = DEFAULT_QAOA_BACKEND, # Simulador del circuito, mismos resultados con ambos
+    extraction: str = DEFAULT_EXTRACTION, # Como se obtiene la particion del estado: "samples" o "argmax"
+    shots: int = DEFAULT_SHOTS, # Bitstrings por paso con extraction="samples"
+    success_log: Optional[List[float]] = None # Si se pasa, se anade la probabilidad de exito estimada en cada paso
+    ) -> Optional[List[int]]:
+        
+    if backend not in QAOA_BACKENDS:
+        raise ValueError(f"Backend QAOA desconocido: {backend} (disponibles: {QAOA_BACKENDS})")
+    if extraction not in EXTRACTION_MODES:
+        raise ValueError(f"Extraccion desconocida: {extraction} (disponibles: {EXTRACTION_MODES})")
+    num_nodes = graph.number_of_nodes()
+    start_time = time.time()
     
-    #np.random.seed(int(time.time()) + hash(node_id)) # Inicilizar parametros aleatoriamente
-    params = np.random.uniform(0, 2 * np.pi, (2, n_layer), requires_grad = True)
+    if num_nodes == 0:
+        print(f"Nodo {node_id}: Grafo vacio")
+        return None
     
+    print(f"Nodo {node_id}: Iniciando QAOA (N={num_nodes}, Target: {target_cut}, Capas: {n_layer}, Pasos: {optim_steps})")
     
+    if backend == "numpy":
+        # --- Kernel NumPy: el vector de cortes se calcula una vez por grafo ---
+        kernel = MaxCutStatevector(graph)
+        optimizer = StatevectorAdamOptimizer(stepsize=0.1)
+
+        def optimizer_step(params):
+            _, gradient = kernel.expectation_and_gradient(params)
+            return optimizer.apply_grad(gradient, params)
+
+        probabilities = kernel.probabilities
+        sample_partitions = lambda params: bitstrings_to_partitions(kernel.sample(params, shots), num_nodes)
+        params = np.random.uniform(0, 2 * np.pi, (2, n_layer)) # Mismo sorteo que con PennyLane (semilla global de numpy)
+    else:
+        optimizer_step, probabilities, sample_partitions = _pennylane_solver(graph, num_nodes, n_layer, node_id,
+                                                                            shots if extraction == "samples" else None)
+        if optimizer_step is None:
+            return None
+        from pennylane import numpy as pnp
+        params = pnp.random.uniform(0, 2 * np.pi, (2, n_layer), requires_grad = True)
+
     # -- Bucle de optimizacion
     best_found_partition = None
     best_found_cut = -1
@@ -108,10 +143,32 @@ def solve_max_cut_qaoa(
             return None
             
         try:
-            params = optimizer.step(cost_function, params)
+            params = optimizer_step(params)
         except Exception as e:
             print(f"Nodo {node_id}: Error en optimizacion")
             return None
+
+        if extraction == "samples":
+            # Muestras del estado puntuadas todas a la vez: la mejor no tiene por que ser el estado mas probable
+            try:
+                partitions = sample_partitions(params)
+            except Exception as e:
+                print(f"Nodo {node_id}: Error al muestrear el estado - {e}")
+                continue
+            cuts = graph_cut_sizes(graph, partitions)
+            success_probability = float(np.mean(cuts >= target_cut)) # Estimada con las muestras
+            if success_log is not None:
+                success_log.append(success_probability)
+            best = int(np.argmax(cuts))
+            print(f"Nodo {node_id}: Paso {i + 1}: P(corte >= {target_cut}) ~ {success_probability:.3f} ({shots} muestras). Mejor corte: {cuts[best]}")
+            if cuts[best] > best_found_cut:
+                best_found_cut = int(cuts[best])
+                best_found_partition = [int(bit) for bit in partitions[best]]
+            if best_found_cut >= target_cut:
+                duration = time.time() - start_time
+                print(f"Nodo {node_id}: Solucion encontrada. Corte: {best_found_cut}. Tiempo: {duration:.2f}s")
+                return best_found_partition
+            continue
        
         # Verficiar solucion cada check_interval
         if (i + 1) % check_interval == 0 or  i == optim_steps -1:
@@ -121,7 +178,7 @@ def solve_max_cut_qaoa(
                 return None
             
             try:
-                current_probs = probability_circuit(params).numpy() # Obtener probabilidades
+                current_probs = probabilities(params) # Obtener probabilidades
                 max_probs = np.argmax(current_probs)
                 current_partition_str = format(max_probs, f'0{num_nodes}b')
                 current_partition = [int(bit) for bit in current_partition_str]
@@ -142,10 +199,8 @@ def solve_max_cut_qaoa(
                     print(f"Nodo {node_id}: Solucion encontrada. Corte: {current_cut}. Tiempo: {duration:.2f}s")
                     return current_partition
                     
-            except qml.QuantumFunctionError as e:
-                print(f"Nodo {node_id}: Error QuantumFunctionError - {e}")
-            except Exception as e:
-                 print(f"Nodo {node_id}: Error inesperado - {e}")
+            except Exception as e: # QuantumFunctionError de PennyLane incluido
+                 print(f"Nodo {node_id}: Error inesperado ({type(e).__name__}) - {e}")
                  
             time.sleep(0.1) # Para no saturar el procesador
             
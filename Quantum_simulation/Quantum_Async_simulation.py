@@ -0,0 +1,38 @@
+from quantum_async_runtime import run_async_simulation
+from quantum_block import GRAPH_VERSION_NUMPY, HEADER_VERSION_MERKLE
+
+# --- CONFIGURACION ---
+NUM_NODES = 3
+INITIAL_DIFFICULTY_RATIO = 0.58
+PROTOCOL_N = 14
+PROTOCOL_P = 0.5
+SIMULATION_TIME = 40  # segundos
+MINING_WORKERS = None # Solvers QAOA simultaneos (None = por defecto del executor)
+
+print("Iniciando la simulacion asyncio...")
+result = run_async_simulation(num_nodes=NUM_NODES,
+                              protocol_N=PROTOCOL_N,
+                              protocol_p=PROTOCOL_P,
+                              difficulty_ratio=INITIAL_DIFFICULTY_RATIO,
+                              graph_version=GRAPH_VERSION_NUMPY,
+                              header_version=HEADER_VERSION_MERKLE,
+                              simulation_time=SIMULATION_TIME,
+                              mining_workers=MINING_WORKERS)
+
+print("\nFin de la simulacion.")
+print(f"Duración {result['wall_time']:.2f} segundos.")
+graph_cache = result["graph_cache"]
+print(f"Cache de grafos: {graph_cache['hits']} aciertos, {graph_cache['misses']} grafos generados ({graph_cache['hit_rate']:.0%} de aciertos).")
+
+print("\nEstado final de los nodos:")
+for node in result["nodes"]:
+    print(f"Nodo {node.node_id}: Bloques={len(node.blockchain.chain)}, hash={node.blockchain.last_block.calculate_final_hash()[:8]}..., mempool= {len(node.mempool)}")
+
+print(f"Cadena mas laga: {result['max_chain_length']} bloques")
+print("Hashes finales:")
+for hash_val, node_ids in result["final_hashes"].items():
+    print(f" - Hash {hash_val[:8]}...: {len(node_ids)} nodos ({','. join(node_ids)})")
+if result["consensus"]:
+    print("CONSENSO")
+else:
+    print("INCONSISTENCIA")
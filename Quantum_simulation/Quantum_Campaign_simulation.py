@@ -0,0 +1,19 @@
+from quantum_campaign import run_campaign
+
+# --- CONFIGURACION DE LA CAMPANA ---
+# Cada combinacion se ejecuta con el simulador de eventos discretos una vez por semilla
+GRID = {
+    "num_nodes": [3],
+    "protocol_N": [8, 10],
+    "protocol_p": [0.5],
+    "difficulty_ratio": [0.55, 0.58],
+    "simulation_time": [120],
+}
+SEEDS = range(3)
+RESULTS_FILE = "quantum_campaign_results.csv"
+WORKERS = None # Procesos del pool (None = numero de nucleos)
+
+if __name__ == "__main__": # Necesario para el pool de procesos con spawn (Windows)
+    rows = run_campaign(GRID, SEEDS, results_file=RESULTS_FILE, workers=WORKERS)
+    consensus_runs = sum(1 for row in rows if row["consensus"])
+    print(f"\nFin de la campana: {len(rows)} ejecuciones, {consensus_runs} con consenso. Resultados en {RESULTS_FILE}")
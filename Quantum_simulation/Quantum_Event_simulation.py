@@ -0,0 +1,58 @@
+from quantum_event_runtime import run_event_simulation
+from quantum_block import GRAPH_VERSION_NUMPY, HEADER_VERSION_MERKLE
+
+# --- CONFIGURACION ---
+NUM_NODES = 3
+INITIAL_DIFFICULTY_RATIO = 0.58
+PROTOCOL_N = 14
+PROTOCOL_P = 0.5
+MINING_TIME_MEAN = 10 # Segundos virtuales medios de una ejecucion del solver QAOA
+SIMULATION_TIME = 60  # segundos virtuales
+SEED = 42
+# --- RED ---
+LATENCY_RANGE = (0.05, 0.3) # Latencia base de cada enlace en segundos (None = entrega instantanea)
+BANDWIDTH_RANGE = (1e6, 1e7) # Ancho de banda de cada enlace en bytes/s
+PARTITIONS = [] # Particiones programadas: (inicio, fin, [[node_id, ...], ...])
+INVENTORY_RELAY = False # Anunciar hashes (inv/getdata) en lugar de reenviar Tx y bloques completos
+COMPACT_BLOCKS = False # Enviar bloques como cabecera + short IDs y reconstruirlos con el mempool
+
+print("Iniciando la simulacion de eventos discretos...")
+result = run_event_simulation(num_nodes=NUM_NODES,
+                              protocol_N=PROTOCOL_N,
+                              protocol_p=PROTOCOL_P,
+                              difficulty_ratio=INITIAL_DIFFICULTY_RATIO,
+                              graph_version=GRAPH_VERSION_NUMPY,
+                              header_version=HEADER_VERSION_MERKLE,
+                              simulation_time=SIMULATION_TIME,
+                              seed=SEED,
+                              latency_range=LATENCY_RANGE,
+                              bandwidth_range=BANDWIDTH_RANGE,
+                              partitions=PARTITIONS,
+                              inventory_relay=INVENTORY_RELAY,
+                              compact_blocks=COMPACT_BLOCKS,
+                              mining_time_mean=MINING_TIME_MEAN)
+
+print("\nFin de la simulacion.")
+print(f"Tiempo simulado {result['simulated_time']:.0f} s en {result['wall_time']:.2f} s reales ({result['processed_events']} eventos).")
+if "messages_sent" in result:
+    print(f"Red: {result['messages_sent']} mensajes ({result['bytes_sent'] / 1e6:.2f} MB), {result['messages_dropped']} descartados por particiones.")
+if "compact_savings" in result:
+    print("Compact blocks (ahorro frente al bloque completo, todos los enlaces):")
+    for block_hash, savings in result["compact_savings"].items():
+        print(f" - Bloque {block_hash[:8]}...: {savings['bytes_saved']} bytes, {savings['time_saved'] * 1000:.1f} ms")
+
+graph_cache = result["graph_cache"]
+print(f"Cache de grafos: {graph_cache['hits']} aciertos, {graph_cache['misses']} grafos generados ({graph_cache['hit_rate']:.0%} de aciertos).")
+
+print("\nEstado final de los nodos:")
+for node in result["nodes"]:
+    print(f"Nodo {node.node_id}: Bloques={len(node.blockchain.chain)}, hash={node.blockchain.last_block.calculate_final_hash()[:8]}..., mempool= {len(node.mempool)}")
+
+print(f"Cadena mas laga: {result['max_chain_length']} bloques")
+print("Hashes finales:")
+for hash_val, node_ids in result["final_hashes"].items():
+    print(f" - Hash {hash_val[:8]}...: {len(node_ids)} nodos ({','. join(node_ids)})")
+if result["consensus"]:
+    print("CONSENSO")
+else:
+    print("INCONSISTENCIA")
@@ -0,0 +1,37 @@
+from quantum_process_runtime import run_process_simulation
+from quantum_block import GRAPH_VERSION_NUMPY, HEADER_VERSION_MERKLE
+
+# --- CONFIGURACION ---
+NUM_NODES = 3
+INITIAL_DIFFICULTY_RATIO = 0.58
+PROTOCOL_N = 14
+PROTOCOL_P = 0.5
+SIMULATION_TIME = 40  # segundos
+SEED = None # Semilla de carteras y acciones aleatorias de cada proceso (None = aleatoria)
+
+if __name__ == "__main__": # Necesario para multiprocessing con spawn (Windows)
+    print("Iniciando la simulacion con un proceso por nodo...")
+    result = run_process_simulation(num_nodes=NUM_NODES,
+                                    protocol_N=PROTOCOL_N,
+                                    protocol_p=PROTOCOL_P,
+                                    difficulty_ratio=INITIAL_DIFFICULTY_RATIO,
+                                    graph_version=GRAPH_VERSION_NUMPY,
+                                    header_version=HEADER_VERSION_MERKLE,
+                                    simulation_time=SIMULATION_TIME,
+                                    seed=SEED)
+
+    print("\nFin de la simulacion.")
+    print(f"Duración {result['wall_time']:.2f} segundos.")
+
+    print("\nEstado final de los nodos:")
+    for node in result["nodes"]:
+        print(f"Nodo {node.node_id}: Bloques={len(node.blockchain.chain)}, hash={node.blockchain.last_block.calculate_final_hash()[:8]}..., mempool= {node.mempool_size}, CPU= {node.cpu_time:.2f} s ({node.cpu_percent:.0f}%)")
+
+    print(f"Cadena mas laga: {result['max_chain_length']} bloques")
+    print("Hashes finales:")
+    for hash_val, node_ids in result["final_hashes"].items():
+        print(f" - Hash {hash_val[:8]}...: {len(node_ids)} nodos ({','. join(node_ids)})")
+    if result["consensus"]:
+        print("CONSENSO")
+    else:
+        print("INCONSISTENCIA")
@@ -1,9 +1,10 @@
 from quantum_blockchain import Quantum_Blockchain
-from quantum_block import Quantum_Block
+from quantum_block import Quantum_Block, GRAPH_VERSION_LEGACY, GRAPH_VERSION_NUMPY, HEADER_VERSION_LEGACY, HEADER_VERSION_MERKLE
 from quantum_transactions import Transaction
 from typing import List
 import time
 from quantum_node import Quantum_Node
+from quantum_topology import connect_nodes
 import copy
 import threading
 
@@ -14,6 +15,13 @@ INITIAL_DIFFICULTY_RATIO = 0.58
 PROTOCOL_N = 14
 PROTOCOL_P = 0.5
 SIMULATION_TIME = 40  # seconds
+TOPOLOGY = "full" # "full", "random_regular", "small_world" o "scale_free"
+DEGREE = 8 # Peers por nodo en las topologias dispersas
+GOSSIP_FANOUT = None # Peers a los que se reenvia cada mensaje (None = todos)
+INVENTORY_RELAY = False # Anunciar hashes (inv/getdata) en lugar de reenviar Tx y bloques completos
+COMPACT_BLOCKS = False # Enviar bloques como cabecera + short IDs y reconstruirlos con el mempool
+GRAPH_VERSION = GRAPH_VERSION_LEGACY # GRAPH_VERSION_NUMPY: grafo con un sorteo vectorizado de NumPy, sin networkx (mucho mas rapido con N grande)
+HEADER_VERSION = HEADER_VERSION_LEGACY # HEADER_VERSION_MERKLE: las Tx se comprometen con una raiz Merkle (pruebas de inclusion)
 
 # --Inicializacion
 print("Iniciando la simulacion...")
@@ -24,7 +32,9 @@ stop_event = threading.Event() # Evento para detener los hilos
 # --Crear instancia de Bockchain
 initial_blockchain_template = Quantum_Blockchain(protocol_N=PROTOCOL_N,
                                          protocol_p=PROTOCOL_P, 
-                                         initial_difficulty_ratio=INITIAL_DIFFICULTY_RATIO)
+                                         initial_difficulty_ratio=INITIAL_DIFFICULTY_RATIO,
+                                         graph_version=GRAPH_VERSION,
+                                         header_version=HEADER_VERSION)
 
 # 1. Crear nodos sin inicializar
 
@@ -36,16 +46,16 @@ for i in range(NUM_NODES):
     node = Quantum_Node(node_id=node_id,
                 blockchain_instance=node_block_chain_copy, 
                 node_list= nodes,
-                stop_event=stop_event)
+                stop_event=stop_event,
+                gossip_fanout=GOSSIP_FANOUT,
+                inventory_relay=INVENTORY_RELAY,
+                compact_blocks=COMPACT_BLOCKS)
     nodes.append(node)
 
 # 2. Conectar los nodos entre si
 print("Conectando nodos...")
 if NUM_NODES > 1:
-    for i in range(NUM_NODES):
-        for j in range(i +1, NUM_NODES):
-            nodes[i].add_peer(nodes[j])
-            nodes[j].add_peer(nodes[i])
+    connect_nodes(nodes, topology=TOPOLOGY, degree=DEGREE)
 else:
     print("Solo hay un nodo")
 
@@ -0,0 +1,63 @@
+import time
+import numpy as np
+import networkx as nx
+from quantum_maxcut import edge_array, graph_cut_size, graph_cut_sizes, bitstrings_to_partitions
+
+# --- CONFIGURACION ---
+SIZES = [14, 40, 80, 200] # N del grafo
+EDGE_PROBABILITY = 0.5
+REPEATS = 200 # Validaciones de una particion por medida
+CANDIDATES = 10000 # Particiones puntuadas en lote (bitstrings muestreados por un minero)
+SEED = 0
+
+
+def loop_cut_size(graph: nx.Graph, partition) -> int:
+    '''Implementacion anterior: bucle en Python sobre graph.edges()'''
+    n_nodes = graph.number_of_nodes()
+    cut_size = 0
+    for u, v in graph.edges():
+        if u >= n_nodes or v >= n_nodes:
+            continue
+        if partition[u] != partition[v]:
+            cut_size += 1
+    return cut_size
+
+
+def seconds(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    rng = np.random.default_rng(SEED)
+    for num_nodes in SIZES:
+        graph = nx.freeze(nx.gnp_random_graph(num_nodes, EDGE_PROBABILITY, seed=num_nodes))
+        partition = [int(bit) for bit in rng.integers(0, 2, num_nodes)]
+        partitions = rng.integers(0, 2, (CANDIDATES, num_nodes), dtype=np.uint8)
+        edge_array(graph) # Una vez por grafo
+
+        expected = [loop_cut_size(graph, row) for row in partitions]
+        assert graph_cut_size(graph, partition) == loop_cut_size(graph, partition)
+        assert graph_cut_sizes(graph, partitions).tolist() == expected
+
+        loop = seconds(lambda: loop_cut_size(graph, partition), REPEATS)
+        vectorized = seconds(lambda: graph_cut_size(graph, partition), REPEATS)
+        start = time.perf_counter()
+        for row in partitions:
+            loop_cut_size(graph, row)
+        loop_batch = time.perf_counter() - start
+        batch = seconds(lambda: graph_cut_sizes(graph, partitions), 5)
+        print(f"N={num_nodes:3d} ({graph.number_of_edges():5d} aristas): una particion {loop * 1e6:8.1f} us -> {vectorized * 1e6:6.1f} us ({loop / vectorized:5.1f}x) | "
+              f"{CANDIDATES} particiones {loop_batch * 1000:8.1f} ms -> {batch * 1000:6.1f} ms ({loop_batch / batch:5.1f}x)")
+
+    # Bitstrings de la base (qubit 0 = bit mas significativo), como salen del vector de estado
+    states = rng.integers(0, 2 ** 14, CANDIDATES)
+    partitions = bitstrings_to_partitions(states, 14)
+    assert all("".join(map(str, row)) == format(state, "014b") for state, row in zip(states[:100], partitions[:100]))
+    print("bitstrings_to_partitions coincide con format(estado, '0Nb')")
+
+
+if __name__ == "__main__":
+    main()
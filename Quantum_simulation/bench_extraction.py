@@ -0,0 +1,86 @@
+import contextlib
+import io
+import threading
+import time
+import tracemalloc
+import numpy as np
+from quantum_block import Quantum_Block, GRAPH_VERSION_NUMPY
+from quantum_maxcut import graph_cut_sizes, bitstrings_to_partitions
+from quantum_qaoa_kernel import MaxCutStatevector
+from QAOA_max_cut import solve_max_cut_qaoa, DEFAULT_SHOTS
+
+# --- CONFIGURACION ---
+SOLVE_SIZES = [12, 14, 16, 18] # N para el tiempo hasta la solucion
+GRAPHS_PER_SIZE = 4
+DIFFICULTY_RATIO = 0.6
+MEMORY_SIZES = [18, 20, 22] # N para la memoria pico de la extraccion
+SEED = 0
+
+
+def make_graph(index: int, num_nodes: int):
+    block = Quantum_Block(index=index, timestamp=0.0, transactions=[], previous_hash=f"{index:064x}", mined_by="Node-0",
+                          protocol_N=num_nodes, protocol_p=0.5, graph_version=GRAPH_VERSION_NUMPY)
+    return block.generate_graph()
+
+
+def solve(graph, extraction: str):
+    '''(particion o None, segundos, probabilidades de exito por paso)'''
+    np.random.seed(SEED)
+    success_log = []
+    target = np.ceil(DIFFICULTY_RATIO * graph.number_of_edges())
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        partition = solve_max_cut_qaoa(graph, target, threading.Event(), extraction=extraction, success_log=success_log)
+    return partition, time.perf_counter() - start, success_log
+
+
+def peak_mib(function) -> float:
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def argmax_extraction(kernel: MaxCutStatevector, params: np.ndarray):
+    '''Extraccion original: vector de probabilidades 2^N y el estado mas probable'''
+    probabilities = kernel.probabilities(params)
+    return [int(bit) for bit in format(int(np.argmax(probabilities)), f"0{kernel.num_nodes}b")]
+
+
+def sample_extraction(kernel: MaxCutStatevector, graph, params: np.ndarray):
+    partitions = bitstrings_to_partitions(kernel.sample(params, DEFAULT_SHOTS), kernel.num_nodes)
+    cuts = graph_cut_sizes(graph, partitions)
+    return partitions[int(np.argmax(cuts))]
+
+
+def main():
+    print(f"Tiempo hasta la solucion (target = {DIFFICULTY_RATIO} * aristas, {GRAPHS_PER_SIZE} grafos por N, {DEFAULT_SHOTS} muestras por paso)")
+    for num_nodes in SOLVE_SIZES:
+        results = {}
+        for extraction in ("argmax", "samples"):
+            solved, seconds, first_success = 0, 0.0, []
+            for index in range(GRAPHS_PER_SIZE):
+                partition, duration, success_log = solve(make_graph(index, num_nodes), extraction)
+                solved += partition is not None
+                seconds += duration
+                if success_log:
+                    first_success.append(success_log[0])
+            results[extraction] = (solved, seconds / GRAPHS_PER_SIZE, first_success)
+        (argmax_solved, argmax_time, _), (samples_solved, samples_time, success) = results["argmax"], results["samples"]
+        print(f"N={num_nodes}: argmax {argmax_solved}/{GRAPHS_PER_SIZE} resueltos, {argmax_time:6.2f} s | "
+              f"muestras {samples_solved}/{GRAPHS_PER_SIZE} resueltos, {samples_time:6.2f} s | "
+              f"P(exito) en el primer paso {np.mean(success):.3f}")
+
+    print("\nMemoria pico de la extraccion (vector de estado incluido)")
+    params = np.array([[0.3, 1.1], [0.7, 0.2]])
+    for num_nodes in MEMORY_SIZES:
+        graph = make_graph(0, num_nodes)
+        kernel = MaxCutStatevector(graph)
+        argmax_peak = peak_mib(lambda: argmax_extraction(kernel, params))
+        sample_peak = peak_mib(lambda: sample_extraction(kernel, graph, params))
+        print(f"N={num_nodes}: argmax {argmax_peak:7.1f} MiB | muestras {sample_peak:7.1f} MiB ({argmax_peak / sample_peak:.1f}x menos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import time
+from quantum_block import Quantum_Block, GRAPH_CACHE
+
+# --- CONFIGURACION ---
+SIZES = [14, 20, 40, 80] # N del grafo
+EDGE_PROBABILITY = 0.5
+NUM_NODES = 10 # Nodos de la red: el minero y los que validan su bloque
+BLOCKS = 20
+
+
+def make_block(index: int, num_nodes: int) -> Quantum_Block:
+    block = Quantum_Block(index=index, timestamp=0.0, transactions=[], previous_hash=f"{index:064x}",
+                          mined_by="Node-0", protocol_N=num_nodes, protocol_p=EDGE_PROBABILITY)
+    block.partition_solution = [i % 2 for i in range(num_nodes)]
+    return block
+
+
+def block_lifecycle(block: Quantum_Block):
+    '''Los accesos al grafo de un bloque: el minero lo resuelve y cada nodo (el minero incluido) lo valida'''
+    block.generate_graph()
+    for _ in range(NUM_NODES):
+        graph = block.generate_graph()
+        block.calculate_target(graph)
+        block.validate_PoW(graph)
+
+
+def uncached_lifecycle(block: Quantum_Block):
+    '''Antes de la cache: el minero, y por validador _handle_block y el calculate_target() interno de validate_PoW'''
+    block._build_graph()
+    for _ in range(NUM_NODES):
+        graph = block._build_graph()
+        block.calculate_target(graph)
+        block._build_graph()
+        Quantum_Block._calculate_cut_size(graph, block.partition_solution)
+
+
+def main():
+    print(f"Un bloque minado y validado por {NUM_NODES} nodos, {BLOCKS} bloques por medida")
+    for num_nodes in SIZES:
+        blocks = [make_block(index, num_nodes) for index in range(BLOCKS)]
+        start = time.perf_counter()
+        for block in blocks:
+            uncached_lifecycle(block)
+        uncached = time.perf_counter() - start
+
+        GRAPH_CACHE.clear()
+        start = time.perf_counter()
+        for block in blocks:
+            block_lifecycle(block)
+        cached = time.perf_counter() - start
+        stats = GRAPH_CACHE.stats()
+        print(f"N={num_nodes:3d}: sin cache {uncached / BLOCKS * 1000:7.2f} ms/bloque, con cache {cached / BLOCKS * 1000:6.2f} ms/bloque "
+              f"({uncached / cached:.1f}x) | {stats['misses']} grafos generados, {stats['hits']} aciertos ({stats['hit_rate']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import random
+import time
+from typing import List
+from quantum_block import Quantum_Block, GRAPH_VERSION_LEGACY, GRAPH_VERSION_NUMPY
+from quantum_maxcut import EdgeListGraph
+from quantum_transactions import Transaction, Wallet
+
+# --- CONFIGURACION ---
+SIZES = [14, 50, 100, 200, 400, 800] # N del grafo
+EDGE_PROBABILITY = 0.5
+MIN_SECONDS = 0.5 # Tiempo minimo de medida por generador y N
+PRE_SERIES_TXS = 20 # Tx del bloque de una cadena anterior a las versiones
+PRE_SERIES_SIZES = [14, 50, 200]
+
+
+def make_block(index: int, num_nodes: int, graph_version: int) -> Quantum_Block:
+    return Quantum_Block(index=index, timestamp=0.0, transactions=[], previous_hash=f"{index:064x}",
+                         mined_by="Node-0", protocol_N=num_nodes, protocol_p=EDGE_PROBABILITY, graph_version=graph_version)
+
+
+def seconds_per_graph(num_nodes: int, graph_version: int) -> float:
+    '''Genera grafos de bloques distintos (sin GRAPH_CACHE) hasta MIN_SECONDS'''
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_SECONDS:
+        make_block(count, num_nodes, graph_version)._build_graph()
+        count += 1
+    return (time.perf_counter() - start) / count
+
+
+def pre_series_block(num_nodes: int, transactions: List[Transaction], graph_version: int = GRAPH_VERSION_LEGACY) -> Quantum_Block:
+    '''Bloque con Tx como los de las cadenas existentes: sin fee y con las versiones por defecto'''
+    return Quantum_Block(index=7, timestamp=1.0, transactions=transactions, previous_hash="ab" * 32, mined_by="Node-1",
+                         protocol_N=num_nodes, protocol_p=EDGE_PROBABILITY, graph_version=graph_version)
+
+
+def original_graph_edges(block: Quantum_Block) -> List[tuple]:
+    '''Implementacion anterior: hash del JSON de vars(tx) y seed f"{previous_hash}-{transaction_hash}"'''
+    tx_repr = [{"sender": tx.sender, "recipient": tx.recipient, "amount": tx.amount, "inputs": tx.inputs,
+                "timestamp": tx.timestamp, "signature": tx.signature} for tx in block.transactions]
+    transaction_hash = hashlib.sha256(json.dumps(tx_repr, sort_keys=True).encode()).hexdigest()
+    prng = random.Random(hashlib.sha256(f"{block.previous_hash}-{transaction_hash}".encode('utf-8')).digest())
+    return [(i, j) for i in range(block.graph_N) for j in range(i + 1, block.graph_N) if prng.random() < block.graph_p]
+
+
+def seconds_per_build(block: Quantum_Block) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_SECONDS:
+        block._build_graph()
+        count += 1
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    print(f"Generacion de G(N, {EDGE_PROBABILITY}) por version del protocolo")
+    for num_nodes in SIZES:
+        legacy = seconds_per_graph(num_nodes, GRAPH_VERSION_LEGACY)
+        numpy_graph = seconds_per_graph(num_nodes, GRAPH_VERSION_NUMPY)
+        graph = make_block(0, num_nodes, GRAPH_VERSION_NUMPY)._build_graph()
+        assert isinstance(graph, EdgeListGraph) and graph.number_of_nodes() == num_nodes
+        start = time.perf_counter()
+        graph.csr()
+        csr = time.perf_counter() - start
+        print(f"N={num_nodes:4d}: v1 (random + networkx) {legacy * 1000:9.2f} ms | v2 (NumPy, aristas) {numpy_graph * 1000:7.3f} ms "
+              f"({legacy / numpy_graph:6.1f}x) | CSR {csr * 1000:6.3f} ms | {graph.number_of_edges()} aristas")
+
+    sender, recipient = Wallet(seed="sender"), Wallet(seed="recipient")
+    transactions = []
+    for i in range(PRE_SERIES_TXS):
+        tx = Transaction(sender.get_address(), recipient.get_address(), 1.5 + i, [["cd" * 32, i]], timestamp=1000.0 + i)
+        tx.sign_transaction(sender)
+        transactions.append(tx)
+    print(f"\nBloque anterior a las versiones ({PRE_SERIES_TXS} Tx): v1 reproduce el grafo original, v2 es un grafo nuevo")
+    for num_nodes in PRE_SERIES_SIZES:
+        legacy_block = pre_series_block(num_nodes, transactions)
+        numpy_block = pre_series_block(num_nodes, transactions, GRAPH_VERSION_NUMPY)
+        assert sorted(legacy_block._build_graph().edges()) == original_graph_edges(legacy_block)
+        assert numpy_block.transaction_hash == legacy_block.transaction_hash # La seed es la misma, cambia el generador
+        legacy = seconds_per_build(legacy_block)
+        numpy_graph = seconds_per_build(numpy_block)
+        print(f"N={num_nodes:4d}: v1 {legacy * 1000:9.2f} ms (aristas originales) | v2 {numpy_graph * 1000:7.3f} ms ({legacy / numpy_graph:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
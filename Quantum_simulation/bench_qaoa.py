@@ -0,0 +1,99 @@
+import pennylane as qml
+from pennylane import numpy as pnp
+import numpy as np
+import networkx as nx
+import time
+from quantum_qaoa_kernel import MaxCutStatevector, AdamOptimizer
+
+# --- CONFIGURACION ---
+COMPARE_SIZES = [8, 10, 12, 14] # N con ambos backends
+KERNEL_SIZES = [16, 18, 20, 22] # N solo con el kernel NumPy (PennyLane tarda minutos por paso)
+EDGE_PROBABILITY = 0.5
+N_LAYER = 2
+STEPS = 3 # Pasos del optimizador por medida
+
+
+def make_graph(num_nodes: int) -> nx.Graph:
+    return nx.gnp_random_graph(num_nodes, EDGE_PROBABILITY, seed=num_nodes)
+
+
+def pennylane_circuits(graph: nx.Graph):
+    '''Circuitos originales en default.qubit: (<C>, se diferencia con autograd en cada paso; probabilidades)'''
+    num_nodes = graph.number_of_nodes()
+    cost_h, mixer_h = qml.qaoa.maxcut(graph=graph)
+    dev = qml.device('default.qubit', wires=num_nodes)
+
+    def circuit(params):
+        for i in range(num_nodes):
+            qml.Hadamard(wires=i)
+        for gamma, beta in zip(params[0], params[1]):
+            qml.qaoa.cost_layer(gamma, cost_h)
+            qml.qaoa.mixer_layer(beta, mixer_h)
+
+    @qml.qnode(dev)
+    def cost_function(params):
+        circuit(params)
+        return qml.expval(cost_h)
+
+    @qml.qnode(dev)
+    def probability_circuit(params):
+        circuit(params)
+        return qml.probs(wires=range(num_nodes))
+    return cost_function, probability_circuit
+
+
+def pennylane_seconds_per_step(graph: nx.Graph, params) -> float:
+    cost_function, _ = pennylane_circuits(graph)
+    optimizer = qml.AdamOptimizer(stepsize=0.1)
+    params = pnp.array(params, requires_grad=True)
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        params = optimizer.step(cost_function, params)
+    return (time.perf_counter() - start) / STEPS
+
+
+def kernel_seconds(graph: nx.Graph, params):
+    '''(s para preparar el vector de cortes, s por paso) con el kernel NumPy'''
+    start = time.perf_counter()
+    kernel = MaxCutStatevector(graph)
+    setup = time.perf_counter() - start
+    optimizer = AdamOptimizer(stepsize=0.1)
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        params = optimizer.apply_grad(kernel.expectation_and_gradient(params)[1], params)
+    return setup, (time.perf_counter() - start) / STEPS
+
+
+def check_same_results(num_nodes: int, steps: int = 10):
+    '''Mismo <C>, gradiente, parametros tras optimizar y probabilidades finales que PennyLane'''
+    graph = make_graph(num_nodes)
+    cost_function, probability_circuit = pennylane_circuits(graph)
+    kernel = MaxCutStatevector(graph)
+    params = pnp.random.uniform(0, 2 * np.pi, (2, N_LAYER), requires_grad=True)
+    energy, gradient = kernel.expectation_and_gradient(params.numpy())
+    assert abs(float(cost_function(params)) - energy) < 1e-9
+    assert np.allclose(qml.grad(cost_function)(params), gradient, atol=1e-9)
+
+    pennylane_optimizer, kernel_optimizer = qml.AdamOptimizer(stepsize=0.1), AdamOptimizer(stepsize=0.1)
+    pennylane_params, kernel_params = params, params.numpy()
+    for _ in range(steps):
+        pennylane_params = pennylane_optimizer.step(cost_function, pennylane_params)
+        kernel_params = kernel_optimizer.apply_grad(kernel.expectation_and_gradient(kernel_params)[1], kernel_params)
+    assert np.allclose(pennylane_params.numpy(), kernel_params, atol=1e-8)
+    assert np.allclose(probability_circuit(pennylane_params).numpy(), kernel.probabilities(kernel_params), atol=1e-9)
+    print(f"N={num_nodes}: <C>, gradiente, {steps} pasos de Adam y probabilidades finales iguales que PennyLane")
+
+
+if __name__ == "__main__":
+    check_same_results(8)
+
+    print(f"\n{'N':>3} | {'PennyLane s/paso':>16} | {'NumPy s/paso':>12} | {'x':>7} | {'cortes (s)':>10}")
+    for num_nodes in COMPARE_SIZES + KERNEL_SIZES:
+        graph = make_graph(num_nodes)
+        params = np.random.uniform(0, 2 * np.pi, (2, N_LAYER))
+        setup, kernel_step = kernel_seconds(graph, params)
+        if num_nodes in COMPARE_SIZES:
+            pennylane_step = pennylane_seconds_per_step(graph, params)
+            print(f"{num_nodes:>3} | {pennylane_step:>16.4f} | {kernel_step:>12.4f} | {pennylane_step / kernel_step:>7.0f} | {setup:>10.3f}")
+        else:
+            print(f"{num_nodes:>3} | {'-':>16} | {kernel_step:>12.4f} | {'-':>7} | {setup:>10.3f}")
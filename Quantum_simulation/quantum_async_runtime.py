@@ -0,0 +1,154 @@
+import asyncio
+import random
+import threading
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
+from quantum_blockchain import Quantum_Blockchain
+from quantum_block import GRAPH_CACHE, GRAPH_VERSION_NUMPY, HEADER_VERSION_MERKLE
+from quantum_node import Quantum_Node
+from quantum_topology import connect_nodes
+from quantum_event_runtime import summarize_nodes
+
+
+class AsyncInbox:
+    '''
+    Sustituye a la cola de entrada del nodo por una asyncio.Queue. put() se puede llamar
+    desde el bucle de eventos o desde los hilos de minado del executor.
+    '''
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._loop_thread = threading.get_ident() # Se crea dentro del bucle
+
+    def put(self, message: tuple, block: bool = True, timeout: float = None):
+        if threading.get_ident() == self._loop_thread:
+            self.queue.put_nowait(message)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+
+class AsyncRuntime:
+    '''
+    Ejecuta cada nodo cuantico como corutinas en un unico bucle asyncio en lugar de un hilo con sondeo.
+    Los mensajes se procesan en cuanto llegan a la cola y las acciones aleatorias son
+    temporizadores. El solver QAOA se ejecuta en un executor para no bloquear el bucle.
+    '''
+    def __init__(self, mining_workers: int = None, action_interval: Tuple[float, float] = (0.5, 1.0)):
+        self.executor = ThreadPoolExecutor(max_workers=mining_workers, thread_name_prefix="miner")
+        self.action_interval = action_interval # Pausa entre acciones aleatorias (como en Quantum_Node.run)
+        self.mining_futures: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.loop: asyncio.AbstractEventLoop = None
+
+    def attach(self, node: Quantum_Node):
+        '''Conectar el nodo al runtime. Llamar dentro del bucle y antes de add_peer'''
+        self.loop = asyncio.get_running_loop()
+        node.runtime = self
+        node.incoming_queue = AsyncInbox(self.loop)
+
+    def start(self, node: Quantum_Node):
+        self._tasks.append(asyncio.create_task(self._receive(node), name=f"{node.node_id}-rx"))
+        self._tasks.append(asyncio.create_task(self._actions(node), name=f"{node.node_id}-actions"))
+
+    async def _receive(self, node: Quantum_Node):
+        inbox: asyncio.Queue = node.incoming_queue.queue
+        while not node.stop_event.is_set():
+            message_type, data = await inbox.get()
+            node._process_message(message_type, data)
+
+    async def _actions(self, node: Quantum_Node):
+        while not node.stop_event.is_set():
+            await asyncio.sleep(random.uniform(*self.action_interval))
+            node._flush_announcements()
+            node._random_action()
+
+    def start_mining(self, node: Quantum_Node, mining_args: tuple):
+        # _stop_mining activa el evento de parada de la tarea, igual que con hilos
+        self.mining_futures[node.node_id] = self.loop.run_in_executor(self.executor, node._mine_worker, *mining_args)
+
+    async def stop(self, stop_event: threading.Event, timeout: float = 5.0):
+        '''Detiene corutinas y espera a que los solvers vean el evento de parada'''
+        stop_event.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        pending = [future for future in self.mining_futures.values() if not future.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_async_simulation(num_nodes: int,
+                                protocol_N: int,
+                                protocol_p: float,
+                                difficulty_ratio: float,
+                                simulation_time: float,
+                                mining_workers: int,
+                                topology: str,
+                                degree: int,
+                                gossip_fanout: int,
+                                inventory_relay: bool,
+                                compact_blocks: bool,
+                                graph_version: int,
+                                header_version: int) -> List[Quantum_Node]:
+    runtime = AsyncRuntime(mining_workers=mining_workers)
+    stop_event = threading.Event()
+
+    initial_blockchain_template = Quantum_Blockchain(protocol_N=protocol_N,
+                                                     protocol_p=protocol_p,
+                                                     initial_difficulty_ratio=difficulty_ratio,
+                                                     graph_version=graph_version,
+                                                     header_version=header_version)
+    nodes: List[Quantum_Node] = []
+    for i in range(num_nodes):
+        node = Quantum_Node(node_id=f"Node-{i}",
+                            blockchain_instance=copy.deepcopy(initial_blockchain_template),
+                            node_list=nodes,
+                            stop_event=stop_event,
+                            gossip_fanout=gossip_fanout,
+                            inventory_relay=inventory_relay,
+                            compact_blocks=compact_blocks)
+        runtime.attach(node)
+        nodes.append(node)
+
+    connect_nodes(nodes, topology=topology, degree=degree)
+
+    for node in nodes:
+        runtime.start(node)
+    try:
+        await asyncio.sleep(simulation_time)
+    finally:
+        await runtime.stop(stop_event)
+    return nodes
+
+
+def run_async_simulation(num_nodes: int = 3,
+                         protocol_N: int = 14,
+                         protocol_p: float = 0.5,
+                         difficulty_ratio: float = 0.58,
+                         simulation_time: float = 40.0,
+                         mining_workers: int = None,
+                         topology: str = "full",
+                         degree: int = 8,
+                         gossip_fanout: int = None,
+                         inventory_relay: bool = False,
+                         compact_blocks: bool = False,
+                         graph_version: int = GRAPH_VERSION_NUMPY,
+                         header_version: int = HEADER_VERSION_MERKLE) -> Dict[str, Any]:
+    '''
+    Simulacion en tiempo real con asyncio. mining_workers limita cuantos solvers QAOA
+    se ejecutan a la vez (None = valor por defecto de ThreadPoolExecutor).
+    '''
+    start_time = time.time()
+    GRAPH_CACHE.clear() # Estadisticas de esta simulacion
+    nodes = asyncio.run(_run_async_simulation(num_nodes, protocol_N, protocol_p, difficulty_ratio,
+                                              simulation_time, mining_workers,
+                                              topology, degree, gossip_fanout, inventory_relay, compact_blocks,
+                                              graph_version, header_version))
+    summary = summarize_nodes(nodes)
+    summary["graph_cache"] = GRAPH_CACHE.stats()
+    summary["wall_time"] = time.time() - start_time
+    summary["nodes"] = nodes
+    return summary
@@ -4,9 +4,25 @@ from time import time
 from typing import List, Any, Dict, Tuple, Optional
 import numpy as np
 from quantum_transactions import Transaction
+from quantum_merkle import MerkleTree, MerkleProof, verify_merkle_proof
+from quantum_graph_cache import GraphCache
+from quantum_maxcut import graph_cut_size, EdgeListGraph, AnyGraph
 import random
 import networkx as nx
 
+# --- VERSIONES DE CABECERA ---
+HEADER_VERSION_LEGACY = 1 # transaction_hash = SHA-256 del JSON de las Tx (formato original)
+HEADER_VERSION_MERKLE = 2 # transaction_hash = raiz Merkle de los txids, admite pruebas de inclusion
+HEADER_VERSIONS = (HEADER_VERSION_LEGACY, HEADER_VERSION_MERKLE)
+
+# --- VERSIONES DEL GENERADOR DE GRAFOS ---
+GRAPH_VERSION_LEGACY = 1 # random.Random, un sorteo por par de nodos, nx.Graph (formato original)
+GRAPH_VERSION_NUMPY = 2 # Generador de NumPy con la misma semilla, un sorteo vectorizado del triangulo superior, EdgeListGraph
+GRAPH_VERSIONS = (GRAPH_VERSION_LEGACY, GRAPH_VERSION_NUMPY)
+
+GRAPH_CACHE_SIZE = 64 # Grafos de PoW recientes que se guardan (candidatos propios y bloques recibidos)
+GRAPH_CACHE = GraphCache(GRAPH_CACHE_SIZE) # Compartida por todos los bloques y nodos del proceso
+
 class Quantum_Block:
     def __init__(self, 
                  index: int, 
@@ -16,7 +32,9 @@ class Quantum_Block:
                  mined_by : str, 
                  protocol_N: int, # Numero de nodos del grafo
                  protocol_p: float, # Probabilidad de arista
-                 difficulty_ratio: float = 0.5
+                 difficulty_ratio: float = 0.5,
+                 graph_version: int = GRAPH_VERSION_LEGACY,
+                 header_version: int = HEADER_VERSION_LEGACY
                  ):
          
         self.index = index
@@ -29,17 +47,61 @@ class Quantum_Block:
         self.graph_N = protocol_N
         self.graph_p = protocol_p
         self.difficulty_ratio = difficulty_ratio
+        if graph_version not in GRAPH_VERSIONS:
+            raise ValueError(f"Version de grafo desconocida: {graph_version} (disponibles: {GRAPH_VERSIONS})")
+        self.graph_version = graph_version # Generador del grafo; forma parte de la cabecera
+        if header_version not in HEADER_VERSIONS:
+            raise ValueError(f"Version de cabecera desconocida: {header_version} (disponibles: {HEADER_VERSIONS})")
+        self.header_version = header_version # Como se comprometen las Tx en transaction_hash
         self.partition_solution: List = None # 
         self.transaction_hash: str = self._calculate_transaction_hash()
         self.hash : Optional[str] = None
 
+    def __getstate__(self):
+        # El arbol Merkle es una cache, no viaja entre procesos ni se copia
+        state = dict(self.__dict__)
+        state.pop("_merkle_tree", None)
+        return state
+
+    @staticmethod
+    def _transaction_leaf(tx: Any) -> str:
+        if isinstance(tx, dict): # Tx llegada como diccionario: hash de su JSON ordenado
+            return hashlib.sha256(json.dumps(tx, sort_keys=True).encode()).hexdigest()
+        return tx.calculate_hash()
+
+    def merkle_tree(self) -> MerkleTree:
+        '''
+        Arbol Merkle de los txids. Se guarda en el bloque: si desde la ultima vez solo se han
+        anadido Tx al final se extiende, si no se reconstruye
+        '''
+        txids = [Quantum_Block._transaction_leaf(tx) for tx in self.transactions]
+        tree = getattr(self, "_merkle_tree", None)
+        if tree is None or len(tree) > len(txids) or tree.leaves != txids[:len(tree)]:
+            tree = MerkleTree()
+            self._merkle_tree = tree
+        tree.extend(txids[len(tree):])
+        return tree
+
+    @staticmethod
+    def _legacy_transaction_repr(tx: Any) -> Any:
+        '''Campos de la Tx en el JSON original (vars(tx) antes de __slots__); fee solo si la Tx la lleva'''
+        if isinstance(tx, dict):
+            return tx
+        if not isinstance(tx, Transaction):
+            return str(tx)
+        tx_repr = {"sender": tx.sender, "recipient": tx.recipient, "amount": tx.amount,
+                   "inputs": tx.inputs, "timestamp": tx.timestamp, "signature": tx.signature}
+        if tx.fee: # Las Tx sin comision (todas las de cadenas anteriores a las fees) conservan su JSON
+            tx_repr["fee"] = tx.fee
+        return tx_repr
+
     def _calculate_transaction_hash(self) -> str:
         """Calcula un hash determinista del contenido de las transacciones."""
+        if self.header_version == HEADER_VERSION_MERKLE:
+            return self.merkle_tree().root # Compromete las Tx y permite pruebas de inclusion
         # Usamos una representación JSON ordenada para consistencia
         try:
-            # Convertimos cada tx a un dict para JSON
-            tx_repr = [tx if isinstance(tx, dict) else vars(tx) if hasattr(tx, '__dict__') else str(tx)
-                       for tx in self.transactions]
+            tx_repr = [Quantum_Block._legacy_transaction_repr(tx) for tx in self.transactions]
             block_string = json.dumps(tx_repr, sort_keys=True).encode()
             return hashlib.sha256(block_string).hexdigest()
         except Exception as e:
@@ -48,6 +110,28 @@ class Quantum_Block:
              tx_concat = "".join(tx_strings)
              return hashlib.sha256(tx_concat.encode()).hexdigest()
 
+    def append_transactions(self, transactions: List[Transaction]):
+        '''
+        Anade Tx al bloque candidato. Con HEADER_VERSION_MERKLE la raiz se actualiza en O(k log n);
+        en cualquier caso cambia el grafo: hay que resolverlo de nuevo
+        '''
+        self.transactions = self.transactions + list(transactions)
+        self.transaction_hash = self._calculate_transaction_hash()
+
+    def merkle_proof(self, txid: str) -> MerkleProof:
+        '''Prueba de inclusion de la Tx `txid` frente a transaction_hash (solo HEADER_VERSION_MERKLE)'''
+        if self.header_version != HEADER_VERSION_MERKLE:
+            raise ValueError(f"El bloque {self.index} no compromete sus Tx con una raiz Merkle")
+        tree = self.merkle_tree()
+        try:
+            return tree.proof(tree.leaves.index(txid))
+        except ValueError:
+            raise ValueError(f"Tx {txid[:8]} no esta en el bloque {self.index}")
+
+    def verify_inclusion(self, txid: str, proof: MerkleProof) -> bool:
+        '''Verificacion ligera: solo la cabecera (transaction_hash) y la prueba, sin las Tx del bloque'''
+        return self.header_version == HEADER_VERSION_MERKLE and verify_merkle_proof(txid, proof, self.transaction_hash)
+
     def get_header_data_for_hash(self) -> Dict[str, Any]:
         '''Prepara los datos de cabecera que usaran para calcular el hash final'''
 
@@ -64,6 +148,12 @@ class Quantum_Block:
             "graph_p": self.graph_p,
             "partition_solution": self.partition_solution,
         }
+        # Los campos de version solo entran si no son los originales: un bloque con las dos
+        # versiones LEGACY tiene la cabecera (y el hash) de antes de que existieran
+        if self.graph_version != GRAPH_VERSION_LEGACY:
+            header_data["graph_version"] = self.graph_version
+        if self.header_version != HEADER_VERSION_LEGACY:
+            header_data["header_version"] = self.header_version
         return header_data
     
     def calculate_final_hash(self) -> str:
@@ -72,47 +162,78 @@ class Quantum_Block:
         block_string = json.dumps(header_data, sort_keys=True).encode()
         hash_calculated = hashlib.sha256(block_string).hexdigest()
         return  hash_calculated
+
+    def header_hash(self) -> str:
+        '''Hash final con la raiz guardada en la cabecera, sin las Tx: comprobar una cabecera suelta'''
+        header_data = self.get_header_data_for_hash()
+        header_data["transactions_hash"] = self.transaction_hash
+        block_string = json.dumps(header_data, sort_keys=True).encode()
+        hash_calculated = hashlib.sha256(block_string).hexdigest()
+        return  hash_calculated
     
-    def generate_graph(self):
+    def graph_cache_key(self) -> Tuple[str, str, int, float, int]:
+        '''Todo lo que determina el grafo del bloque'''
+        return (self.previous_hash, self.transaction_hash, self.graph_N, self.graph_p, self.graph_version)
+
+    def generate_graph(self) -> AnyGraph:
         '''
-        Genera el grafo a partir de los datos del bloque de forma determinista
-        Previous hash y transition hash como seed
+        Grafo del PoW del bloque, desde GRAPH_CACHE si ya se ha generado. Es de solo lectura:
+        lo comparten el minero, los validadores, calculate_target y validate_PoW
         '''
+        return GRAPH_CACHE.get_or_build(self.graph_cache_key(), self._build_graph)
+
+    def _graph_seed(self) -> bytes:
+        '''Previous hash y transaction hash como seed, igual en todas las versiones del generador'''
         seed_material = f"{self.previous_hash}-{self.transaction_hash}".encode('utf-8')
-        seed = hashlib.sha256(seed_material).digest()
-        prng = random.Random(seed)
+        return hashlib.sha256(seed_material).digest()
+
+    def _build_graph(self) -> AnyGraph:
+        if self.graph_version == GRAPH_VERSION_NUMPY:
+            return self._build_graph_numpy()
+        return self._build_graph_legacy()
+
+    def _build_graph_numpy(self) -> EdgeListGraph:
+        '''
+        G(N, p) con un Generator de NumPy (PCG64) sembrado con los 32 bytes de la seed: un solo
+        sorteo de N(N-1)/2 uniformes para el triangulo superior, en el mismo orden de pares que
+        la version original, y las aristas como array sin pasar por networkx
+        '''
+        num_nodes = max(self.graph_N, 0)
+        rng = np.random.default_rng(np.frombuffer(self._graph_seed(), dtype="<u4"))
+        rows, cols = np.triu_indices(num_nodes, k=1)
+        mask = rng.random(len(rows)) < self.graph_p
+        return EdgeListGraph(num_nodes, np.stack((rows[mask], cols[mask])))
+
+    def _build_graph_legacy(self) -> nx.Graph:
+        '''
+        Genera el grafo a partir de los datos del bloque de forma determinista
+        Previous hash y transition hash como seed. Con HEADER_VERSION_LEGACY el transaction_hash
+        es el original, asi que el grafo de los bloques de cadenas existentes no cambia
+        (bench_graph_generation lo comprueba)
+        '''
+        prng = random.Random(self._graph_seed())
 
         G = nx.Graph()
-        if self.graph_N <= 0: return G
+        if self.graph_N <= 0: return nx.freeze(G)
         G.add_nodes_from(range(self.graph_N))
 
         for i in range(self.graph_N):
             for j in range(i + 1, self.graph_N):
                 if prng.random() < self.graph_p:
                     G.add_edge(i, j)
-        return G
+        return nx.freeze(G)
     
-    def calculate_target(self,graph:Optional[ nx.Graph]=None) -> int:
+    def calculate_target(self,graph:Optional[AnyGraph]=None) -> int:
         current_graph =  graph if graph is not None else self.generate_graph()
         target = np.ceil(self.difficulty_ratio * current_graph.number_of_edges())
         return target
           
     @staticmethod
-    def _calculate_cut_size(graph: nx.Graph, partition: List[int]) -> int:
-        '''Calcula el tamaño del corte dado un grafo y una particion'''
-        n_nodes = graph.number_of_nodes()
-        if n_nodes == 0: return 0
-        if len(partition) != n_nodes:
-            raise ValueError(f"Tamano de particion {len(partition)} no coincide con el numero de nodos {n_nodes}")
-        cut_size = 0
-
-        for u, v in graph.edges():
-            if u >= n_nodes or v >= n_nodes:continue
-            if partition[u] != partition[v]:
-                cut_size += 1
-        return cut_size
+    def _calculate_cut_size(graph: AnyGraph, partition: List[int]) -> int:
+        '''Calcula el tamaño del corte dado un grafo y una particion (aristas del grafo como arrays de NumPy)'''
+        return graph_cut_size(graph, partition)
     
-    def validate_PoW(self, graph:Optional[ nx.Graph]=None) ->Tuple[bool,int]:
+    def validate_PoW(self, graph:Optional[AnyGraph]=None) ->Tuple[bool,int]:
         '''
         Valida si la partition_solution del bloque es correcta
         '''
@@ -130,11 +251,12 @@ class Quantum_Block:
                 return False, -1
             
             # Calcuar target en funcion de las aristas del grafo generado y de difficulty_ratio
-            target_cut = self.calculate_target()
+            target_cut = self.calculate_target(current_graph)
             
             calculated_cut = Quantum_Block._calculate_cut_size(current_graph, self.partition_solution)
             if  calculated_cut >= target_cut:
                 return True, calculated_cut
+            return False, calculated_cut
         except ValueError as e:
             print(f"Error en la validacion de PoW: {e}")
             return False, -1
@@ -154,4 +276,33 @@ class Quantum_Block:
                 f"Difficult Ratio: >= {self.difficulty_ratio} "
                 f"| Solution Cut: {'?' if status=='PENDIENTE' else self.validate_PoW()[1]} "
                 f"| PrevHash: {self.previous_hash[:8]}..."
-                f"| Hash: {self.hash[:8] if self.hash else 'N/A'}...")
\ No newline at end of file
+                f"| Hash: {self.hash[:8] if self.hash else 'N/A'}...")
+
+
+# --- COMPACT BLOCKS ---
+SHORT_ID_LENGTH = 12 # Caracteres hex del hash de la Tx que viajan en el bloque compacto (6 bytes)
+
+
+def short_tx_id(transaction: Transaction) -> str:
+    return transaction.calculate_hash()[:SHORT_ID_LENGTH]
+
+
+class CompactBlock:
+    '''
+    Bloque sin sus transacciones: cabecera y short IDs. El receptor lo reconstruye con
+    las Tx de su mempool y solo pide al emisor las que le faltan.
+    '''
+    def __init__(self, block: Quantum_Block):
+        self.hash = block.hash
+        self.header = {key: value for key, value in block.__getstate__().items() if key != "transactions"}
+        self.short_ids = [short_tx_id(tx) for tx in block.transactions]
+
+    def to_block(self, transactions: List[Transaction]) -> Quantum_Block:
+        block = Quantum_Block.__new__(Quantum_Block) # Sin __init__, la cabecera ya trae el hash
+        block.__dict__.update(self.header)
+        block.transactions = transactions
+        return block
+
+    def matches(self, block: Quantum_Block) -> bool:
+        '''Las Tx elegidas por short ID reproducen el hash anunciado (descarta colisiones)'''
+        return block.calculate_final_hash() == self.hash
@@ -2,8 +2,9 @@ import hashlib
 import json
 from time import time
 from typing import List, Any, Set 
-from quantum_block import Quantum_Block
+from quantum_block import Quantum_Block, GRAPH_VERSION_LEGACY, HEADER_VERSION_LEGACY
 from quantum_transactions import Transaction
+from quantum_mempool import Mempool
 import networkx as nx
 import threading
 import copy
@@ -12,13 +13,17 @@ class Quantum_Blockchain:
     def __init__(self, 
                  protocol_N: int,
                  protocol_p: float,
-                 initial_difficulty_ratio: float = 0.55): # Dificultad inicial
+                 initial_difficulty_ratio: float = 0.55, # Dificultad inicial
+                 graph_version: int = GRAPH_VERSION_LEGACY, # Generador del grafo de los bloques de la cadena
+                 header_version: int = HEADER_VERSION_LEGACY): # Compromiso de las Tx en la cabecera (HEADER_VERSION_MERKLE: raiz Merkle)
         
         self.chain: List[Quantum_Block] = []
-        self.pending_transactions: Set[Transaction] = set()
+        self.pending_transactions = Mempool() # Indexado por txid: un bloque de k Tx se quita en O(k)
         self.N: int = protocol_N # Numero de nodos
         self.p: float = protocol_p 
         self.initial_difficulty_ratio: float = initial_difficulty_ratio 
+        self.graph_version: int = graph_version
+        self.header_version: int = header_version
 
         self.lock = threading.Lock() 
     
@@ -35,7 +40,9 @@ class Quantum_Blockchain:
             mined_by="None",
             difficulty_ratio=self.initial_difficulty_ratio,
             protocol_N=self.N,
-            protocol_p=self.p
+            protocol_p=self.p,
+            graph_version=self.graph_version,
+            header_version=self.header_version
         )
         genesis_partition = [0] * self.N
         genesis_block.partition_solution = genesis_partition
@@ -56,7 +63,7 @@ class Quantum_Blockchain:
         return self.initial_difficulty_ratio
 
     def add_transaction(self, transaction: Any):
-        self.pending_transactions.append(transaction)
+        self.pending_transactions.add(transaction)
 
     def add_block(self, block: Quantum_Block)-> bool:
         '''Anadir un bloque después de la validacion'''
@@ -78,7 +85,15 @@ class Quantum_Blockchain:
                 print(f"Error: Hash previo del bloque {block.index} no es correcto")
                 return False
             
-            # 3. Validar integridad. El hash del bloque debe coincidir con el hash calculado
+            # 3. Validar version del generador de grafos: la fija la cadena, no el minero
+            if block.graph_version != self.graph_version:
+                print(f"Error: Version de grafo del bloque {block.index} no es correcta ({block.graph_version}, esperada {self.graph_version})")
+                return False
+            if block.header_version != self.header_version:
+                print(f"Error: Version de cabecera del bloque {block.index} no es correcta ({block.header_version}, esperada {self.header_version})")
+                return False
+            
+            # 4. Validar integridad. El hash del bloque debe coincidir con el hash calculado
             try:
                 expexted_hash = block.calculate_final_hash()
                 if block.hash != expexted_hash:
@@ -90,23 +105,8 @@ class Quantum_Blockchain:
 
             self.chain.append(block)
 
-            # Limpiar mempool
-            try:
-                hashes_in_block = {tx_in_block.calculate_hash() for tx_in_block in block.transactions}
-                new_pending_transactions = []
-                for pending_tx in self.pending_transactions:                    
-                    if pending_tx.calculate_hash() not in hashes_in_block:
-                        new_pending_transactions.append(pending_tx)
-                self.pending_transactions = new_pending_transactions
-            except AttributeError as ae:
-                print(f"Error al limpiar el mempool (AttributeError): {ae}. "
-                      f"Asegúrate de que todas las transacciones sean objetos Transaction con calculate_hash().")
-                
-                return False
-            except Exception as e:
-                print(f"Error inesperado al limpiar el mempool: {e}")
-                return False
-                    
+            # Limpiar mempool: por txid, sin recorrer las pendientes
+            self.pending_transactions.difference_update(block.transactions)
             return True
 
     def is_chain_valid(self) -> bool:
@@ -114,7 +114,17 @@ class Quantum_Blockchain:
         # TODO: Validar la cadena de bloques
         with self.lock:
             if not self.chain: return False
-            
+
+    # El lock no se puede serializar: se omite al enviar la cadena a otro proceso y se crea uno nuevo
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
     #Metodo  para deepcopy porque al tener locks no funciona bien
     def __deepcopy__(self,memo): 
         cls = self.__class__
@@ -125,6 +135,8 @@ class Quantum_Blockchain:
         new_blockchain.N = self.N
         new_blockchain.p = self.p
         new_blockchain.initial_difficulty_ratio = self.initial_difficulty_ratio
+        new_blockchain.graph_version = self.graph_version
+        new_blockchain.header_version = self.header_version
 
         # Copiar la cadena de bloques PROFUNDAMENTE
         new_blockchain.chain = copy.deepcopy(self.chain, memo)
@@ -133,28 +145,7 @@ class Quantum_Blockchain:
         new_blockchain.lock = threading.Lock()
 
         # --- MANEJO DE PENDING_TRANSACTIONS ---
-        new_blockchain.pending_transactions = set()
-        if hasattr(self, 'pending_transactions') and self.pending_transactions is not None:
-            for tx_data in self.pending_transactions:
-                if isinstance(tx_data, Transaction):
-                    new_blockchain.pending_transactions.add(copy.deepcopy(tx_data, memo))
-                elif isinstance(tx_data, dict):
-                    print(f"Deepcopy Blockchain: Convirtiendo dict de pending_tx a objeto Transaction.")
-                    try:
-                        new_tx_obj = Transaction(
-                            sender_address=tx_data.get('sender'),
-                            recipient_address=tx_data.get('recipient'),
-                            amount=tx_data.get('amount'),
-                            inputs=copy.deepcopy(tx_data.get('inputs', []), memo) # Deepcopy de inputs
-                        )
-                        # Restaurar otros atributos si existen en el dict
-                        new_tx_obj.timestamp = tx_data.get('timestamp', time.time())
-                        new_tx_obj.signature = tx_data.get('signature')
-                        new_blockchain.pending_transactions.add(new_tx_obj)
-                    except Exception as e:
-                        print(f"Deepcopy Blockchain: Error convirtiendo dict de pending_tx: {e}. Data: {tx_data}")
-                else:
-                    print(f"Deepcopy Blockchain: Tipo inesperado en pending_transactions de plantilla: {type(tx_data)}")
+        new_blockchain.pending_transactions = copy.deepcopy(self.pending_transactions, memo)
 
         return new_blockchain
         
@@ -0,0 +1,120 @@
+import ast
+import contextlib
+import csv
+import hashlib
+import inspect
+import io
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterable
+from quantum_event_runtime import run_event_simulation
+
+# Columnas de resultados, despues de config_hash y de los parametros de la configuracion
+RESULT_COLUMNS = ["consensus", "forks", "max_chain_length", "min_chain_length",
+                  "processed_events", "simulated_time", "wall_time"]
+
+
+def expand_grid(grid: Dict[str, Iterable], seeds: Iterable) -> List[Dict[str, Any]]:
+    '''Producto cartesiano de la rejilla de parametros por cada semilla'''
+    names = sorted(grid)
+    configs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        for seed in seeds:
+            config = dict(zip(names, values))
+            config["seed"] = seed
+            configs.append(config)
+    return configs
+
+
+def resolve_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    '''Completa la configuracion con los valores por defecto de run_event_simulation'''
+    resolved = {name: parameter.default
+                for name, parameter in inspect.signature(run_event_simulation).parameters.items()}
+    unknown = set(config) - set(resolved)
+    if unknown:
+        raise ValueError(f"Parametros desconocidos: {sorted(unknown)}")
+    resolved.update(config)
+    return resolved
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    '''Identifica una ejecucion por su configuracion efectiva (con semilla y valores por defecto)'''
+    encoded = json.dumps(resolve_config(config), sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def run_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    '''Ejecuta una configuracion sin salida por pantalla y devuelve su fila de resultados'''
+    with contextlib.redirect_stdout(io.StringIO()): # Los nodos imprimen cada mensaje
+        result = run_event_simulation(**config)
+    chain_lengths = result["chain_lengths"].values()
+    row = {"config_hash": config_hash(config), **config}
+    row.update({
+        "consensus": result["consensus"],
+        "forks": len(result["final_hashes"]), # Puntas distintas al final (1 = sin bifurcacion)
+        "max_chain_length": max(chain_lengths),
+        "min_chain_length": min(chain_lengths),
+        "processed_events": result["processed_events"],
+        "simulated_time": result["simulated_time"],
+        "wall_time": round(result["wall_time"], 3),
+    })
+    return row
+
+
+def _parse_value(value: str) -> Any:
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def load_results(results_file: str) -> Dict[str, Dict[str, Any]]:
+    '''Filas ya calculadas, indexadas por config_hash'''
+    if not os.path.exists(results_file):
+        return {}
+    with open(results_file, newline="") as f:
+        return {row["config_hash"]: {key: value if key == "config_hash" else _parse_value(value)
+                                     for key, value in row.items()}
+                for row in csv.DictReader(f)}
+
+
+def _write_results(results_file: str, rows: List[Dict[str, Any]]):
+    parameter_columns = sorted({key for row in rows for key in row} - set(RESULT_COLUMNS) - {"config_hash"})
+    columns = ["config_hash"] + parameter_columns + RESULT_COLUMNS
+    tmp_file = results_file + ".tmp"
+    with open(tmp_file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_file, results_file) # No dejar el fichero a medias si se interrumpe
+
+
+def run_campaign(grid: Dict[str, Iterable],
+                 seeds: Iterable,
+                 results_file: str = "campaign_results.csv",
+                 workers: int = None) -> List[Dict[str, Any]]:
+    '''
+    Ejecuta cada configuracion de la rejilla (por semilla) en un pool de procesos.
+    Las configuraciones ya presentes en results_file no se repiten, y el fichero se
+    reescribe tras cada ejecucion para poder retomar una campana interrumpida.
+    '''
+    configs = expand_grid(grid, seeds)
+    results = load_results(results_file)
+    pending = {}
+    for config in configs:
+        key = config_hash(config)
+        if key not in results:
+            pending[key] = config
+    print(f"Campana: {len(configs)} configuraciones, {len(configs) - len(pending)} ya calculadas, {len(pending)} pendientes")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_config, config): key for key, config in pending.items()}
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = future.result()
+                results[row["config_hash"]] = row
+                _write_results(results_file, list(results.values()))
+                print(f"[{done}/{len(pending)}] {row['config_hash']}: consenso={row['consensus']}, bloques={row['max_chain_length']}, {row['wall_time']} s")
+    return [results[config_hash(config)] for config in configs]
@@ -0,0 +1,308 @@
+import heapq
+import itertools
+import random
+import threading
+import copy
+import time
+import numpy as np
+from typing import List, Dict, Any, Callable, Tuple
+from quantum_blockchain import Quantum_Blockchain
+from quantum_block import GRAPH_CACHE, GRAPH_VERSION_NUMPY, HEADER_VERSION_MERKLE
+from quantum_transactions import Wallet
+from quantum_node import Quantum_Node
+from quantum_topology import connect_nodes
+
+
+class EventSimulator:
+    '''
+    Nucleo de simulacion de eventos discretos. Los eventos se guardan en un heap
+    ordenado por tiempo virtual; el reloj salta de un evento al siguiente, sin esperas reales.
+    '''
+    def __init__(self, seed: Any = None):
+        self.now = 0.0 # Reloj virtual (segundos)
+        self.rng = random.Random(seed)
+        self.processed_events = 0
+        self._events: List[Tuple[float, int, Callable, tuple]] = []
+        self._sequence = itertools.count() # Desempate FIFO entre eventos del mismo instante
+
+    def clock(self) -> float:
+        return self.now
+
+    def schedule(self, delay: float, callback: Callable, *args):
+        '''Programa callback(*args) dentro de `delay` segundos virtuales'''
+        heapq.heappush(self._events, (self.now + delay, next(self._sequence), callback, args))
+
+    def run(self, until: float):
+        '''Procesa eventos en orden hasta el instante virtual `until`'''
+        while self._events and self._events[0][0] <= until:
+            event_time, _, callback, args = heapq.heappop(self._events)
+            self.now = event_time
+            callback(*args)
+            self.processed_events += 1
+        self.now = until
+
+
+class SimulatedInbox:
+    '''Sustituye a la cola de entrada del nodo: cada put() programa la entrega del mensaje'''
+    def __init__(self, simulator: EventSimulator, node: Quantum_Node):
+        self.simulator = simulator
+        self.node = node
+
+    def put(self, message: tuple, block: bool = True, timeout: float = None):
+        self.simulator.schedule(0.0, self.node._process_message, *message)
+
+
+class NetworkLink:
+    '''Enlace dirigido entre dos nodos, con su propia latencia y ancho de banda'''
+    def __init__(self, network: 'NetworkModel', sender_id: str, receiver: Quantum_Node, latency: float, bandwidth: float):
+        self.network = network
+        self.sender_id = sender_id
+        self.receiver = receiver
+        self.latency = latency # Segundos de propagacion (base)
+        self.bandwidth = bandwidth # Bytes por segundo
+        self.busy_until = 0.0 # Los mensajes del enlace se transmiten uno detras de otro
+
+    def put(self, message: tuple, block: bool = True, timeout: float = None):
+        self.network.send(self, message)
+
+
+class NetworkModel:
+    '''
+    Modelo de red para el simulador de eventos. Sustituye las colas de los peers por enlaces
+    con latencia y ancho de banda: la llegada de cada mensaje se programa en el heap del
+    simulador en (espera del enlace + tamano / ancho de banda + latencia). Permite particiones
+    programadas durante las que se descartan los mensajes entre grupos distintos.
+    '''
+    TX_SIZE = 250 # Bytes aproximados de una transaccion firmada
+    BLOCK_HEADER_SIZE = 80
+    INV_ENTRY_SIZE = 36 # Tipo + hash de cada entrada de inv/getdata
+    SHORT_ID_SIZE = 6 # Bytes de cada short ID de un bloque compacto
+
+    def __init__(self, simulator: EventSimulator,
+                 latency_range: Tuple[float, float] = (0.05, 0.3),
+                 bandwidth_range: Tuple[float, float] = (1e6, 1e7),
+                 jitter: float = 0.1):
+        self.simulator = simulator
+        self.rng = random.Random(simulator.rng.random()) # Flujo propio para la red, derivado de la semilla
+        self.latency_range = latency_range
+        self.bandwidth_range = bandwidth_range
+        self.jitter = jitter # Media del retardo extra exponencial, como fraccion de la latencia del enlace
+        self.partitions: List[Tuple[float, float, Dict[str, int]]] = []
+        self.messages_sent = 0
+        self.messages_dropped = 0
+        self.bytes_sent = 0
+        self.compact_savings: Dict[str, Dict[str, float]] = {} # hash -> bytes y segundos ahorrados, sumando todos los enlaces
+
+    def connect(self, nodes: List[Quantum_Node]):
+        '''Sustituir las colas de los peers de cada nodo por enlaces. Llamar despues de conectar los nodos'''
+        nodes_by_id = {node.node_id: node for node in nodes}
+        for node in nodes:
+            for peer_id in list(node.peers_queues):
+                node.peers_queues[peer_id] = NetworkLink(self, node.node_id, nodes_by_id[peer_id],
+                                                         self.rng.uniform(*self.latency_range),
+                                                         self.rng.uniform(*self.bandwidth_range))
+
+    def add_partition(self, start: float, end: float, groups: List[List[str]]):
+        '''Entre start y end solo hay comunicacion dentro de cada grupo. Los nodos no listados forman otro grupo'''
+        group_of = {node_id: index for index, group in enumerate(groups) for node_id in group}
+        self.partitions.append((start, end, group_of))
+
+    def is_partitioned(self, sender_id: str, receiver_id: str) -> bool:
+        now = self.simulator.now
+        for start, end, group_of in self.partitions:
+            if start <= now < end and group_of.get(sender_id, -1) != group_of.get(receiver_id, -1):
+                return True
+        return False
+
+    def block_size(self, num_transactions: int, graph_N: int) -> int:
+        # El bloque crece con sus Txs; la particion de Max-Cut ocupa un bit por vertice
+        return self.BLOCK_HEADER_SIZE + self.TX_SIZE * num_transactions + (graph_N + 7) // 8
+
+    def compact_block_sizes(self, compact: Any) -> Tuple[int, int]:
+        '''(bytes del bloque compacto, bytes del bloque completo equivalente)'''
+        graph_N = compact.header["graph_N"]
+        return (self.block_size(0, graph_N) + self.SHORT_ID_SIZE * len(compact.short_ids),
+                self.block_size(len(compact.short_ids), graph_N))
+
+    def message_size(self, message_type: str, data: Any) -> int:
+        if message_type in ("inv", "getdata"):
+            return self.INV_ENTRY_SIZE * len(data[1]) # Solo hashes, no el objeto
+        if message_type == "transaction":
+            return self.TX_SIZE
+        if message_type == "cmpctblock":
+            return self.compact_block_sizes(data[1])[0]
+        if message_type == "getblocktxn":
+            return self.INV_ENTRY_SIZE + 2 * len(data[2]) # Hash del bloque + indices de las Tx
+        if message_type == "blocktxn":
+            return self.INV_ENTRY_SIZE + self.TX_SIZE * len(data[2])
+        return self.block_size(len(data.transactions), data.graph_N)
+
+    def _record_compact_savings(self, link: NetworkLink, message: tuple, size: int, latency: float):
+        '''
+        Ahorro frente a enviar el bloque completo por el mismo enlace: el cmpctblock ahorra bytes
+        y tiempo de transmision; cada getblocktxn/blocktxn suma su envio y otra latencia.
+        '''
+        message_type, data = message
+        if message_type == "cmpctblock":
+            block_hash = data[1].hash
+            saved_bytes = self.compact_block_sizes(data[1])[1] - size
+            saved_time = saved_bytes / link.bandwidth
+        elif message_type in ("getblocktxn", "blocktxn"):
+            block_hash = data[1]
+            saved_bytes = -size
+            saved_time = -(size / link.bandwidth + latency)
+        else:
+            return
+        savings = self.compact_savings.setdefault(block_hash, {"bytes_saved": 0, "time_saved": 0.0})
+        savings["bytes_saved"] += saved_bytes
+        savings["time_saved"] += saved_time
+
+    def send(self, link: NetworkLink, message: tuple):
+        if self.is_partitioned(link.sender_id, link.receiver.node_id):
+            self.messages_dropped += 1
+            return
+        size = self.message_size(*message)
+        now = self.simulator.now
+        link.busy_until = max(now, link.busy_until) + size / link.bandwidth
+        latency = link.latency
+        if self.jitter > 0:
+            latency += self.rng.expovariate(1.0 / (self.jitter * link.latency)) if link.latency > 0 else 0.0
+        self.messages_sent += 1
+        self.bytes_sent += size
+        self._record_compact_savings(link, message, size, latency)
+        self.simulator.schedule(link.busy_until + latency - now, link.receiver._process_message, *message)
+
+
+class EventRuntime:
+    '''
+    Ejecuta los nodos cuanticos sobre el simulador de eventos en lugar de hilos. El tiempo
+    que tarda el solver QAOA se muestrea en tiempo virtual; el solver se ejecuta de verdad
+    al final para obtener la particion que validan los peers.
+    '''
+    def __init__(self, simulator: EventSimulator, mining_time_mean: float = 10.0, action_interval: Tuple[float, float] = (0.5, 1.0)):
+        self.simulator = simulator
+        self.mining_time_mean = mining_time_mean # Segundos virtuales medios de una ejecucion del solver
+        self.action_interval = action_interval # Pausa entre acciones aleatorias (como en Quantum_Node.run)
+        self._mining_jobs: Dict[str, object] = {}
+
+    def attach(self, node: Quantum_Node):
+        '''Conectar el nodo al runtime. Llamar antes de add_peer para que los peers usen el buzon simulado'''
+        node.runtime = self
+        node.clock = self.simulator.clock
+        node.incoming_queue = SimulatedInbox(self.simulator, node)
+        self.simulator.schedule(self.simulator.rng.uniform(*self.action_interval), self._tick, node)
+
+    def _tick(self, node: Quantum_Node):
+        node._flush_announcements()
+        node._random_action()
+        self.simulator.schedule(self.simulator.rng.uniform(*self.action_interval), self._tick, node)
+
+    def mining_delay(self, node: Quantum_Node) -> float:
+        '''Tiempo virtual de una ejecucion del solver: exponencial con media mining_time_mean'''
+        return self.simulator.rng.expovariate(1.0 / self.mining_time_mean)
+
+    def start_mining(self, node: Quantum_Node, mining_args: tuple):
+        job = object() # Identifica este intento; uno nuevo invalida el anterior
+        self._mining_jobs[node.node_id] = job
+        self.simulator.schedule(self.mining_delay(node), self._finish_mining, node, job, mining_args)
+
+    def _finish_mining(self, node: Quantum_Node, job: object, mining_args: tuple):
+        if not node.is_minig or self._mining_jobs.get(node.node_id) is not job:
+            return # Minado detenido (se recibio un bloque valido) o sustituido
+        node._mine_worker(*mining_args) # Resetea is_minig al terminar
+
+
+def summarize_nodes(nodes: List[Quantum_Node]) -> Dict[str, Any]:
+    '''Estado final: longitud y ultimo hash de cada nodo, agrupados por hash'''
+    final_hashes: Dict[str, List[str]] = {}
+    chain_lengths = {}
+    for node in nodes:
+        last_hash = node.blockchain.last_block.calculate_final_hash()
+        chain_lengths[node.node_id] = len(node.blockchain.chain)
+        final_hashes.setdefault(last_hash, []).append(node.node_id)
+    return {
+        "chain_lengths": chain_lengths,
+        "max_chain_length": max(chain_lengths.values()),
+        "final_hashes": final_hashes,
+        "consensus": len(final_hashes) == 1,
+    }
+
+
+def run_event_simulation(num_nodes: int = 3,
+                         protocol_N: int = 14,
+                         protocol_p: float = 0.5,
+                         difficulty_ratio: float = 0.58,
+                         simulation_time: float = 600.0,
+                         seed: Any = 0,
+                         mining_time_mean: float = 10.0,
+                         topology: str = "full",
+                         degree: int = 8,
+                         gossip_fanout: int = None,
+                         inventory_relay: bool = False,
+                         compact_blocks: bool = False,
+                         latency_range: Tuple[float, float] = None,
+                         bandwidth_range: Tuple[float, float] = (1e6, 1e7),
+                         partitions: List[Tuple[float, float, List[List[str]]]] = None,
+                         graph_version: int = GRAPH_VERSION_NUMPY,
+                         header_version: int = HEADER_VERSION_MERKLE) -> Dict[str, Any]:
+    '''
+    Simulacion completa con reloj virtual. Con la misma semilla se repite exactamente:
+    claves, decisiones de los nodos, tiempos de minado y parametros iniciales de QAOA.
+    Con latency_range (segundos) o partitions [(inicio, fin, [grupos de node_id])] los mensajes
+    viajan por el modelo de red; sin ellos la entrega es instantanea.
+    Con inventory_relay los nodos anuncian hashes (inv) y solo envian lo que se les pide (getdata).
+    Con compact_blocks los bloques viajan como cabecera + short IDs y se reconstruyen con el mempool.
+    graph_version elige el generador de grafos de la cadena (GRAPH_VERSION_* de quantum_block) y
+    header_version como se comprometen las Tx en la cabecera (HEADER_VERSION_*).
+    '''
+    start_time = time.time()
+    GRAPH_CACHE.clear() # Estadisticas de esta simulacion (una campana ejecuta muchas en el mismo proceso)
+    random.seed(seed) # Quantum_Node usa el modulo random para sus acciones
+    np.random.seed(random.Random(seed).randrange(2 ** 32)) # Parametros iniciales de QAOA
+    simulator = EventSimulator(seed)
+    runtime = EventRuntime(simulator, mining_time_mean=mining_time_mean)
+    stop_event = threading.Event() # Nunca se activa: el simulador decide cuando acabar
+
+    initial_blockchain_template = Quantum_Blockchain(protocol_N=protocol_N,
+                                                     protocol_p=protocol_p,
+                                                     initial_difficulty_ratio=difficulty_ratio,
+                                                     graph_version=graph_version,
+                                                     header_version=header_version)
+    initial_blockchain_template.chain[0].timestamp = 0.0
+    nodes: List[Quantum_Node] = []
+    for i in range(num_nodes):
+        node_id = f"Node-{i}"
+        node = Quantum_Node(node_id=node_id,
+                            blockchain_instance=copy.deepcopy(initial_blockchain_template),
+                            node_list=nodes,
+                            stop_event=stop_event,
+                            wallet=Wallet(seed=f"{seed}-{node_id}"),
+                            gossip_fanout=gossip_fanout,
+                            inventory_relay=inventory_relay,
+                            compact_blocks=compact_blocks)
+        runtime.attach(node)
+        nodes.append(node)
+
+    connect_nodes(nodes, topology=topology, degree=degree, seed=seed)
+    network = None
+    if latency_range is not None or partitions:
+        network = NetworkModel(simulator, latency_range=latency_range or (0.0, 0.0), bandwidth_range=bandwidth_range)
+        network.connect(nodes)
+        for start, end, groups in partitions or []:
+            network.add_partition(start, end, groups)
+
+    simulator.run(until=simulation_time)
+
+    summary = summarize_nodes(nodes)
+    summary["simulated_time"] = simulator.now
+    summary["processed_events"] = simulator.processed_events
+    if network is not None:
+        summary["messages_sent"] = network.messages_sent
+        summary["messages_dropped"] = network.messages_dropped
+        summary["bytes_sent"] = network.bytes_sent
+        if network.compact_savings:
+            summary["compact_savings"] = network.compact_savings
+    summary["graph_cache"] = GRAPH_CACHE.stats()
+    summary["wall_time"] = time.time() - start_time
+    summary["nodes"] = nodes
+    return summary
@@ -0,0 +1,50 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class GraphCache:
+    '''
+    LRU acotado de los grafos del PoW, por (previous_hash, transaction_hash, N, p). El grafo de
+    un bloque lo necesitan el minero, cada nodo que valida el bloque (tambien el propio minero
+    al recibir su bloque minado), calculate_target y validate_PoW: se genera una sola vez y el
+    resto son aciertos. Los grafos se guardan congelados (nx.freeze), asi que nadie puede
+    modificar uno compartido. Con lock: los nodos de la simulacion son hilos del mismo proceso.
+    '''
+    def __init__(self, max_items: int = 64):
+        if max_items <= 0:
+            raise ValueError("max_items debe ser positivo")
+        self.max_items = max_items
+        self._entries: OrderedDict = OrderedDict() # clave -> grafo, del usado hace mas tiempo al mas reciente
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = build() # Fuera del lock: otro hilo puede generar un grafo distinto a la vez
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"items": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
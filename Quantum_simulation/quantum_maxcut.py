@@ -0,0 +1,125 @@
+import numpy as np
+import networkx as nx
+from typing import Iterator, Sequence, Tuple, Union
+
+EDGE_ARRAY_KEY = "edge_array" # Clave en graph.graph donde se guardan las aristas de un grafo congelado
+CUT_BATCH_ROWS = 4096 # Particiones evaluadas a la vez en cut_sizes: acota la matriz temporal (filas x aristas)
+
+
+class EdgeListGraph:
+    '''
+    Grafo del PoW sin networkx: N y las aristas como array (2, E) de solo lectura, ordenadas
+    como el triangulo superior (i < j, por filas). Tiene la parte de la API de nx.Graph que usan
+    el minero y los validadores; la estructura CSR de vecinos se calcula bajo demanda
+    '''
+    def __init__(self, num_nodes: int, edges: np.ndarray):
+        self.num_nodes = num_nodes
+        self.edge_array = np.ascontiguousarray(edges, dtype=np.intp).reshape(2, -1)
+        self.edge_array.flags.writeable = False
+        self._csr = None
+
+    def number_of_nodes(self) -> int:
+        return self.num_nodes
+
+    def number_of_edges(self) -> int:
+        return self.edge_array.shape[1]
+
+    def nodes(self) -> range:
+        return range(self.num_nodes)
+
+    def edges(self) -> Iterator[Tuple[int, int]]:
+        return zip(*self.edge_array.tolist())
+
+    def csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        '''(indptr, indices): los vecinos del nodo i son indices[indptr[i]:indptr[i + 1]]'''
+        if self._csr is None:
+            u, v = self.edge_array
+            sources = np.concatenate((u, v))
+            targets = np.concatenate((v, u))
+            order = np.argsort(sources, kind="stable")
+            indptr = np.zeros(self.num_nodes + 1, dtype=np.intp)
+            np.cumsum(np.bincount(sources, minlength=self.num_nodes), out=indptr[1:])
+            self._csr = (indptr, targets[order])
+        return self._csr
+
+    def to_networkx(self) -> nx.Graph:
+        graph = nx.Graph()
+        graph.add_nodes_from(range(self.num_nodes))
+        graph.add_edges_from(self.edges())
+        return nx.freeze(graph)
+
+
+AnyGraph = Union[nx.Graph, EdgeListGraph]
+
+
+def as_networkx(graph: AnyGraph) -> nx.Graph:
+    '''Para codigo que necesita un nx.Graph de verdad (p.ej. qml.qaoa.maxcut)'''
+    return graph.to_networkx() if isinstance(graph, EdgeListGraph) else graph
+
+
+def edge_array(graph: AnyGraph) -> np.ndarray:
+    '''
+    Aristas del grafo como array (2, E) de extremos u y v. Las aristas con un extremo fuera de
+    0..N-1 no pueden cortarse con una particion de N bits y se descartan. Los grafos del PoW
+    estan congelados (GRAPH_CACHE), no pueden cambiar: el array se calcula una vez y se guarda
+    en el propio grafo
+    '''
+    if isinstance(graph, EdgeListGraph):
+        return graph.edge_array
+    if nx.is_frozen(graph) and EDGE_ARRAY_KEY in graph.graph:
+        return graph.graph[EDGE_ARRAY_KEY]
+    num_nodes = graph.number_of_nodes()
+    edges = np.array([(u, v) for u, v in graph.edges() if 0 <= u < num_nodes and 0 <= v < num_nodes], dtype=np.intp).reshape(-1, 2).T
+    edges = np.ascontiguousarray(edges)
+    if nx.is_frozen(graph):
+        edges.flags.writeable = False # Compartido por todos los que usan el grafo
+        graph.graph[EDGE_ARRAY_KEY] = edges
+    return edges
+
+
+def partition_array(partition: Sequence[int], num_nodes: int) -> np.ndarray:
+    partition = np.asarray(partition)
+    if partition.shape != (num_nodes,):
+        raise ValueError(f"Tamano de particion {len(partition)} no coincide con el numero de nodos {num_nodes}")
+    return partition
+
+
+def cut_size(edges: np.ndarray, partition: np.ndarray) -> int:
+    '''Aristas cuyos extremos estan en lados distintos: una comparacion por arista, sin bucle en Python'''
+    u, v = edges
+    return int(np.count_nonzero(partition[u] != partition[v]))
+
+
+def cut_sizes(edges: np.ndarray, partitions: np.ndarray) -> np.ndarray:
+    '''Corte de cada fila de `partitions` (K, N) en una sola llamada, por bloques de CUT_BATCH_ROWS filas'''
+    partitions = np.asarray(partitions)
+    u, v = edges
+    cuts = np.empty(len(partitions), dtype=np.int64)
+    for start in range(0, len(partitions), CUT_BATCH_ROWS):
+        rows = partitions[start:start + CUT_BATCH_ROWS]
+        cuts[start:start + len(rows)] = np.count_nonzero(rows[:, u] != rows[:, v], axis=1)
+    return cuts
+
+
+def bitstrings_to_partitions(states: Sequence[int], num_nodes: int) -> np.ndarray:
+    '''Indices de estados de la base (qubit 0 = bit mas significativo) a particiones (K, N) de 0 y 1'''
+    states = np.asarray(states, dtype=np.int64)
+    shifts = np.arange(num_nodes - 1, -1, -1, dtype=np.int64)
+    return ((states[:, None] >> shifts) & 1).astype(np.uint8)
+
+
+def graph_cut_size(graph: AnyGraph, partition: Sequence[int]) -> int:
+    '''Corte de una particion sobre el grafo (ValueError si la particion no tiene N elementos)'''
+    num_nodes = graph.number_of_nodes()
+    if num_nodes == 0:
+        return 0
+    return cut_size(edge_array(graph), partition_array(partition, num_nodes))
+
+
+def graph_cut_sizes(graph: AnyGraph, partitions: np.ndarray) -> np.ndarray:
+    '''Corte de miles de particiones candidatas (K, N) sobre el mismo grafo'''
+    partitions = np.asarray(partitions)
+    num_nodes = graph.number_of_nodes()
+    if partitions.ndim != 2 or partitions.shape[1] != num_nodes:
+        raise ValueError(f"Particiones de forma {partitions.shape}, se esperaba (K, {num_nodes})")
+    return cut_sizes(edge_array(graph), partitions)
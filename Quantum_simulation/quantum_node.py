@@ -1,7 +1,9 @@
 from quantum_blockchain import Quantum_Blockchain
-from quantum_block import Quantum_Block
-from quantum_transactions import Transaction, Wallet
+from quantum_block import Quantum_Block, CompactBlock, short_tx_id
+from quantum_transactions import Transaction, Wallet, SignatureCache
 from QAOA_max_cut import solve_max_cut_qaoa
+from quantum_seen_cache import SeenCache
+from quantum_mempool import Mempool
 import numpy as np
 from typing import List, Any, Set, Dict, Optional # For type hinting
 import time
@@ -16,17 +18,38 @@ from datetime import datetime
 #os.environ["PATH"] += os.pathsep + graphviz_bin
 from graphviz import Digraph
 
+# Relay por inventario (inv/getdata)
+INVENTORY_SIZE = 5000 # Objetos anunciados que se guardan para responder a getdata
+ANNOUNCE_INTERVAL = 0.1 # Segundos minimos entre anuncios de Tx agrupados
+REQUEST_TIMEOUT = 2.0 # Segundos antes de volver a pedir un objeto a otro peer
+MAX_PARTIAL_BLOCKS = 16 # Bloques compactos a la espera de sus Tx (blocktxn)
+
+# Caches de hashes ya vistos (known_tx_hashes, known_block_hashes)
+SEEN_TX_CACHE_SIZE = 50000 # Hashes de Tx recientes guardados exactamente
+SEEN_BLOCK_CACHE_SIZE = 5000
+SEEN_CACHE_MAX_AGE = None # Segundos sin verse antes de expulsar un hash (None = solo por numero)
+SEEN_TX_FP_RATE = 0.001 # Falsos positivos del Bloom filter de Tx expulsadas (None = sin Bloom)
+SIGNATURE_CACHE_SIZE = 100000 # Firmas ya verificadas que no se vuelven a comprobar
+
+# Plantillas de bloque (los limites del mempool estan en el modulo mempool)
+BLOCK_MAX_TXS = 1000 # Tx por bloque como maximo
+BLOCK_MAX_BYTES = 1000000 # Bytes de Tx por bloque como maximo
+TX_FEE_RANGE = (0.0, 0.01) # Comision de las Tx que crea el nodo
+
 class Quantum_Node(threading.Thread):
-    def __init__(self, node_id:str, blockchain_instance = Quantum_Blockchain, node_list: list = None, stop_event: threading.Event = None):
+    def __init__(self, node_id:str, blockchain_instance = Quantum_Blockchain, node_list: list = None, stop_event: threading.Event = None, wallet: Wallet = None, gossip_fanout: int = None, inventory_relay: bool = False, compact_blocks: bool = False):
         threading.Thread.__init__(self,daemon=True) # Llamar al init del Thread, daemon=True para que termine si el principal termina
         self.node_id = node_id
         self.blockchain = blockchain_instance
-        self.wallet = Wallet()
-        self.mempool: Set[Transaction] = set()
+        self.wallet = wallet if wallet is not None else Wallet()
         self.peers_queues: Dict[str, queue.Queue] = {} #  Almacena colas de enrada de los peers
         self.incoming_queue = queue.Queue() #C ola de entrada a este nodo
-        self.known_tx_hashes: Set[str] = set()
-        self.known_block_hashes: Set[str] = set()
+        self.clock = time.time # Reloj para las marcas de tiempo, el runtime puede sustituirlo por uno virtual
+        self.mempool = Mempool(clock=lambda: self.clock()) # Por fee rate, acotado en numero, bytes y antiguedad
+        # Acotados: memoria constante aunque la simulacion dure horas. Se consulta self.clock en cada uso, por si el runtime lo cambia
+        self.known_tx_hashes = SeenCache(SEEN_TX_CACHE_SIZE, SEEN_CACHE_MAX_AGE, SEEN_TX_FP_RATE, clock=lambda: self.clock())
+        self.known_block_hashes = SeenCache(SEEN_BLOCK_CACHE_SIZE, SEEN_CACHE_MAX_AGE, clock=lambda: self.clock())
+        self.signature_cache = SignatureCache(SIGNATURE_CACHE_SIZE) # Compartida por mempool y validacion de bloques
         if self.blockchain.chain:
             self.known_block_hashes.add(self.blockchain.chain[0].hash)
 
@@ -38,6 +61,17 @@ class Quantum_Node(threading.Thread):
         self.current_mining_task_stop_event: Optional[threading.Event] = None # Para detener un hilo de minado cuando se recibe un bloque válido
         self.is_validating_block = False # Indica si _handle_block esta ocupado
         self.mining_thread = None #Referencia al hilo minero
+        self.runtime = None # Runtime alternativo a los hilos (eventos discretos), gestiona el minado
+        self.gossip_fanout = gossip_fanout # Maximo de peers a los que se reenvia cada mensaje (None = todos)
+        self.inventory_relay = inventory_relay # Anunciar hashes (inv) y enviar solo lo que se pide (getdata)
+        self.inventory: Dict[str, tuple] = {} # hash -> mensaje, para responder a getdata
+        self.pending_announcements: List[tuple] = [] # Tx aceptadas pendientes de anunciar
+        self.last_announcement = 0.0
+        self.requested_items: Dict[str, float] = {} # hash -> instante en que se pidio
+        self.relay_lock = threading.Lock() # Aparte de data_lock: _broadcast se llama con data_lock tomado
+        self.compact_blocks = compact_blocks # Difundir bloques como cabecera + short IDs (se reconstruyen con el mempool)
+        self.partial_blocks: Dict[str, tuple] = {} # hash -> (CompactBlock, Tx encontradas) a la espera de blocktxn
+        self.compact_stats = {"received": 0, "reconstructed": 0, "missing_txs": 0}
 
         self.data_lock = threading.Lock() # Lock para bloquear accesos concurrentes
 
@@ -65,8 +99,7 @@ class Quantum_Node(threading.Thread):
             if tx_hash in self.known_tx_hashes:
                 return
             self.known_tx_hashes.add(tx_hash)
-            if transaction.is_valid() and transaction not in self.mempool:
-                self.mempool.add(transaction)
+            if transaction.is_valid(self.signature_cache) and transaction not in self.mempool and self.mempool.add(transaction):
                 needs_broadcast = True
             else:
                 needs_broadcast = False
@@ -103,6 +136,12 @@ class Quantum_Node(threading.Thread):
             print(f"Nodo {self.node_id}: Error: Hash previo del bloque {block.index} no es correcto")
             print(f"  Esperado: {last_local_block.calculate_final_hash()[:8]}... - Recibido: {block.previous_hash[:8]}...")
             return
+        if block.graph_version != self.blockchain.graph_version:
+            print(f"Nodo {self.node_id}: Error: Version de grafo del bloque {block.index} no es correcta ({block.graph_version}, esperada {self.blockchain.graph_version})")
+            return
+        if block.header_version != self.blockchain.header_version:
+            print(f"Nodo {self.node_id}: Error: Version de cabecera del bloque {block.index} no es correcta ({block.header_version}, esperada {self.blockchain.header_version})")
+            return
         
         # 3. Generar grafo y calcular corte objetivo
         try:
@@ -148,8 +187,7 @@ class Quantum_Node(threading.Thread):
                 # Anadir a la blockchain
                 if self.blockchain.add_block(block):
                     print(f"Nodo {self.node_id}: Añadiendo bloque {block.index}  con hash: {block.hash[:8]}a la cadena local. Minado por {block.mined_by}")
-                    block_tx_ids = { hashlib.sha256(str(tx).encode()).hexdigest() for tx in block.transactions }
-                    self.mempool = {tx for tx in self.mempool if hashlib.sha256(str(tx).encode()).hexdigest() not in block_tx_ids}
+                    self.mempool.difference_update(block.transactions)
 
                     if self.is_minig:
                         self._stop_mining()
@@ -167,13 +205,162 @@ class Quantum_Node(threading.Thread):
             self._broadcast("block", block)
 
     def _broadcast(self, msg_type:str, data:any):
-        '''Envia mensaje a las colas de todos los peers conocidos'''
-        message = (msg_type, data) # Empaquetar tipo y datos
-        for peer_id, peer_queue in self.peers_queues.items():
+        '''Difunde un objeto a los peers: completo, solo su hash (inventory_relay) o como bloque compacto (compact_blocks)'''
+        if msg_type == "block" and self.compact_blocks:
+            self._relay_compact_block(data)
+        elif self.inventory_relay:
+            self._announce(msg_type, data)
+        else:
+            self._send_to_peers((msg_type, data)) # Empaquetar tipo y datos
+
+    def _send_to_peers(self, message: tuple):
+        '''Envia un mensaje a las colas de los peers conocidos (a gossip_fanout de ellos si esta definido)'''
+        peers = self.peers_queues.items()
+        if self.gossip_fanout is not None and len(self.peers_queues) > self.gossip_fanout:
+            # Gossip acotado: el resto de la red lo recibe de los peers que lo reenvian
+            peers = random.sample(list(peers), self.gossip_fanout)
+        for peer_id, peer_queue in peers:
             try:
                 peer_queue.put(message,block=False) # No bloquear si la cola esta llena
             except queue.Full:
                 print(f"Nodo {self.node_id}: WARN - Cola del peer {peer_id} llena. Mensaje descartado")
+
+    # --- RELAY POR INVENTARIO (inv/getdata) ---
+    def _announce(self, msg_type: str, data: Any):
+        '''Guarda el objeto para responder a getdata y anuncia su hash: bloques al momento, Tx en el siguiente tick'''
+        item_hash = data.hash if msg_type == "block" else data.calculate_hash()
+        with self.relay_lock:
+            self._remember(item_hash, (msg_type, data))
+            if msg_type != "block":
+                self.pending_announcements.append((msg_type, item_hash))
+                return
+        self._send_to_peers(("inv", (self.node_id, [(msg_type, item_hash)])))
+
+    def _remember(self, item_hash: str, message: tuple):
+        '''Guarda un objeto en el inventario, descartando el mas antiguo si esta lleno. Llamar con relay_lock'''
+        self.inventory[item_hash] = message
+        while len(self.inventory) > INVENTORY_SIZE:
+            del self.inventory[next(iter(self.inventory))]
+
+    def _flush_announcements(self):
+        '''Envia en un solo inv las Tx aceptadas desde el ultimo anuncio'''
+        now = self.clock()
+        with self.relay_lock:
+            if not self.pending_announcements or now - self.last_announcement < ANNOUNCE_INTERVAL:
+                return
+            items, self.pending_announcements = self.pending_announcements, []
+            self.last_announcement = now
+        self._send_to_peers(("inv", (self.node_id, items)))
+
+    def _handle_inv(self, data: tuple):
+        '''Pide con getdata solo los objetos anunciados que no conocemos ni hemos pedido ya'''
+        sender_id, items = data
+        now = self.clock()
+        wanted = []
+        with self.data_lock:
+            for msg_type, item_hash in items:
+                known = self.known_block_hashes if msg_type == "block" else self.known_tx_hashes
+                if item_hash in known:
+                    continue
+                requested_at = self.requested_items.get(item_hash)
+                if requested_at is not None and now - requested_at < REQUEST_TIMEOUT:
+                    continue # Ya pedido a otro peer, esperar su respuesta
+                self.requested_items[item_hash] = now
+                wanted.append((msg_type, item_hash))
+            if len(self.requested_items) > INVENTORY_SIZE: # Olvidar peticiones caducadas
+                self.requested_items = {h: t for h, t in self.requested_items.items() if now - t < REQUEST_TIMEOUT}
+        peer_queue = self.peers_queues.get(sender_id)
+        if wanted and peer_queue is not None:
+            try:
+                peer_queue.put(("getdata", (self.node_id, wanted)), block=False)
+            except queue.Full:
+                print(f"Nodo {self.node_id}: WARN - Cola del peer {sender_id} llena. getdata descartado")
+
+    def _handle_getdata(self, data: tuple):
+        '''Envia al peer que los pide los objetos de nuestro inventario'''
+        sender_id, items = data
+        peer_queue = self.peers_queues.get(sender_id)
+        if peer_queue is None:
+            return
+        with self.relay_lock:
+            found = [self.inventory.get(item_hash) for _, item_hash in items]
+        for message in found:
+            if message is None:
+                continue # Ya descartado del inventario
+            try:
+                peer_queue.put(message, block=False)
+            except queue.Full:
+                print(f"Nodo {self.node_id}: WARN - Cola del peer {sender_id} llena. Mensaje descartado")
+
+    # --- COMPACT BLOCKS (cmpctblock/getblocktxn/blocktxn) ---
+    def _relay_compact_block(self, block: Quantum_Block):
+        '''Envia cabecera + short IDs y guarda el bloque para servir las Tx que falten'''
+        with self.relay_lock:
+            self._remember(block.hash, ("block", block))
+        self._send_to_peers(("cmpctblock", (self.node_id, CompactBlock(block))))
+
+    def _handle_compact_block(self, data: tuple):
+        '''Reconstruye el bloque con el mempool; si faltan Tx se piden solo esas al emisor'''
+        sender_id, compact = data
+        with self.data_lock:
+            if compact.hash in self.known_block_hashes or compact.hash in self.partial_blocks:
+                return
+            self.compact_stats["received"] += 1
+            mempool_by_short_id = {short_tx_id(tx): tx for tx in self.mempool}
+        transactions = [mempool_by_short_id.get(short_id) for short_id in compact.short_ids]
+        if None not in transactions:
+            block = compact.to_block(transactions)
+            if compact.matches(block):
+                with self.data_lock:
+                    self.compact_stats["reconstructed"] += 1
+                self._handle_block(block)
+                return
+            transactions = [None] * len(transactions) # Colision de short ID: pedir todas
+        self._request_block_transactions(sender_id, compact, transactions)
+
+    def _request_block_transactions(self, sender_id: str, compact: CompactBlock, transactions: List[Transaction]):
+        missing = [i for i, tx in enumerate(transactions) if tx is None]
+        with self.data_lock:
+            self.partial_blocks[compact.hash] = (compact, transactions)
+            while len(self.partial_blocks) > MAX_PARTIAL_BLOCKS:
+                del self.partial_blocks[next(iter(self.partial_blocks))] # Peticion sin respuesta mas antigua
+            self.compact_stats["missing_txs"] += len(missing)
+        peer_queue = self.peers_queues.get(sender_id)
+        if peer_queue is None:
+            return
+        try:
+            peer_queue.put(("getblocktxn", (self.node_id, compact.hash, missing)), block=False)
+        except queue.Full:
+            print(f"Nodo {self.node_id}: WARN - Cola del peer {sender_id} llena. getblocktxn descartado")
+
+    def _handle_getblocktxn(self, data: tuple):
+        '''Envia las Tx del bloque que el peer no ha podido reconstruir'''
+        sender_id, block_hash, indexes = data
+        with self.relay_lock:
+            entry = self.inventory.get(block_hash)
+        peer_queue = self.peers_queues.get(sender_id)
+        if entry is None or peer_queue is None:
+            return
+        block = entry[1]
+        try:
+            peer_queue.put(("blocktxn", (self.node_id, block_hash, [block.transactions[i] for i in indexes])), block=False)
+        except queue.Full:
+            print(f"Nodo {self.node_id}: WARN - Cola del peer {sender_id} llena. blocktxn descartado")
+
+    def _handle_blocktxn(self, data: tuple):
+        '''Completa el bloque pendiente con las Tx recibidas y lo valida como uno normal'''
+        sender_id, block_hash, received = data
+        with self.data_lock:
+            pending = self.partial_blocks.pop(block_hash, None)
+        if pending is None:
+            return
+        compact, transactions = pending
+        received = iter(received)
+        transactions = [tx if tx is not None else next(received, None) for tx in transactions]
+        if None in transactions:
+            print(f"Nodo {self.node_id}: blocktxn incompleto para el bloque {block_hash[:8]}")
+            return
+        self._handle_block(compact.to_block(transactions))
     
     def _start_mining(self):
         '''Inicia el hilo de minado'''  
@@ -181,7 +368,8 @@ class Quantum_Node(threading.Thread):
             if self.is_minig:
                 print(f"Nodo {self.node_id}: Minado ya en curso")
                 return
-            mempool_copy = list(self.mempool)
+            # Las de mayor fee rate que caben en un bloque, en orden de creacion (determinista)
+            mempool_copy = self.mempool.build_block_template(BLOCK_MAX_TXS, BLOCK_MAX_BYTES)
 
             if not mempool_copy:
                 print(f"Nodo {self.node_id}: Nada que minar")
@@ -192,6 +380,10 @@ class Quantum_Node(threading.Thread):
             # Crear hilo de minado
       
             self.current_mining_task_stop_event = threading.Event() # Evento de parada para esta tarea en concreto
+            if self.runtime is not None:
+                # El runtime (p.ej. eventos discretos) decide cuando se ejecuta el minado
+                self.runtime.start_mining(self, (mempool_copy, self.current_mining_task_stop_event, self.stop_event))
+                return
             self.mining_thread = threading.Thread(target=self._mine_worker, args=(mempool_copy, self.current_mining_task_stop_event,self.stop_event), daemon=True)
             self.mining_thread.start() # Iniciar hilo de minado            
         
@@ -230,13 +422,15 @@ class Quantum_Node(threading.Thread):
             # Creamos bloque candidato
             candidate_block = Quantum_Block(
                 index=last_block.index +1,
-                timestamp=time.time(),
+                timestamp=self.clock(),
                 transactions=transactions_to_mine,
                 previous_hash=prev_hash,
                 mined_by=self.node_id,
                 difficulty_ratio=difficulty_ratio,
                 protocol_N=self.N,
-                protocol_p=self.p
+                protocol_p=self.p,
+                graph_version=self.blockchain.graph_version,
+                header_version=self.blockchain.header_version
             )
             
             print(f"Nodo {self.node_id}: Iniciando minado bloque {candidate_block.index}. Difficulty ratio: {difficulty_ratio}. Numero de transaciones: {len(candidate_block.transactions)}. Hash bloque anterior: {candidate_block.previous_hash[:8]}")
@@ -305,7 +499,7 @@ class Quantum_Node(threading.Thread):
         else: #Solver ha fallado
             print(f"Nodo {self.node_id}: No se ha encontrado solucion al problema") #Que hacemos, volvemos a empezar?
         
-        if self.mining_thread == threading.current_thread(): # Si somos el hilo actual
+        if self.mining_thread == threading.current_thread() or self.runtime is not None: # Si somos el hilo actual (o el runtime)
             self.is_minig = False
             
     def _stop(self): # Parada global del nodo
@@ -314,6 +508,50 @@ class Quantum_Node(threading.Thread):
         self.is_minig = False
         self._stop_mining() 
       
+    def _process_message(self, message_type: str, data: Any):
+        '''Despacha un mensaje de la cola de entrada a su manejador'''
+        #print(f"Nodo {self.node_id}: Recibo mensaje {message_type}")
+        if message_type == "transaction":
+            self._handle_transaction(data)
+        elif message_type == "block":
+            print(f"Nodo {self.node_id}: Recibo bloque")
+            self._handle_block(data)
+        elif message_type == "mined_block":
+            print(f"Nodo {self.node_id}: Recibo bloque minado")
+            self._handle_block(data)
+        elif message_type == "inv":
+            self._handle_inv(data)
+        elif message_type == "getdata":
+            self._handle_getdata(data)
+        elif message_type == "cmpctblock":
+            self._handle_compact_block(data)
+        elif message_type == "getblocktxn":
+            self._handle_getblocktxn(data)
+        elif message_type == "blocktxn":
+            self._handle_blocktxn(data)
+
+    def _random_action(self):
+        '''Accion aleatoria cuando no hay mensajes: crear una Tx y/o empezar a minar'''
+        action = random.random()
+        
+        # 2. Posibilidad de crear una transaccion
+        if action < 0.6: 
+            if len(self.peers_queues) > 0 :#Hay mas de un nodo conectado)
+                if self.node_list and len (self.node_list) > 1:
+                    # Eleccion O(1): con miles de nodos no se recorre node_list en cada accion
+                    recipient_node = random.choice(self.node_list)
+                    while recipient_node.node_id == self.node_id:
+                        recipient_node = random.choice(self.node_list)
+                    amount = round(random.uniform(0.1,1.0),2 )
+                    print(f"Nodo {self.node_id}: Tx a {recipient_node.node_id} por {amount}")
+                    self._create_and_broadcast_transaction(recipient_node.get_address(), amount)
+        # 3. Posibilidad de minar un bloque
+        if action < 0.2:
+            with self.data_lock: #Necesario para chequear mempool
+                can_mine =  not self.is_minig and len(self.mempool) > 0
+            if can_mine:
+                self._start_mining()
+
     def run(self):
         '''Ejecuta el hilo del nodo, procesando mensajes de la cola de entrada'''
         print(f"Nodo {self.node_id}: Iniciando hilo de procesamiento")
@@ -323,38 +561,13 @@ class Quantum_Node(threading.Thread):
             try:
                 # 1. Procesar mensajes entrantes (no bloqueante)
                 message_type, data = self.incoming_queue.get(block=False)
-                #print(f"Nodo {self.node_id}: Recibo mensaje {message_type}")
-                if message_type == "transaction":
-                    self._handle_transaction(data)
-                elif message_type == "block":
-                    print(f"Nodo {self.node_id}: Recibo bloque")
-                    self._handle_block(data)
-                elif message_type == "mined_block":
-                    print(f"Nodo {self.node_id}: Recibo bloque minado")
-                    self._handle_block(data)
+                self._process_message(message_type, data)
                 self.incoming_queue.task_done() #Marcar tarea como completada
+                self._flush_announcements() # No esperar a un ciclo libre si no paran de llegar mensajes
             except queue.Empty:
                 #No hay mensajes en la cola
-                action = random.random()
-                
-                # 2. Posibilidad de crear una transaccion
-                if action < 0.6: 
-                    if len(self.peers_queues) > 0 :#Hay mas de un nodo conectado)
-                        if self.node_list and len (self.node_list) > 1:
-                            possible_recipients = [n for n in self.node_list if n.node_id != self.node_id]
-                            if possible_recipients:
-                                recipient_node = random.choice(possible_recipients)
-                                amount = round(random.uniform(0.1,1.0),2 )
-                                print(f"Nodo {self.node_id}: Tx a {recipient_node.node_id} por {amount}")
-                                self._create_and_broadcast_transaction(recipient_node.get_address(), amount)
-                            else:
-                                print(f"Nodo {self.node_id}: No hay nodos disponibles para enviar Tx")
-                # 3. Posibilidad de minar un bloque
-                if action < 0.2:
-                    with self.data_lock: #Necesario para chequear mempool
-                        can_mine =  not self.is_minig and len(self.mempool) > 0
-                    if can_mine:
-                        self._start_mining()
+                self._flush_announcements()
+                self._random_action()
                 # Pausa para evitar consumo excesivo de CPU
                 time.sleep(random.uniform(0.5, 1.0)) # Pausa aleatoria entre 0.1 y 0.5 segundos
         print(f"Nodo {self.node_id}: Hilo detenido")        
@@ -365,14 +578,15 @@ class Quantum_Node(threading.Thread):
             sender_address=self.get_address(),
             recipient_address=recipient_address,
             amount=amount,
-            inputs=[]
+            inputs=[],
+            timestamp=self.clock(),
+            fee=round(random.uniform(*TX_FEE_RANGE), 4)
         )
         tx.sign_transaction(self.wallet)
         tx_hash = tx.calculate_hash()
-        if tx.is_valid():
+        if tx.is_valid(self.signature_cache):
             with self.data_lock: # Acceso a mempool y known_tx_hashes
-                if tx not in self.mempool and tx_hash not in self.known_tx_hashes:
-                    self.mempool.add(tx)
+                if tx not in self.mempool and tx_hash not in self.known_tx_hashes and self.mempool.add(tx):
                     self.known_tx_hashes.add(tx_hash)
                     needs_broadcast = True
                 else:
@@ -0,0 +1,148 @@
+import numpy as np
+from typing import Tuple
+from quantum_maxcut import AnyGraph
+
+STATE_CHUNK = 1 << 16 # Estados por bloque en la capa de coste y al muestrear: la memoria extra no crece con 2^N
+
+
+def cut_values(num_nodes: int, edges) -> np.ndarray:
+    '''
+    Corte de cada uno de los 2^N estados de la base, en el orden de PennyLane (qubit 0 = bit mas
+    significativo). Cada arista suma su XOR por broadcasting sobre el tensor (2,)*N: una pasada
+    por arista, sin bucles en Python sobre los estados
+    '''
+    cuts = np.zeros((2,) * num_nodes, dtype=np.int16)
+    xor = np.array([[0, 1], [1, 0]], dtype=np.int16)
+    for u, v in edges:
+        if u == v:
+            continue
+        shape = [1] * num_nodes
+        shape[u] = shape[v] = 2
+        cuts += xor.reshape(shape)
+    return cuts.reshape(-1)
+
+
+class MaxCutStatevector:
+    '''
+    QAOA de Max-Cut sobre el vector de estado en NumPy, equivalente al circuito de PennyLane con
+    qml.qaoa.maxcut (cost_layer + mixer_layer). El hamiltoniano de coste es diagonal: el vector
+    de cortes se calcula una vez por grafo y la capa de coste es un producto elemento a elemento
+    por exp(i*gamma*corte). El mezclador es RX(2*beta) en cada qubit, aplicado sobre el vector
+    visto como (2^q, 2, resto). Los gradientes se calculan por el metodo adjunto: un recorrido
+    hacia delante y otro hacia atras, sin autograd.
+    '''
+    def __init__(self, graph: AnyGraph):
+        self.num_nodes = graph.number_of_nodes()
+        self.num_edges = graph.number_of_edges()
+        self.cuts = cut_values(self.num_nodes, graph.edges())
+        self.cost = -self.cuts.astype(np.float64) # Diagonal del coste de qml.qaoa.maxcut: -corte
+        # Buffers de medio vector para el mezclador: sin reservar memoria nueva en cada qubit
+        half = 2 ** max(self.num_nodes - 1, 0)
+        self._buffers = (np.empty(half, dtype=np.complex128), np.empty(half, dtype=np.complex128))
+
+    def _apply_cost(self, psi: np.ndarray, gamma: float):
+        # exp(-i*gamma*C) con C = -corte: una fase por valor de corte, indexada con el vector de cortes
+        phases = np.exp(1j * gamma * np.arange(self.num_edges + 1))
+        for start in range(0, len(psi), STATE_CHUNK):
+            psi[start:start + STATE_CHUNK] *= phases[self.cuts[start:start + STATE_CHUNK]]
+
+    def _apply_mixer(self, psi: np.ndarray, beta: float):
+        # exp(-i*beta*X) en cada qubit: [[cos, -i sin], [-i sin, cos]]
+        c, s = np.cos(beta), -1j * np.sin(beta)
+        for qubit in range(self.num_nodes):
+            view = psi.reshape(2 ** qubit, 2, -1)
+            a0, a1 = view[:, 0, :], view[:, 1, :]
+            s_a1, s_a0 = (buffer.reshape(a0.shape) for buffer in self._buffers)
+            np.multiply(a1, s, out=s_a1)
+            np.multiply(a0, s, out=s_a0)
+            a0 *= c
+            a0 += s_a1
+            a1 *= c
+            a1 += s_a0
+
+    def _apply_x_sum(self, psi: np.ndarray) -> np.ndarray:
+        '''Generador del mezclador, sum_q X_q, aplicado a psi'''
+        out = np.zeros_like(psi)
+        for qubit in range(self.num_nodes):
+            view = psi.reshape(2 ** qubit, 2, -1)
+            out_view = out.reshape(2 ** qubit, 2, -1)
+            out_view[:, 0, :] += view[:, 1, :]
+            out_view[:, 1, :] += view[:, 0, :]
+        return out
+
+    def state(self, params: np.ndarray) -> np.ndarray:
+        '''Estado final: Hadamard en todos los qubits y las capas (gamma_l, beta_l) de params = [gammas, betas]'''
+        gammas, betas = params
+        psi = np.full(2 ** self.num_nodes, 2 ** (-self.num_nodes / 2), dtype=np.complex128)
+        for gamma, beta in zip(gammas, betas):
+            self._apply_cost(psi, gamma)
+            self._apply_mixer(psi, beta)
+        return psi
+
+    def expectation(self, params: np.ndarray) -> float:
+        '''<C>, el valor que devuelve qml.expval(cost_h): menos el corte esperado'''
+        probabilities = self.probabilities(params)
+        return float(probabilities @ self.cost)
+
+    def probabilities(self, params: np.ndarray) -> np.ndarray:
+        psi = self.state(params)
+        return psi.real ** 2 + psi.imag ** 2
+
+    def sample(self, params: np.ndarray, shots: int, rng=np.random) -> np.ndarray:
+        '''
+        `shots` indices de estados de la base segun |psi|^2, sin el vector de probabilidades
+        completo: las probabilidades acumuladas se calculan por bloques de STATE_CHUNK estados
+        y cada sorteo (ordenados de menor a mayor) cae en el bloque que le corresponde
+        '''
+        psi = self.state(params)
+        draws = np.sort(rng.random(shots))
+        states = np.empty(shots, dtype=np.int64)
+        filled = 0
+        total = 0.0
+        for start in range(0, len(psi), STATE_CHUNK):
+            chunk = psi[start:start + STATE_CHUNK]
+            cumulative = np.cumsum(chunk.real ** 2 + chunk.imag ** 2)
+            cumulative += total
+            total = cumulative[-1]
+            last = start + STATE_CHUNK >= len(psi)
+            end = shots if last else int(np.searchsorted(draws, total, side='right')) # El redondeo puede dejar sum < 1
+            positions = np.searchsorted(cumulative, draws[filled:end], side='right')
+            states[filled:end] = start + np.minimum(positions, len(chunk) - 1)
+            filled = end
+        return states
+
+    def expectation_and_gradient(self, params: np.ndarray) -> Tuple[float, np.ndarray]:
+        '''<C> y su gradiente respecto a params, por el metodo adjunto (mismo coste que ~3 evaluaciones)'''
+        gammas, betas = params
+        psi = self.state(params)
+        energy = float((psi.real ** 2 + psi.imag ** 2) @ self.cost)
+        lam = self.cost * psi # C|psi>, se propaga hacia atras junto con psi
+        gradient = np.zeros((2, len(gammas)))
+        for layer in reversed(range(len(gammas))):
+            # d<C>/dtheta = 2 Im <lam|H|psi> con H el generador de la puerta (exp(-i*theta*H))
+            gradient[1, layer] = 2 * np.vdot(lam, self._apply_x_sum(psi)).imag
+            self._apply_mixer(psi, -betas[layer])
+            self._apply_mixer(lam, -betas[layer])
+            gradient[0, layer] = 2 * np.vdot(lam, self.cost * psi).imag
+            self._apply_cost(psi, -gammas[layer])
+            self._apply_cost(lam, -gammas[layer])
+        return energy, gradient
+
+
+class AdamOptimizer:
+    '''Mismas actualizaciones que qml.AdamOptimizer, sobre arrays de NumPy'''
+    def __init__(self, stepsize: float = 0.01, beta1: float = 0.9, beta2: float = 0.99, eps: float = 1e-8):
+        self.stepsize = stepsize
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.fm = 0.0
+        self.sm = 0.0
+        self.t = 0
+
+    def apply_grad(self, gradient: np.ndarray, params: np.ndarray) -> np.ndarray:
+        self.t += 1
+        self.fm = self.beta1 * self.fm + (1 - self.beta1) * gradient
+        self.sm = self.beta2 * self.sm + (1 - self.beta2) * gradient ** 2
+        stepsize = self.stepsize * np.sqrt(1 - self.beta2 ** self.t) / (1 - self.beta1 ** self.t)
+        return params - stepsize * self.fm / (np.sqrt(self.sm) + self.eps)
@@ -1,20 +1,71 @@
 import hashlib
 import json
 from time import time
-from typing import List, Any # For type hinting
+from typing import List, Any, Optional, Tuple # For type hinting
 from transactions import Transaction
 
+# --- VERSIONES DE CABECERA ---
+HEADER_VERSION_LEGACY = 1 # JSON de todo el bloque (formato original)
+HEADER_VERSION_MIDSTATE = 2 # Cabecera fija serializada una vez + nonce al final
+
+
+def target_for_difficulty(difficulty: int) -> bytes:
+    '''Digest maximo (exclusivo) equivalente a empezar por `difficulty` ceros hexadecimales'''
+    if difficulty <= 0:
+        return b'\xff' * 33 # Cualquier digest de 32 bytes es menor
+    return (1 << (256 - 4 * difficulty)).to_bytes(32, 'big')
+
+
+class HeaderTemplate:
+    '''
+    Plantilla para la busqueda de nonce. La parte fija del bloque se serializa
+    una sola vez y se guarda el estado intermedio (midstate) de SHA-256, de modo
+    que en cada intento solo se procesan los bytes del nonce (y el sufijo fijo
+    en el formato legacy, donde el nonce queda en medio del JSON).
+    '''
+    def __init__(self, version: int, prefix: bytes, suffix: bytes = b""):
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+        self._midstate = hashlib.sha256(prefix)
+
+    def __reduce__(self):
+        # El midstate de hashlib no se puede serializar, se recalcula al deserializar (procesos)
+        return (HeaderTemplate, (self.version, self.prefix, self.suffix))
+
+    def hash_for_nonce(self, nonce: int) -> str:
+        h = self._midstate.copy()
+        h.update(b"%d" % nonce + self.suffix)
+        return h.hexdigest()
+
+    def search(self, difficulty: int, start: int = 0, stop: Optional[int] = None, step: int = 1) -> Optional[Tuple[int, str]]:
+        '''Busca un nonce en [start, stop) con paso `step`. Devuelve (nonce, hash) o None'''
+        target = target_for_difficulty(difficulty)
+        copy = self._midstate.copy
+        suffix = self.suffix
+        nonce = start
+        while stop is None or nonce < stop:
+            h = copy()
+            h.update(b"%d" % nonce + suffix)
+            if h.digest() < target:
+                return nonce, h.hexdigest()
+            nonce += step
+        return None
+
+
 class Block:
-    def __init__(self, index: int, timestamp: float, transactions: List[Transaction], previous_hash: str, nonce: int = 0):
+    def __init__(self, index: int, timestamp: float, transactions: List[Transaction], previous_hash: str, nonce: int = 0, version: int = HEADER_VERSION_LEGACY):
         self.index = index
         self.timestamp = timestamp
-        self.transactions = transactions 
+        self.transactions = transactions
         self.previous_hash = previous_hash
         self.nonce = nonce
-        self.hash = self.calculate_hash() 
+        self.version = version
+        self.hash = self.calculate_hash()
 
     def calculate_hash(self) -> str:
-        
+        if self.version == HEADER_VERSION_MIDSTATE:
+            return self.header_template().hash_for_nonce(self.nonce)
         block_string = json.dumps({
             "index": self.index,
             "timestamp": self.timestamp,
@@ -24,5 +75,29 @@ class Block:
         }, sort_keys=True).encode()
         return hashlib.sha256(block_string).hexdigest()
 
+    def header_template(self) -> HeaderTemplate:
+        '''Plantilla de cabecera para minar. Produce los mismos hashes que calculate_hash'''
+        if self.version == HEADER_VERSION_MIDSTATE:
+            transactions_string = json.dumps([str(tx) for tx in self.transactions]).encode()
+            header_string = json.dumps({
+                "version": self.version,
+                "index": self.index,
+                "timestamp": self.timestamp,
+                "transactions_hash": hashlib.sha256(transactions_string).hexdigest(),
+                "previous_hash": self.previous_hash
+            }, sort_keys=True).encode()
+            return HeaderTemplate(self.version, header_string)
+
+        # Legacy: con sort_keys el nonce es la segunda clave, se parte el JSON alrededor de su valor
+        block_string = json.dumps({
+            "index": self.index,
+            "timestamp": self.timestamp,
+            "transactions": [str(tx) for tx in self.transactions],
+            "previous_hash": self.previous_hash,
+            "nonce": 0
+        }, sort_keys=True).encode()
+        prefix, suffix = block_string.split(b'"nonce": 0', 1)
+        return HeaderTemplate(self.version, prefix + b'"nonce": ', suffix)
+
     def __str__(self):
         return f"Block #{self.index} [Nonce: {self.nonce}, Hash: {self.hash}, PrevHash: {self.previous_hash}]"
\ No newline at end of file
@@ -2,17 +2,20 @@ import hashlib
 import json
 from time import time
 from typing import List, Any
-from block import Block
+from block import Block, HEADER_VERSION_LEGACY
+from mining_engine import MiningEngine
 
 class Blockchain:
-    def __init__(self, difficulty: int = 4):
+    def __init__(self, difficulty: int = 4, header_version: int = HEADER_VERSION_LEGACY, mining_engine: MiningEngine = None):
         self.chain: List[Block] = []
         self.pending_transactions: List[Any] = []
         self.difficulty = difficulty
+        self.header_version = header_version # Formato de cabecera de los bloques nuevos
+        self.mining_engine = mining_engine # Motor multiproceso opcional para la PoW
         self.create_genesis_block()
 
     def create_genesis_block(self):
-        genesis_block = Block(0, time(), [], "0")
+        genesis_block = Block(0, time(), [], "0", version=self.header_version)
         genesis_block.hash = genesis_block.calculate_hash()
         self.chain.append(genesis_block)
 
@@ -35,7 +38,8 @@ class Blockchain:
             index=len(self.chain),
             timestamp=time(),
             transactions=transactions_to_mine,
-            previous_hash=self.last_block.hash
+            previous_hash=self.last_block.hash,
+            version=self.header_version
         )
 
 
@@ -56,15 +60,15 @@ class Blockchain:
 
     def proof_of_work(self, block: Block) -> int:
        
-        target = '0' * self.difficulty
-        nonce = 0
-        while True:
-            block.nonce = nonce
-            hash_result = block.calculate_hash()
-            if hash_result.startswith(target):
-                print(f"PoW Existosa! Nonce encontrado: {nonce}, Hash: {hash_result}")
-                return nonce
-            nonce += 1
+        # La cabecera fija se serializa una vez, en cada intento solo se hashea el nonce
+        if self.mining_engine is not None:
+            nonce, hash_result = self.mining_engine.mine(block.header_template(), self.difficulty)
+        else:
+            nonce, hash_result = block.header_template().search(self.difficulty)
+        block.nonce = nonce
+        block.hash = hash_result
+        print(f"PoW Existosa! Nonce encontrado: {nonce}, Hash: {hash_result}")
+        return nonce
 
     def is_chain_valid(self) -> bool:
         for i in range(1, len(self.chain)):
@@ -4,6 +4,7 @@ from transactions import Transaction
 from typing import List, Any, Set
 import time
 from node import Node
+from mining_engine import MiningEngine
 import random
 
 # --- CONFIGURACION ---
@@ -12,15 +13,17 @@ INITIAL_DIFFICULTY = 4
 SIMULATION_DURATION_SECONDS = 90
 TRANSACTIONS_INTERVAL_MEAN = 5
 MINING_INTERVAL_MEAN = 15
+MINING_WORKERS = 0 # 0 = PoW en el proceso principal; >0 = procesos del motor de minado
 
 #--- INICIALIZACION ---
 print("INICIANDO SIMULACION")
 nodes :List[Node] = []
+mining_engine = MiningEngine(MINING_WORKERS) if MINING_WORKERS > 0 else None
 
 #Crear nodos
 for i in range (NUM_NODES):
     node_id = f"Nodo-{i}"
-    node = Node(node_id=node_id, difficulty=INITIAL_DIFFICULTY)
+    node = Node(node_id=node_id, difficulty=INITIAL_DIFFICULTY, mining_engine=mining_engine)
     nodes.append(node)
 print(f"\n{len(nodes)} nodos creados.")
 
@@ -78,6 +81,8 @@ except KeyboardInterrupt:
 
 finally:
     print("\n --- Fin de la Simulacion ---")
+    if mining_engine is not None:
+        mining_engine.close()
     print(f"Duracion total: {time.time()-start_time:.2f} segundos")
 
     # Verificar consistencia de las cadenas
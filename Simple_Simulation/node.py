@@ -1,15 +1,16 @@
 from blockchain import Blockchain
 from block import Block
 from transactions import Transaction, Wallet
+from mining_engine import MiningEngine
 from typing import List, Any, Set, Dict # For type hinting
 from time import time
 #import threading
 #import queue
 
 class Node:
-    def __init__(self, node_id:str, difficulty:int=4):
+    def __init__(self, node_id:str, difficulty:int=4, mining_engine: MiningEngine = None):
         self.node_id = node_id
-        self.blockchain = Blockchain(difficulty)
+        self.blockchain = Blockchain(difficulty, mining_engine=mining_engine)
         self.wallet = Wallet()
         self.mempool: Set[Transaction] = set()
         self.peers: List['Node'] = []
@@ -106,7 +107,8 @@ class Node:
             timestamp= time(),
             transactions=transactions_to_mine,
             previous_hash=last_block.hash,
-            nonce=0
+            nonce=0,
+            version=self.blockchain.header_version
         )
 
         # Realizar PoW
@@ -0,0 +1,38 @@
+from async_runtime import run_async_simulation
+from block import HEADER_VERSION_BINARY
+from mining_engine import MiningEngine
+
+# --- CONFIGURACION ---
+NUM_NODES = 5
+INITIAL_DIFFICULTY = 4
+SIMULATION_TIME = 60  # segundos
+MINING_WORKERS = 0 # 0 = minado en los hilos del executor; >0 = procesos del motor de minado compartido
+
+if __name__ == "__main__":
+    mining_engine = MiningEngine(MINING_WORKERS) if MINING_WORKERS > 0 else None
+    print("Iniciando la simulacion asyncio...")
+    try:
+        result = run_async_simulation(num_nodes=NUM_NODES,
+                                      difficulty=INITIAL_DIFFICULTY,
+                                      simulation_time=SIMULATION_TIME,
+                                      header_version=HEADER_VERSION_BINARY,
+                                      mining_engine=mining_engine)
+    finally:
+        if mining_engine is not None:
+            mining_engine.close()
+
+    print("\nFin de la simulacion.")
+    print(f"Duración {result['wall_time']:.2f} segundos.")
+
+    print("\nEstado final de los nodos:")
+    for node in result["nodes"]:
+        print(f"Nodo {node.node_id}: Bloques={len(node.blockchain.chain)}, hash={node.blockchain.last_block.calculate_hash()[:8]}..., mempool= {len(node.mempool)}")
+
+    print(f"Cadena mas laga: {result['max_chain_length']} bloques")
+    print("Hashes finales:")
+    for hash_val, node_ids in result["final_hashes"].items():
+        print(f" - Hash {hash_val[:8]}...: {len(node_ids)} nodos ({','. join(node_ids)})")
+    if result["consensus"]:
+        print("CONSENSO")
+    else:
+        print("INCONSISTENCIA")
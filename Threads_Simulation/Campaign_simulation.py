@@ -0,0 +1,17 @@
+from campaign import run_campaign
+
+# --- CONFIGURACION DE LA CAMPANA ---
+# Cada combinacion se ejecuta con el simulador de eventos discretos una vez por semilla
+GRID = {
+    "num_nodes": [3, 5, 8],
+    "difficulty": [3, 4],
+    "simulation_time": [300],
+}
+SEEDS = range(5)
+RESULTS_FILE = "campaign_results.csv"
+WORKERS = None # Procesos del pool (None = numero de nucleos)
+
+if __name__ == "__main__": # Necesario para el pool de procesos con spawn (Windows)
+    rows = run_campaign(GRID, SEEDS, results_file=RESULTS_FILE, workers=WORKERS)
+    consensus_runs = sum(1 for row in rows if row["consensus"])
+    print(f"\nFin de la campana: {len(rows)} ejecuciones, {consensus_runs} con consenso. Resultados en {RESULTS_FILE}")
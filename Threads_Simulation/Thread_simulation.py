@@ -1,26 +1,43 @@
 from blockchain import Blockchain
-from block import Block
-from transactions import Transaction
+from block import Block, HEADER_VERSION_LEGACY, HEADER_VERSION_MIDSTATE, HEADER_VERSION_MERKLE, HEADER_VERSION_BINARY
+from transactions import Transaction, Wallet
 from typing import List, Any, Set # For type hinting
 import time
 from node import Node
+from topology import connect_nodes
 import copy
 import threading
+from mining_engine import MiningEngine
+from verification_engine import VerificationEngine
 
 
 # --- CONFIGURACION ---
 NUM_NODES = 5
 INITIAL_DIFFICULTY = 5
+HEADER_VERSION = HEADER_VERSION_LEGACY # HEADER_VERSION_MIDSTATE: nonce al final de la cabecera, minado mas rapido. HEADER_VERSION_MERKLE: ademas raiz Merkle, el candidato admite Tx nuevas. HEADER_VERSION_BINARY: cabecera Merkle binaria de 85 bytes
 SIMULATION_TIME = 500  # segundos
+TOPOLOGY = "full" # "full", "random_regular", "small_world" o "scale_free"
+DEGREE = 8 # Peers por nodo en las topologias dispersas
+GOSSIP_FANOUT = None # Peers a los que se reenvia cada mensaje (None = todos)
+INVENTORY_RELAY = False # Anunciar hashes (inv/getdata) en lugar de reenviar Tx y bloques completos
+COMPACT_BLOCKS = False # Enviar bloques como cabecera + short IDs y reconstruirlos con el mempool
+MINING_WORKERS = 0 # 0 = minado en hilos; >0 = procesos del motor de minado compartido por los nodos
+VERIFICATION_WORKERS = 0 # 0 = firmas de los bloques en el hilo del nodo; >0 = procesos del motor de verificacion compartido
+INITIAL_BALANCE = 100.0 # Monedas de cada nodo en el bloque genesis
 
 # --Inicializacion
 print("Iniciando la simulacion...")
 nodes : List[Node] = [] 
 threads = []
 stop_event = threading.Event() # Evento para detener los hilos
+# Crear el motor antes de arrancar los hilos de los nodos
+mining_engine = MiningEngine(MINING_WORKERS) if MINING_WORKERS > 0 else None
+verification_engine = VerificationEngine(VERIFICATION_WORKERS) if VERIFICATION_WORKERS > 0 else None
 
 # --Crear instancia de Bockchain
-initial_blockchain_template = Blockchain(difficulty=INITIAL_DIFFICULTY)
+wallets = [Wallet() for _ in range(NUM_NODES)] # Antes que el genesis, que reparte las monedas iniciales
+initial_blockchain_template = Blockchain(difficulty=INITIAL_DIFFICULTY, header_version=HEADER_VERSION,
+                                         genesis_allocations={wallet.get_address(): INITIAL_BALANCE for wallet in wallets})
 
 # 1. Crear nodos sin inicializar
 for i in range(NUM_NODES):
@@ -30,16 +47,19 @@ for i in range(NUM_NODES):
         node_id=node_id, 
         blockchain_instance=node_block_chain_copy, 
         node_list= nodes,
-        stop_event=stop_event)
+        stop_event=stop_event,
+        wallet=wallets[i],
+        mining_engine=mining_engine,
+        verification_engine=verification_engine,
+        gossip_fanout=GOSSIP_FANOUT,
+        inventory_relay=INVENTORY_RELAY,
+        compact_blocks=COMPACT_BLOCKS)
     nodes.append(node)
 
 # 2. Conectar los nodos entre si
 print("Conectando nodos...")
 if NUM_NODES > 1:
-    for i in range(NUM_NODES):
-        for j in range(i +1, NUM_NODES):
-            nodes[i].add_peer(nodes[j])
-            nodes[j].add_peer(nodes[i])
+    connect_nodes(nodes, topology=TOPOLOGY, degree=DEGREE)
 else:
     print("Solo hay un nodo")
 
@@ -63,6 +83,10 @@ finally:
         thread.join(timeout=5) # Espera a que los hilos terminen
         if thread.is_alive():
             print(f"{thread.node_id} no ha terminado correctamente.")
+    if mining_engine is not None:
+        mining_engine.close()
+    if verification_engine is not None:
+        verification_engine.close()
     print("\nFin de la simulacion.")
     print(f"Duración {time.time() - start_time:-2f} segundos.")
 
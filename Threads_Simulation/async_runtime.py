@@ -0,0 +1,152 @@
+import asyncio
+import random
+import threading
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
+from blockchain import Blockchain, INITIAL_BALANCE
+from block import HEADER_VERSION_BINARY
+from transactions import Wallet
+from node import Node
+from topology import connect_nodes
+from mining_engine import MiningEngine
+from event_runtime import summarize_nodes
+
+
+class AsyncInbox:
+    '''
+    Sustituye a la cola de entrada del nodo por una asyncio.Queue. put() se puede llamar
+    desde el bucle de eventos o desde los hilos de minado del executor.
+    '''
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._loop_thread = threading.get_ident() # Se crea dentro del bucle
+
+    def put(self, message: tuple, block: bool = True, timeout: float = None):
+        if threading.get_ident() == self._loop_thread:
+            self.queue.put_nowait(message)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+
+class AsyncRuntime:
+    '''
+    Ejecuta cada nodo como corutinas en un unico bucle asyncio en lugar de un hilo con sondeo.
+    Los mensajes se procesan en cuanto llegan a la cola y las acciones aleatorias son
+    temporizadores. El minado se delega a un executor para no bloquear el bucle.
+    '''
+    def __init__(self, mining_workers: int = None, action_interval: Tuple[float, float] = (0.1, 0.5)):
+        self.executor = ThreadPoolExecutor(max_workers=mining_workers, thread_name_prefix="miner")
+        self.action_interval = action_interval # Pausa entre acciones aleatorias (como en Node.run)
+        self.mining_futures: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.loop: asyncio.AbstractEventLoop = None
+
+    def attach(self, node: Node):
+        '''Conectar el nodo al runtime. Llamar dentro del bucle y antes de add_peer'''
+        self.loop = asyncio.get_running_loop()
+        node.runtime = self
+        node.incoming_queue = AsyncInbox(self.loop)
+
+    def start(self, node: Node):
+        self._tasks.append(asyncio.create_task(self._receive(node), name=f"{node.node_id}-rx"))
+        self._tasks.append(asyncio.create_task(self._actions(node), name=f"{node.node_id}-actions"))
+
+    async def _receive(self, node: Node):
+        inbox: asyncio.Queue = node.incoming_queue.queue
+        while not node.stop_event.is_set():
+            message_type, data = await inbox.get()
+            node._process_message(message_type, data)
+            if inbox.empty():
+                node._verify_pending_transactions() # Fin de la rafaga: sus firmas en un solo lote
+
+    async def _actions(self, node: Node):
+        while not node.stop_event.is_set():
+            await asyncio.sleep(random.uniform(*self.action_interval))
+            node._flush_announcements()
+            node._random_action()
+
+    def start_mining(self, node: Node, mining_args: tuple):
+        # _mine_worker comprueba is_minig periodicamente, _stop_mining lo cancela igual que con hilos
+        self.mining_futures[node.node_id] = self.loop.run_in_executor(self.executor, node._mine_worker, *mining_args)
+
+    async def stop(self, stop_event: threading.Event, timeout: float = 5.0):
+        '''Detiene corutinas y espera a que los mineros vean el evento de parada'''
+        stop_event.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        pending = [future for future in self.mining_futures.values() if not future.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_async_simulation(num_nodes: int,
+                                difficulty: int,
+                                simulation_time: float,
+                                header_version: int,
+                                mining_workers: int,
+                                mining_engine: MiningEngine,
+                                topology: str,
+                                degree: int,
+                                gossip_fanout: int,
+                                inventory_relay: bool,
+                                compact_blocks: bool) -> List[Node]:
+    runtime = AsyncRuntime(mining_workers=mining_workers)
+    stop_event = threading.Event()
+
+    wallets = [Wallet() for _ in range(num_nodes)]
+    initial_blockchain_template = Blockchain(difficulty=difficulty, header_version=header_version,
+                                             genesis_allocations={wallet.get_address(): INITIAL_BALANCE for wallet in wallets})
+    nodes: List[Node] = []
+    for i in range(num_nodes):
+        node = Node(node_id=f"Node-{i}",
+                    blockchain_instance=copy.deepcopy(initial_blockchain_template),
+                    node_list=nodes,
+                    stop_event=stop_event,
+                    wallet=wallets[i],
+                    mining_engine=mining_engine,
+                    gossip_fanout=gossip_fanout,
+                    inventory_relay=inventory_relay,
+                    compact_blocks=compact_blocks)
+        runtime.attach(node)
+        nodes.append(node)
+
+    connect_nodes(nodes, topology=topology, degree=degree)
+
+    for node in nodes:
+        runtime.start(node)
+    try:
+        await asyncio.sleep(simulation_time)
+    finally:
+        await runtime.stop(stop_event)
+    return nodes
+
+
+def run_async_simulation(num_nodes: int = 5,
+                         difficulty: int = 4,
+                         simulation_time: float = 60.0,
+                         header_version: int = HEADER_VERSION_BINARY,
+                         mining_workers: int = None,
+                         mining_engine: MiningEngine = None,
+                         topology: str = "full",
+                         degree: int = 8,
+                         gossip_fanout: int = None,
+                         inventory_relay: bool = False,
+                         compact_blocks: bool = False) -> Dict[str, Any]:
+    '''
+    Simulacion en tiempo real con asyncio. mining_workers limita los hilos del executor
+    (None = valor por defecto de ThreadPoolExecutor); con mining_engine los hilos solo
+    esperan al motor multiproceso y el minado no compite por el GIL.
+    '''
+    start_time = time.time()
+    nodes = asyncio.run(_run_async_simulation(num_nodes, difficulty, simulation_time,
+                                              header_version, mining_workers, mining_engine,
+                                              topology, degree, gossip_fanout, inventory_relay, compact_blocks))
+    summary = summarize_nodes(nodes)
+    summary["wall_time"] = time.time() - start_time
+    summary["nodes"] = nodes
+    return summary
@@ -0,0 +1,60 @@
+from transactions import Transaction, Wallet
+from ecdsa import VerifyingKey, SECP256k1
+import crypto_backend
+import binascii
+import time
+
+# --- CONFIGURACION ---
+OPERATIONS = 300 # Firmas y verificaciones por medida
+NUM_SENDERS = 20 # Carteras distintas: cada direccion se repite OPERATIONS / NUM_SENDERS veces
+
+
+def make_transactions(senders, recipient):
+    return [Transaction(senders[i % len(senders)].get_address(), recipient.get_address(), 1.0, inputs=[], timestamp=float(i))
+            for i in range(OPERATIONS)]
+
+
+def signs_per_second(transactions, senders) -> float:
+    start = time.perf_counter()
+    for i, tx in enumerate(transactions):
+        tx.sign_transaction(senders[i % len(senders)])
+    return len(transactions) / (time.perf_counter() - start)
+
+
+def original_verifications_per_second(transactions) -> float:
+    '''Verificacion original de is_valid: ecdsa en Python y la clave del emisor parseada cada vez'''
+    start = time.perf_counter()
+    for tx in transactions:
+        verifying_key = VerifyingKey.from_string(binascii.unhexlify(tx.sender), curve=SECP256k1)
+        assert verifying_key.verify(binascii.unhexlify(tx.signature), tx.calculate_hash().encode())
+    return len(transactions) / (time.perf_counter() - start)
+
+
+def verifications_per_second(transactions) -> float:
+    '''is_valid() con el backend activo; cada clave publica se parsea una vez (cache por direccion)'''
+    crypto_backend.get_backend().verifying_key.cache_clear()
+    start = time.perf_counter()
+    assert all(tx.is_valid() for tx in transactions)
+    return len(transactions) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    print(f"Backends disponibles: {crypto_backend.available_backends()}")
+    print(f"{'Backend':>10} | {'Firmas /s':>10} | {'Verif. /s':>10}")
+    signed = {}
+    for name in crypto_backend.available_backends():
+        crypto_backend.set_backend(name)
+        senders = [Wallet(seed=i) for i in range(NUM_SENDERS)]
+        recipient = Wallet(seed="recipient")
+        transactions = make_transactions(senders, recipient)
+        signing = signs_per_second(transactions, senders)
+        verifying = verifications_per_second(transactions)
+        signed[name] = transactions
+        print(f"{name:>10} | {signing:>10,.0f} | {verifying:>10,.0f}")
+    print(f"{'original':>10} | {'':>10} | {original_verifications_per_second(signed['ecdsa']):>10,.0f}")
+
+    # Las firmas de un backend se verifican con cualquier otro (mismas direcciones y formato)
+    for name in crypto_backend.available_backends():
+        crypto_backend.set_backend(name)
+        assert all(tx.is_valid() for transactions in signed.values() for tx in transactions)
+    print("Firmas compatibles entre backends")
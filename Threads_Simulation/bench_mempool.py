@@ -0,0 +1,62 @@
+from transactions import Transaction
+from mempool import Mempool
+import hashlib
+import time
+
+# --- CONFIGURACION ---
+PENDING_TXS = 100000 # Tx en el mempool antes de conectar el bloque
+BLOCK_TXS = [100, 1000] # Tx confirmadas por el bloque
+SENDER = "a" * 128
+RECIPIENT = "b" * 128
+
+
+def make_transactions(count: int):
+    # Sin firmar: solo se mide la limpieza del mempool. El txid se calcula aqui, fuera de las medidas
+    transactions = [Transaction(SENDER, RECIPIENT, 1.0, inputs=[], timestamp=float(i)) for i in range(count)]
+    for tx in transactions:
+        tx.calculate_hash()
+    return transactions
+
+
+def quantum_rebuild_seconds(pending, block) -> float:
+    '''Limpieza original de Quantum_Blockchain.add_block: recorre todas las pendientes, O(mempool)'''
+    start = time.perf_counter()
+    hashes_in_block = {tx.calculate_hash() for tx in block}
+    remaining = [tx for tx in pending if tx.calculate_hash() not in hashes_in_block]
+    elapsed = time.perf_counter() - start
+    assert len(remaining) == len(pending) - len(block)
+    return elapsed
+
+
+def rehash_rebuild_seconds(pending, block) -> float:
+    '''El mismo recorrido rehasheando cada Tx, como cuando el txid no se guardaba en la Tx'''
+    start = time.perf_counter()
+    hashes_in_block = {hashlib.sha256(str(tx.to_dict()).encode()).hexdigest() for tx in block}
+    remaining = [tx for tx in pending if hashlib.sha256(str(tx.to_dict()).encode()).hexdigest() not in hashes_in_block]
+    elapsed = time.perf_counter() - start
+    assert len(remaining) == len(pending) - len(block)
+    return elapsed
+
+
+def mempool_seconds(pending, block) -> float:
+    '''Mempool indexado por txid: O(Tx del bloque)'''
+    mempool = Mempool(max_txs=len(pending), max_bytes=10**12, max_age=None)
+    for tx in pending:
+        mempool.add(tx)
+    start = time.perf_counter()
+    mempool.difference_update(block)
+    elapsed = time.perf_counter() - start
+    assert len(mempool) == len(pending) - len(block)
+    return elapsed
+
+
+if __name__ == "__main__":
+    pending = make_transactions(PENDING_TXS)
+    print(f"Mempool con {PENDING_TXS:,} Tx pendientes")
+    print(f"{'Bloque':>7} | {'recorrido (ms)':>14} | {'rehash (ms)':>11} | {'txid (ms)':>10} | {'x recorrido':>11}")
+    for size in BLOCK_TXS:
+        block = pending[::PENDING_TXS // size][:size]
+        rebuild = quantum_rebuild_seconds(pending, block)
+        rehashed = rehash_rebuild_seconds(pending, block)
+        indexed = mempool_seconds(pending, block)
+        print(f"{size:>7} | {rebuild * 1000:>14.1f} | {rehashed * 1000:>11.1f} | {indexed * 1000:>10.2f} | {rebuild / indexed:>11.0f}")
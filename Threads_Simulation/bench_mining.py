@@ -0,0 +1,71 @@
+from block import Block, HEADER_VERSION_LEGACY, HEADER_VERSION_MIDSTATE
+from transactions import Transaction, Wallet
+from mining_engine import MiningEngine
+import multiprocessing
+import time
+
+# --- CONFIGURACION ---
+TX_COUNTS = [10, 100, 500, 1000] # Numero de transacciones por bloque
+NONCES_PER_RUN = 20000 # Nonces probados en cada medida
+DIFFICULTY = 64 # Dificultad imposible: se recorren todos los nonces
+
+sender = Wallet()
+recipient = Wallet()
+
+
+def make_transactions(count: int):
+    transactions = []
+    for _ in range(count):
+        tx = Transaction(sender.get_address(), recipient.get_address(), 1.0, inputs=[])
+        tx.sign_transaction(sender)
+        transactions.append(tx)
+    return transactions
+
+
+def legacy_hashes_per_second(block: Block) -> float:
+    '''Bucle original: json.dumps de todo el bloque en cada nonce'''
+    start = time.perf_counter()
+    for nonce in range(NONCES_PER_RUN):
+        block.nonce = nonce
+        block.calculate_hash()
+    return NONCES_PER_RUN / (time.perf_counter() - start)
+
+
+def template_hashes_per_second(block: Block) -> float:
+    template = block.header_template()
+    start = time.perf_counter()
+    template.search(DIFFICULTY, start=0, stop=NONCES_PER_RUN)
+    return NONCES_PER_RUN / (time.perf_counter() - start)
+
+
+print(f"{'Txs':>6} | {'legacy H/s':>12} | {'v1 plantilla H/s':>17} | {'v2 midstate H/s':>16} | {'x v1':>6} | {'x v2':>6}")
+for tx_count in TX_COUNTS:
+    transactions = make_transactions(tx_count)
+    legacy_block = Block(1, time.time(), transactions, "0" * 64, "bench", version=HEADER_VERSION_LEGACY)
+    midstate_block = Block(1, time.time(), transactions, "0" * 64, "bench", version=HEADER_VERSION_MIDSTATE)
+
+    # La plantilla debe reproducir exactamente los hashes de calculate_hash
+    for block in (legacy_block, midstate_block):
+        template = block.header_template()
+        for nonce in (0, 1, 12345):
+            block.nonce = nonce
+            assert template.hash_for_nonce(nonce) == block.calculate_hash(), "Hash de plantilla distinto"
+
+    legacy = legacy_hashes_per_second(legacy_block)
+    v1 = template_hashes_per_second(legacy_block)
+    v2 = template_hashes_per_second(midstate_block)
+    print(f"{tx_count:>6} | {legacy:>12,.0f} | {v1:>17,.0f} | {v2:>16,.0f} | {v1 / legacy:>6.1f} | {v2 / legacy:>6.1f}")
+
+# --- MOTOR MULTIPROCESO ---
+# Nonces por segundo del motor segun el numero de procesos (cabecera v2, dificultad imposible)
+ENGINE_RUN_SECONDS = 3
+midstate_template = Block(1, time.time(), make_transactions(100), "0" * 64, "bench", version=HEADER_VERSION_MIDSTATE).header_template()
+print(f"\n{'Procesos':>8} | {'H/s motor':>12}")
+for workers in sorted({1, 2, multiprocessing.cpu_count()}):
+    engine = MiningEngine(workers)
+    start = time.perf_counter()
+    engine.mine(midstate_template, DIFFICULTY, should_stop=lambda: time.perf_counter() - start > ENGINE_RUN_SECONDS)
+    elapsed = time.perf_counter() - start
+    hashes = engine.completed_ranges * engine.chunk_size # Solo cuentan los rangos completos
+    engine.close()
+    print(f"{workers:>8} | {hashes / elapsed:>12,.0f}")
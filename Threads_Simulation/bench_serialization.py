@@ -0,0 +1,74 @@
+from transactions import Transaction, Wallet
+from block import Block, HEADER_VERSION_BINARY
+from serialization import encode_block, decode_block, encode_transaction, decode_transaction
+import pickle
+import json
+import time
+
+# --- CONFIGURACION ---
+BLOCK_TXS = 1000 # Tx del bloque de prueba
+NUM_SENDERS = 5 # Carteras distintas, como los nodos de una simulacion
+REPEATS = 20 # Codificaciones por medida
+
+
+def make_block() -> Block:
+    wallets = [Wallet(seed=i) for i in range(NUM_SENDERS)]
+    transactions = []
+    for i in range(BLOCK_TXS):
+        sender, recipient = wallets[i % NUM_SENDERS], wallets[(i + 1) % NUM_SENDERS]
+        tx = Transaction(sender.get_address(), recipient.get_address(), round(0.1 + i % 90 / 100, 2),
+                         inputs=[(f"{i:064x}", i % 2)], timestamp=1700000000.0 + i, fee=0.0001)
+        tx.sign_transaction(sender)
+        transactions.append(tx)
+    return Block(1, 1700000000.0, transactions, "0" * 64, "Node-0", nonce=123456, version=HEADER_VERSION_BINARY)
+
+
+def json_encode(block: Block) -> bytes:
+    '''Formato de referencia: el JSON con hex que se usa para hashes y tamanos'''
+    header = {key: value for key, value in block.__getstate__().items() if key != "transactions"}
+    return json.dumps({**header, "transactions": [tx.to_dict() for tx in block.transactions]}, sort_keys=True).encode()
+
+
+def json_decode(data: bytes) -> Block:
+    fields = json.loads(data)
+    block = Block.__new__(Block)
+    block.__dict__.update(fields)
+    block.transactions = []
+    for tx_data in fields["transactions"]:
+        tx = Transaction(tx_data["sender"], tx_data["recipient"], tx_data["amount"], tx_data["inputs"],
+                         tx_data["timestamp"], tx_data["fee"])
+        tx.__setstate__({"signature": tx_data["signature"]})
+        block.transactions.append(tx)
+    return block
+
+
+def per_second(function, argument) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        function(argument)
+    return REPEATS / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    block = make_block()
+    formats = {
+        "json": (json_encode, json_decode),
+        "pickle": (pickle.dumps, pickle.loads), # Lo que envian las colas de multiprocessing
+        "binario": (encode_block, decode_block),
+    }
+    print(f"Bloque de {BLOCK_TXS} Txs de {NUM_SENDERS} carteras")
+    print(f"{'Formato':>8} | {'Bytes':>9} | {'x json':>6} | {'Cod. /s':>8} | {'Dec. /s':>8}")
+    json_size = len(json_encode(block))
+    for name, (encode, decode) in formats.items():
+        data = encode(block)
+        decoded = decode(data)
+        assert [tx.calculate_hash() for tx in decoded.transactions] == [tx.calculate_hash() for tx in block.transactions]
+        print(f"{name:>8} | {len(data):>9,} | {json_size / len(data):>6.1f} | {per_second(encode, block):>8,.0f} | {per_second(decode, data):>8,.0f}")
+
+    # Ida y vuelta exacta: mismos hashes y firmas validas sin recalcular nada
+    decoded = decode_block(encode_block(block))
+    assert decoded.calculate_hash() == block.hash and encode_block(decoded) == encode_block(block)
+    assert all(tx.is_valid() for tx in decoded.transactions)
+    tx = block.transactions[0]
+    print(f"\nTx suelta: {len(json.dumps(tx.to_dict()).encode())} bytes JSON, {len(encode_transaction(tx))} binaria")
+    assert decode_transaction(encode_transaction(tx)).calculate_hash() == tx.calculate_hash()
@@ -0,0 +1,59 @@
+from transactions import Transaction, Wallet
+from verification_engine import VerificationEngine
+import multiprocessing
+import time
+
+# --- CONFIGURACION ---
+BLOCK_SIZES = [100, 1000] # Transacciones por bloque
+NUM_SENDERS = 20 # Carteras distintas, como en un bloque real
+
+senders = [Wallet(seed=i) for i in range(NUM_SENDERS)]
+recipient = Wallet(seed="recipient")
+
+
+def make_transactions(count: int):
+    transactions = []
+    for i in range(count):
+        sender = senders[i % NUM_SENDERS]
+        tx = Transaction(sender.get_address(), recipient.get_address(), 1.0, inputs=[], timestamp=float(i))
+        tx.sign_transaction(sender)
+        transactions.append(tx)
+    return transactions
+
+
+def serial_verifications_per_second(transactions) -> float:
+    '''Bucle original de _handle_block: is_valid() una a una en el hilo del nodo'''
+    start = time.perf_counter()
+    assert all(tx.is_valid() for tx in transactions)
+    return len(transactions) / (time.perf_counter() - start)
+
+
+def engine_verifications_per_second(engine: VerificationEngine, transactions) -> float:
+    start = time.perf_counter()
+    assert engine.verify_batch(transactions) # Sin cache de firmas: se verifican todas
+    return len(transactions) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    worker_counts = sorted({1, 2, 4, multiprocessing.cpu_count()})
+    blocks = {size: make_transactions(size) for size in BLOCK_SIZES}
+    serial = {size: serial_verifications_per_second(transactions) for size, transactions in blocks.items()}
+
+    print(f"{'Procesos':>8} | " + " | ".join(f"{f'{size} Txs /s':>14} | {'x serie':>7}" for size in BLOCK_SIZES))
+    print(f"{'serie':>8} | " + " | ".join(f"{serial[size]:>14,.0f} | {1.0:>7.1f}" for size in BLOCK_SIZES))
+    for workers in worker_counts:
+        engine = VerificationEngine(workers)
+        engine.verify_batch(blocks[BLOCK_SIZES[0]][:engine.min_batch]) # Arrancar los procesos fuera de la medida
+        rates = {size: engine_verifications_per_second(engine, transactions) for size, transactions in blocks.items()}
+        engine.close()
+        print(f"{workers:>8} | " + " | ".join(f"{rates[size]:>14,.0f} | {rates[size] / serial[size]:>7.1f}" for size in BLOCK_SIZES))
+
+    # Parada en la primera firma no valida: una Tx con la firma de otra al principio del bloque
+    transactions = make_transactions(BLOCK_SIZES[-1])
+    forged = Transaction(senders[0].get_address(), recipient.get_address(), 1000.0, inputs=[], timestamp=-1.0)
+    forged.__setstate__({"signature": transactions[1].signature})
+    engine = VerificationEngine(multiprocessing.cpu_count())
+    start = time.perf_counter()
+    assert not engine.verify_batch([forged] + transactions)
+    print(f"\nBloque de {len(transactions) + 1} Txs con firma falsa rechazado en {time.perf_counter() - start:.3f} s")
+    engine.close()
@@ -1,21 +1,137 @@
 import hashlib
 import json
+import struct
 from time import time
-from typing import List, Any # For type hinting
+from typing import List, Any, Optional, Tuple # For type hinting
 from transactions import Transaction
+from merkle import MerkleTree, MerkleProof, verify_merkle_proof
+
+# --- VERSIONES DE CABECERA ---
+HEADER_VERSION_LEGACY = 1 # JSON de todo el bloque (formato original)
+HEADER_VERSION_MIDSTATE = 2 # Cabecera fija serializada una vez + nonce al final
+HEADER_VERSION_MERKLE = 3 # Como MIDSTATE, pero la cabecera lleva la raiz Merkle de los txids
+HEADER_VERSION_BINARY = 4 # Raiz Merkle en una cabecera binaria de tamano fijo, se hashean sus bytes
+MERKLE_HEADER_VERSIONS = (HEADER_VERSION_MERKLE, HEADER_VERSION_BINARY)
+
+BINARY_HEADER = struct.Struct("<BId32s32s") # version, index, timestamp, previous_hash, merkle_root (77 bytes)
+BINARY_NONCE = struct.Struct("<Q") # 8 bytes al final de la cabecera binaria
+
+
+def target_for_difficulty(difficulty: int) -> bytes:
+    '''Digest maximo (exclusivo) equivalente a empezar por `difficulty` ceros hexadecimales'''
+    if difficulty <= 0:
+        return b'\xff' * 33 # Cualquier digest de 32 bytes es menor
+    return (1 << (256 - 4 * difficulty)).to_bytes(32, 'big')
+
+
+class HeaderTemplate:
+    '''
+    Plantilla para la busqueda de nonce. La parte fija del bloque se serializa
+    una sola vez y se guarda el estado intermedio (midstate) de SHA-256, de modo
+    que en cada intento solo se procesan los bytes del nonce (y el sufijo fijo
+    en el formato legacy, donde el nonce queda en medio del JSON). En la cabecera
+    binaria el nonce son 8 bytes fijos en lugar de su texto decimal.
+    '''
+    def __init__(self, version: int, prefix: bytes, suffix: bytes = b""):
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+        self._midstate = hashlib.sha256(prefix)
+
+    def __reduce__(self):
+        # El midstate de hashlib no se puede serializar, se recalcula al deserializar (procesos)
+        return (HeaderTemplate, (self.version, self.prefix, self.suffix))
+
+    def _nonce_encoder(self):
+        return BINARY_NONCE.pack if self.version == HEADER_VERSION_BINARY else b"%d".__mod__
+
+    def hash_for_nonce(self, nonce: int) -> str:
+        h = self._midstate.copy()
+        h.update(self._nonce_encoder()(nonce) + self.suffix)
+        return h.hexdigest()
+
+    def search(self, difficulty: int, start: int = 0, stop: Optional[int] = None, step: int = 1) -> Optional[Tuple[int, str]]:
+        '''Busca un nonce en [start, stop) con paso `step`. Devuelve (nonce, hash) o None'''
+        target = target_for_difficulty(difficulty)
+        copy = self._midstate.copy
+        encode_nonce = self._nonce_encoder()
+        suffix = self.suffix
+        nonce = start
+        while stop is None or nonce < stop:
+            h = copy()
+            h.update(encode_nonce(nonce) + suffix)
+            if h.digest() < target:
+                return nonce, h.hexdigest()
+            nonce += step
+        return None
 
 
 class Block:
-    def __init__(self, index: int, timestamp: float, transactions: List[Transaction], previous_hash: str, mined_by : str, nonce: int = 0):
+    def __init__(self, index: int, timestamp: float, transactions: List[Transaction], previous_hash: str, mined_by : str, nonce: int = 0, version: int = HEADER_VERSION_LEGACY):
         self.index = index
         self.timestamp = timestamp
-        self.transactions = transactions 
+        self.transactions = transactions
         self.previous_hash = previous_hash
         self.nonce = nonce
         self.mined_by = mined_by
-        self.hash = self.calculate_hash() 
+        self.version = version
+        self.merkle_root = self.calculate_merkle_root() if version in MERKLE_HEADER_VERSIONS else None
+        self.hash = self.calculate_hash()
+
+    def __getstate__(self):
+        # El arbol Merkle es una cache, no viaja entre procesos ni se copia
+        state = dict(self.__dict__)
+        state.pop("_merkle_tree", None)
+        return state
+
+    def merkle_tree(self) -> MerkleTree:
+        '''
+        Arbol Merkle de los txids. Se guarda en el bloque: si desde la ultima vez solo se han
+        anadido Tx al final (plantilla del minero) se extiende, si no se reconstruye
+        '''
+        txids = [tx.calculate_hash() for tx in self.transactions]
+        tree = getattr(self, "_merkle_tree", None)
+        if tree is None or len(tree) > len(txids) or tree.leaves != txids[:len(tree)]:
+            tree = MerkleTree()
+            self._merkle_tree = tree
+        tree.extend(txids[len(tree):])
+        return tree
+
+    def calculate_merkle_root(self) -> str:
+        return self.merkle_tree().root
+
+    def append_transactions(self, transactions: List[Transaction]):
+        '''Anade Tx a un bloque candidato. La raiz Merkle se actualiza en O(k log n); hay que volver a minar'''
+        self.transactions = self.transactions + list(transactions)
+        if self.version in MERKLE_HEADER_VERSIONS:
+            self.merkle_root = self.calculate_merkle_root()
+
+    def merkle_proof(self, txid: str) -> MerkleProof:
+        '''Prueba de inclusion de la Tx `txid` frente a merkle_root'''
+        tree = self.merkle_tree()
+        try:
+            return tree.proof(tree.leaves.index(txid))
+        except ValueError:
+            raise ValueError(f"Tx {txid[:8]} no esta en el bloque {self.index}")
+
+    def verify_inclusion(self, txid: str, proof: MerkleProof) -> bool:
+        '''Verificacion ligera: solo la cabecera (merkle_root) y la prueba, sin las Tx del bloque'''
+        return self.version in MERKLE_HEADER_VERSIONS and verify_merkle_proof(txid, proof, self.merkle_root)
+
+    def header_hash(self) -> str:
+        '''
+        Hash a partir de la cabecera guardada. Con raiz Merkle no usa las Tx, vale para
+        comprobar la PoW de una cabecera suelta; calculate_hash recalcula ademas la raiz
+        '''
+        if self.version in MERKLE_HEADER_VERSIONS:
+            return self._merkle_header_template(self.merkle_root).hash_for_nonce(self.nonce)
+        return self.calculate_hash()
 
     def calculate_hash(self) -> str:
+        if self.version in MERKLE_HEADER_VERSIONS:
+            return self._merkle_header_template(self.calculate_merkle_root()).hash_for_nonce(self.nonce)
+        if self.version == HEADER_VERSION_MIDSTATE:
+            return self.header_template().hash_for_nonce(self.nonce)
         block_string = json.dumps({
             "index": self.index,
             "timestamp": self.timestamp,
@@ -25,6 +141,76 @@ class Block:
         }, sort_keys=True).encode()
         return hashlib.sha256(block_string).hexdigest()
 
+    def _merkle_header_template(self, merkle_root: str) -> HeaderTemplate:
+        if self.version == HEADER_VERSION_BINARY:
+            header_bytes = BINARY_HEADER.pack(self.version, self.index, self.timestamp,
+                                              bytes.fromhex(self.previous_hash), bytes.fromhex(merkle_root))
+            return HeaderTemplate(self.version, header_bytes)
+        header_string = json.dumps({
+            "version": self.version,
+            "index": self.index,
+            "timestamp": self.timestamp,
+            "merkle_root": merkle_root,
+            "previous_hash": self.previous_hash
+        }, sort_keys=True).encode()
+        return HeaderTemplate(self.version, header_string)
+
+    def header_template(self) -> HeaderTemplate:
+        '''Plantilla de cabecera para minar. Produce los mismos hashes que calculate_hash'''
+        if self.version in MERKLE_HEADER_VERSIONS:
+            self.merkle_root = self.calculate_merkle_root()
+            return self._merkle_header_template(self.merkle_root)
+        if self.version == HEADER_VERSION_MIDSTATE:
+            transactions_string = json.dumps([str(tx) for tx in self.transactions]).encode()
+            header_string = json.dumps({
+                "version": self.version,
+                "index": self.index,
+                "timestamp": self.timestamp,
+                "transactions_hash": hashlib.sha256(transactions_string).hexdigest(),
+                "previous_hash": self.previous_hash
+            }, sort_keys=True).encode()
+            return HeaderTemplate(self.version, header_string)
+
+        # Legacy: con sort_keys el nonce es la segunda clave, se parte el JSON alrededor de su valor
+        block_string = json.dumps({
+            "index": self.index,
+            "timestamp": self.timestamp,
+            "transactions": [str(tx) for tx in self.transactions],
+            "previous_hash": self.previous_hash,
+            "nonce": 0
+        }, sort_keys=True).encode()
+        prefix, suffix = block_string.split(b'"nonce": 0', 1)
+        return HeaderTemplate(self.version, prefix + b'"nonce": ', suffix)
+
     def __str__(self):
         # Imprimir por pantalla el bloque
-        return f"Block #{self.index} [Nonce: {self.nonce}, Hash: {self.hash}, PrevHash: {self.previous_hash}]"
\ No newline at end of file
+        return f"Block #{self.index} [Nonce: {self.nonce}, Hash: {self.hash}, PrevHash: {self.previous_hash}]"
+
+
+# --- COMPACT BLOCKS ---
+SHORT_ID_LENGTH = 12 # Caracteres hex del hash de la Tx que viajan en el bloque compacto (6 bytes)
+
+
+def short_tx_id(transaction: Transaction) -> str:
+    return transaction.calculate_hash()[:SHORT_ID_LENGTH]
+
+
+class CompactBlock:
+    '''
+    Bloque sin sus transacciones: cabecera y short IDs. El receptor lo reconstruye con
+    las Tx de su mempool y solo pide al emisor las que le faltan.
+    '''
+    def __init__(self, block: Block):
+        self.hash = block.hash
+        self.header = {key: value for key, value in block.__getstate__().items() if key != "transactions"}
+        self.short_ids = [short_tx_id(tx) for tx in block.transactions]
+
+    def to_block(self, transactions: List[Transaction]) -> Block:
+        block = Block.__new__(Block) # Sin __init__, la cabecera ya trae el hash
+        block.__dict__.update(self.header)
+        block.transactions = transactions
+        return block
+
+    def matches(self, block: Block) -> bool:
+        '''Las Tx elegidas por short ID reproducen el hash anunciado (descarta colisiones)'''
+        return block.calculate_hash() == self.hash
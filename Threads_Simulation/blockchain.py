@@ -1,22 +1,36 @@
 import hashlib
 import json
 from time import time
-from typing import List, Any 
-from block import Block
+from typing import List, Any, Dict, Tuple
+from block import Block, HEADER_VERSION_LEGACY
+from transactions import Transaction
+from utxo import UTXOSet, GENESIS_SENDER
+from mempool import Mempool
+
+INITIAL_BALANCE = 100.0 # Monedas de cada nodo en el bloque genesis
 
 class Blockchain:
-    def __init__(self, difficulty: int = 4): # Difficulty = numero de ceros iniciales
+    def __init__(self, difficulty: int = 4, header_version: int = HEADER_VERSION_LEGACY, genesis_allocations: Dict[str, float] = None): # Difficulty = numero de ceros iniciales
         self.chain: List[Block] = []
-        self.pending_transactions: List[Any] = [] # Mempool
+        self.pending_transactions = Mempool() # Mempool, indexado por txid
         self.difficulty = difficulty
+        self.header_version = header_version # Formato de cabecera de los bloques nuevos
+        self.utxo = UTXOSet() # Salidas no gastadas de la cadena, se actualiza al conectar y desconectar bloques
+        self.undo: List[List[list]] = [] # Por bloque: monedas gastadas por cada Tx, para desconectarlo
         # Crear el bloque genesis
-        self.create_genesis_block()
+        self.create_genesis_block(genesis_allocations or {})
 
-    def create_genesis_block(self):
-        genesis_block = Block(0, time(), [], "0", "none")
+    def create_genesis_block(self, allocations: Dict[str, float]):
+        '''Genesis con las monedas iniciales: una Tx sin entradas ni firma por direccion'''
+        transactions = [Transaction(GENESIS_SENDER, address, amount, inputs=[], timestamp=0.0)
+                        for address, amount in sorted(allocations.items())]
+        genesis_block = Block(0, time(), transactions, "0" * 64, "none", version=self.header_version) # Sin bloque previo
         genesis_block.hash = genesis_block.calculate_hash()
 
         self.chain.append(genesis_block)
+        for tx in transactions:
+            self.utxo.add_outputs(tx, tx.amount)
+        self.undo.append([])
 
     @property
     def last_block(self) -> Block:
@@ -24,12 +38,43 @@ class Blockchain:
 
     def add_transaction(self, transaction: Any):
         # Validacion basica, To do
-        self.pending_transactions.append(transaction)
+        self.pending_transactions.add(transaction)
+
+    def connect_block(self, block: Block) -> bool:
+        '''
+        Anade el bloque si todas sus Tx gastan monedas existentes del emisor, en orden y sin
+        gastar dos veces la misma. Si alguna falla se deshace lo aplicado y no se anade.
+        Coste O(Tx del bloque), sin recorrer el historial.
+        '''
+        undo = []
+        for tx in block.transactions:
+            spent = self.utxo.apply(tx)
+            if spent is None:
+                for applied_tx, applied_spent in zip(reversed(block.transactions[:len(undo)]), reversed(undo)):
+                    self.utxo.revert(applied_tx, applied_spent)
+                return False
+            undo.append(spent)
+        self.chain.append(block)
+        self.undo.append(undo)
+        return True
 
-    
+    def disconnect_block(self) -> Block:
+        '''Quita el ultimo bloque y devuelve al UTXO las monedas que gastaba (reorganizaciones)'''
+        if len(self.chain) <= 1:
+            raise ValueError("No se puede desconectar el bloque genesis")
+        block = self.chain.pop()
+        undo = self.undo.pop()
+        for tx, spent in zip(reversed(block.transactions), reversed(undo)):
+            self.utxo.revert(tx, spent)
+        return block
 
-    
-    
-    
-            
-    
+    def select_transactions(self, transactions: List[Transaction]) -> List[Transaction]:
+        '''Plantilla de bloque: las Tx que se pueden conectar en este orden sobre la punta actual'''
+        selected: List[Tuple[Transaction, list]] = []
+        for tx in transactions:
+            spent = self.utxo.apply(tx)
+            if spent is not None:
+                selected.append((tx, spent))
+        for tx, spent in reversed(selected): # Se prueban sobre el UTXO real y se deshacen
+            self.utxo.revert(tx, spent)
+        return [tx for tx, _ in selected]
@@ -0,0 +1,145 @@
+import binascii
+import hashlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from ecdsa import SigningKey, VerifyingKey, SECP256k1
+from ecdsa.ellipticcurve import PointJacobi
+from ecdsa.util import sigencode_der
+
+try:
+    import coincurve # Enlace a libsecp256k1 (C), opcional
+except ImportError:
+    coincurve = None
+
+PUBLIC_KEY_CACHE_SIZE = 10000 # Claves publicas ya parseadas, por direccion
+PREFERRED_BACKENDS = ["coincurve", "ecdsa"] # Se usa el primero que se pueda importar
+
+
+def _message_digest(data: bytes) -> bytes:
+    # Mismo resumen que usa ecdsa por defecto (SHA-1), alineado a 32 bytes como pide libsecp256k1.
+    # Con ceros a la izquierda el entero es el mismo, asi las firmas valen con cualquier backend
+    return hashlib.sha1(data).digest().rjust(32, b"\x00")
+
+
+class CryptoBackend(ABC):
+    '''
+    Implementacion de ECDSA SECP256k1 usada por Wallet y por la verificacion de firmas.
+    Todas comparten formato: direccion = clave publica x||y (64 bytes) y firma = r||s (64 bytes)
+    sobre SHA-1 de los datos, por lo que una firma de un backend se verifica con cualquier otro.
+    Las claves publicas parseadas se guardan por direccion en un LRU. Es abstracta: un backend
+    al que le falte algun metodo falla al crearlo, no en la primera firma o verificacion.
+    '''
+    name = None
+
+    def __init__(self, cache_size: int = PUBLIC_KEY_CACHE_SIZE):
+        self.verifying_key = lru_cache(maxsize=cache_size)(self._parse_verifying_key)
+
+    @abstractmethod
+    def signing_key(self, secret: bytes) -> Any:
+        ...
+
+    @abstractmethod
+    def public_key_bytes(self, signing_key: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def sign(self, signing_key: Any, data: bytes) -> bytes:
+        ...
+
+    @abstractmethod
+    def _parse_verifying_key(self, address: str) -> Any:
+        ...
+
+    @abstractmethod
+    def _verify(self, verifying_key: Any, signature: bytes, data: bytes) -> bool:
+        ...
+
+    def verify(self, address: str, signature: bytes, data: bytes) -> bool:
+        return self._verify(self.verifying_key(address), signature, data)
+
+
+class EcdsaBackend(CryptoBackend):
+    '''Paquete ecdsa en Python puro: siempre disponible, lento'''
+    name = "ecdsa"
+
+    def signing_key(self, secret: bytes) -> SigningKey:
+        return SigningKey.from_string(secret, curve=SECP256k1)
+
+    def public_key_bytes(self, signing_key: SigningKey) -> bytes:
+        return signing_key.get_verifying_key().to_string()
+
+    def sign(self, signing_key: SigningKey, data: bytes) -> bytes:
+        return signing_key.sign_deterministic(data) # RFC 6979: misma firma para los mismos datos
+
+    def _parse_verifying_key(self, address: str) -> VerifyingKey:
+        point = VerifyingKey.from_string(binascii.unhexlify(address), curve=SECP256k1).pubkey.point
+        # Punto con tablas de multiplos precalculadas (generator=True): cuestan al parsear y solo
+        # compensan porque la clave queda en la cache y se reutiliza en cada Tx del emisor
+        point = PointJacobi(SECP256k1.curve, point.x(), point.y(), 1, SECP256k1.order, generator=True)
+        return VerifyingKey.from_public_point(point, curve=SECP256k1)
+
+    def _verify(self, verifying_key: VerifyingKey, signature: bytes, data: bytes) -> bool:
+        return verifying_key.verify(signature, data) # BadSignatureError si no es valida
+
+
+class CoincurveBackend(CryptoBackend):
+    '''libsecp256k1 a traves de coincurve: un orden de magnitud mas rapido'''
+    name = "coincurve"
+
+    def signing_key(self, secret: bytes) -> Any:
+        return coincurve.PrivateKey(secret)
+
+    def public_key_bytes(self, signing_key: Any) -> bytes:
+        return signing_key.public_key.format(compressed=False)[1:] # Sin el prefijo 0x04
+
+    def sign(self, signing_key: Any, data: bytes) -> bytes:
+        # La firma recuperable es r||s||v en crudo: basta quitar v. libsecp256k1 tambien usa RFC 6979
+        return signing_key.sign_recoverable(data, hasher=_message_digest)[:64]
+
+    def _parse_verifying_key(self, address: str) -> Any:
+        return coincurve.PublicKey(b"\x04" + binascii.unhexlify(address))
+
+    def _verify(self, verifying_key: Any, signature: bytes, data: bytes) -> bool:
+        if len(signature) != 64:
+            return False
+        order = SECP256k1.order
+        r = int.from_bytes(signature[:32], "big")
+        s = int.from_bytes(signature[32:], "big")
+        if s > order // 2:
+            s = order - s # libsecp256k1 solo acepta s bajo; ecdsa puede firmar con s alto
+        return verifying_key.verify(sigencode_der(r, s, order), data, hasher=_message_digest)
+
+
+BACKENDS = {"ecdsa": EcdsaBackend}
+if coincurve is not None:
+    BACKENDS["coincurve"] = CoincurveBackend
+
+_backend: Optional[CryptoBackend] = None
+
+
+def available_backends() -> List[str]:
+    return [name for name in PREFERRED_BACKENDS if name in BACKENDS]
+
+
+def get_backend() -> CryptoBackend:
+    '''Backend activo; la primera vez se elige el mas rapido disponible'''
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[available_backends()[0]]()
+    return _backend
+
+
+def set_backend(name: str) -> CryptoBackend:
+    '''Cambia el backend activo. Las Wallet ya creadas siguen firmando con el suyo'''
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Backend criptografico no disponible: {name} (disponibles: {available_backends()})")
+    _backend = BACKENDS[name]()
+    return _backend
+
+
+def backend_info() -> Dict[str, Any]:
+    backend = get_backend()
+    cache = backend.verifying_key.cache_info()
+    return {"backend": backend.name, "key_cache_hits": cache.hits, "key_cache_misses": cache.misses}
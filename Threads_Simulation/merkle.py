@@ -0,0 +1,80 @@
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+
+MerkleProof = List[Tuple[str, bool]] # (hash hermano, True si va a la izquierda), de la hoja a la raiz
+
+EMPTY_MERKLE_ROOT = hashlib.sha256(b"").hexdigest() # Raiz de un bloque sin Tx
+
+
+def merkle_parent(left: str, right: str) -> str:
+    # Prefijo 0x01 para los nodos internos: un nodo interno nunca puede hacerse pasar por un txid
+    return hashlib.sha256(b"\x01" + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+class MerkleTree:
+    '''
+    Arbol Merkle sobre txids (hex de SHA-256). Se guardan todos los niveles: anadir una hoja al
+    final solo recalcula su camino hasta la raiz, O(log n), y las pruebas de inclusion salen de
+    los niveles sin rehashear. Con un numero impar de nodos el ultimo sube sin hashear (sin duplicar).
+    '''
+    def __init__(self, leaves: Iterable[str] = ()):
+        self.levels: List[List[str]] = [[]] # levels[0] = hojas, levels[-1] = [raiz]
+        self.extend(leaves)
+
+    @property
+    def leaves(self) -> List[str]:
+        return self.levels[0]
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    @property
+    def root(self) -> str:
+        return self.levels[-1][0] if self.levels[0] else EMPTY_MERKLE_ROOT
+
+    def append(self, leaf: str):
+        self.levels[0].append(leaf)
+        index = len(self.levels[0]) - 1
+        level = 0
+        while len(self.levels[level]) > 1:
+            nodes = self.levels[level]
+            parent_index = index // 2
+            left = 2 * parent_index
+            parent = merkle_parent(nodes[left], nodes[left + 1]) if left + 1 < len(nodes) else nodes[left]
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            upper = self.levels[level + 1]
+            if parent_index < len(upper):
+                upper[parent_index] = parent
+            else:
+                upper.append(parent)
+            index = parent_index
+            level += 1
+
+    def extend(self, leaves: Iterable[str]):
+        for leaf in leaves:
+            self.append(leaf)
+
+    def proof(self, index: int) -> MerkleProof:
+        '''Hermanos del camino de la hoja `index` a la raiz'''
+        if not 0 <= index < len(self.levels[0]):
+            raise IndexError(f"Hoja {index} fuera del arbol ({len(self.levels[0])} hojas)")
+        proof: MerkleProof = []
+        for nodes in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(nodes): # Si no hay hermano el nodo sube sin hashear
+                proof.append((nodes[sibling], sibling < index))
+            index //= 2
+        return proof
+
+
+def merkle_root(leaves: Iterable[str]) -> str:
+    return MerkleTree(leaves).root
+
+
+def verify_merkle_proof(leaf: str, proof: MerkleProof, root: Optional[str]) -> bool:
+    '''Comprueba que `leaf` esta bajo `root` solo con la prueba: no hacen falta las demas Tx'''
+    node = leaf
+    for sibling, sibling_is_left in proof:
+        node = merkle_parent(sibling, node) if sibling_is_left else merkle_parent(node, sibling)
+    return node == root
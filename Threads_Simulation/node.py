@@ -1,8 +1,13 @@
 import os
 from blockchain import Blockchain
-from block import Block
-from transactions import Transaction, Wallet
-from typing import List, Any, Set, Dict # For type hinting
+from block import Block, CompactBlock, short_tx_id, MERKLE_HEADER_VERSIONS
+from transactions import Transaction, Wallet, SignatureCache
+from mining_engine import MiningEngine
+from verification_engine import VerificationEngine
+from seen_cache import SeenCache
+from utxo import UTXOSet, transaction_outpoints, MAX_OUTPUTS
+from mempool import Mempool, transaction_size
+from typing import List, Any, Set, Dict, Optional # For type hinting
 import time
 import threading
 import queue
@@ -13,18 +18,57 @@ graphviz_bin = r"C:\Program Files\Graphviz\bin"
 os.environ["PATH"] += os.pathsep + graphviz_bin
 from graphviz import Digraph
 
+# Relay por inventario (inv/getdata)
+INVENTORY_SIZE = 5000 # Objetos anunciados que se guardan para responder a getdata
+ANNOUNCE_INTERVAL = 0.1 # Segundos minimos entre anuncios de Tx agrupados
+REQUEST_TIMEOUT = 2.0 # Segundos antes de volver a pedir un objeto a otro peer
+MAX_PARTIAL_BLOCKS = 16 # Bloques compactos a la espera de sus Tx (blocktxn)
+
+# Caches de hashes ya vistos (known_tx_hashes, known_block_hashes)
+SEEN_TX_CACHE_SIZE = 50000 # Hashes de Tx recientes guardados exactamente
+SEEN_BLOCK_CACHE_SIZE = 5000
+SEEN_CACHE_MAX_AGE = None # Segundos sin verse antes de expulsar un hash (None = solo por numero)
+SEEN_TX_FP_RATE = 0.001 # Falsos positivos del Bloom filter de Tx expulsadas (None = sin Bloom)
+SIGNATURE_CACHE_SIZE = 100000 # Firmas ya verificadas que no se vuelven a comprobar
+TX_BATCH_MAX = 256 # Tx entrantes que se verifican juntas como maximo (rafaga de la cola de entrada)
+
+# Plantillas de bloque (los limites del mempool estan en el modulo mempool)
+BLOCK_MAX_TXS = 1000 # Tx por bloque como maximo
+BLOCK_MAX_BYTES = 1000000 # Bytes de Tx por bloque como maximo
+TX_FEE_RANGE = (0.0, 0.01) # Comision de las Tx que crea el nodo
+
+class MiningCandidate:
+    '''
+    Bloque que se esta minando y lo necesario para ampliarlo sin recorrer el mempool: sus txids,
+    sus bytes de Tx y la secuencia del mempool (next_sequence) hasta la que ya se ha mirado
+    '''
+    def __init__(self, block: Block, mempool_sequence: int = 0):
+        self.block = block
+        self.txids = {tx.calculate_hash() for tx in block.transactions}
+        self.size = sum(transaction_size(tx) for tx in block.transactions)
+        self.mempool_sequence = mempool_sequence
+
+    def append_transactions(self, transactions: List[Transaction]):
+        self.block.append_transactions(transactions)
+        self.txids.update(tx.calculate_hash() for tx in transactions)
+        self.size += sum(transaction_size(tx) for tx in transactions)
+
+
 class Node(threading.Thread):
-    def __init__(self, node_id:str, blockchain_instance = Blockchain, node_list: list = None, stop_event: threading.Event = None):
+    def __init__(self, node_id:str, blockchain_instance = Blockchain, node_list: list = None, stop_event: threading.Event = None, mining_engine: MiningEngine = None, wallet: Wallet = None, gossip_fanout: int = None, inventory_relay: bool = False, compact_blocks: bool = False, verification_engine: VerificationEngine = None):
         threading.Thread.__init__(self,daemon=True) # Llamar al init del Thread, daemon=True para que termine si el principal termina
         self.node_id = node_id
         self.blockchain = blockchain_instance
-        self.wallet = Wallet()
-        self.mempool: Set[Transaction] = set()
+        self.wallet = wallet if wallet is not None else Wallet()
         # self.peers: List['Node'] = []
         self.peers_queues: Dict[str, queue.Queue] = {} #Almacena colas de enrada de los peers
         self.incoming_queue = queue.Queue() #Cola de entrada a este nodo
-        self.known_tx_hashes: Set[str] = set()
-        self.known_block_hashes: Set[str] = set()
+        self.clock = time.time # Reloj para las marcas de tiempo, el runtime puede sustituirlo por uno virtual
+        self.mempool = Mempool(clock=lambda: self.clock(), on_remove=self._forget_mempool_transaction) # Por fee rate, acotado en numero, bytes y antiguedad
+        # Acotados: memoria constante aunque la simulacion dure horas. Se consulta self.clock en cada uso, por si el runtime lo cambia
+        self.known_tx_hashes = SeenCache(SEEN_TX_CACHE_SIZE, SEEN_CACHE_MAX_AGE, SEEN_TX_FP_RATE, clock=lambda: self.clock())
+        self.known_block_hashes = SeenCache(SEEN_BLOCK_CACHE_SIZE, SEEN_CACHE_MAX_AGE, clock=lambda: self.clock())
+        self.signature_cache = SignatureCache(SIGNATURE_CACHE_SIZE) # Compartida por mempool y validacion de bloques
         if self.blockchain.chain:
             self.known_block_hashes.add(self.blockchain.chain[0].hash)
 
@@ -33,6 +77,23 @@ class Node(threading.Thread):
 
         self.is_minig = False #Flag para evitar minado en pararelo consigo mismo
         self.mining_thread = None #Referencia al hilo minero
+        self.mining_engine = mining_engine # Motor multiproceso opcional, si es None se mina en el hilo
+        self.verification_engine = verification_engine # Pool opcional para verificar las firmas de un bloque (o de una rafaga de Tx) en paralelo
+        self.pending_transactions: List[Transaction] = [] # Tx recibidas pendientes de verificar en lote
+        self.runtime = None # Runtime alternativo a los hilos (eventos discretos), gestiona el minado
+        self.gossip_fanout = gossip_fanout # Maximo de peers a los que se reenvia cada mensaje (None = todos)
+        self.inventory_relay = inventory_relay # Anunciar hashes (inv) y enviar solo lo que se pide (getdata)
+        self.inventory: Dict[str, tuple] = {} # hash -> mensaje, para responder a getdata
+        self.pending_announcements: List[tuple] = [] # Tx aceptadas pendientes de anunciar
+        self.last_announcement = 0.0
+        self.requested_items: Dict[str, float] = {} # hash -> instante en que se pidio
+        self.relay_lock = threading.Lock() # Aparte de data_lock: _broadcast se llama con data_lock tomado
+        self.compact_blocks = compact_blocks # Difundir bloques como cabecera + short IDs (se reconstruyen con el mempool)
+        self.partial_blocks: Dict[str, tuple] = {} # hash -> (CompactBlock, Tx encontradas) a la espera de blocktxn
+        self.compact_stats = {"received": 0, "reconstructed": 0, "missing_txs": 0}
+        self.mempool_spends: Dict[tuple, str] = {} # outpoint -> txid de la Tx del mempool que lo gasta (conflictos en O(1))
+        self.mempool_outputs = UTXOSet() # Salidas de Tx del mempool aun sin confirmar, se pueden gastar en cadena
+        self.utxo_stats = {"double_spends": 0, "invalid_inputs": 0, "conflicts": 0, "orphans": 0} # Rechazadas al entrar en el mempool / quitadas por un bloque / por salir su Tx padre
 
         self.data_lock = threading.Lock() #Lock para bloquear accesos concurrentes
 
@@ -51,20 +112,43 @@ class Node(threading.Thread):
 
     # --- METODOS DE PROCESAMIENTO, se llaman desde el run
     def _handle_transaction(self, transaction: Transaction):
-        '''Usar self.data_lock para proteger mempool y known_tx_hashes'''
+        '''
+        Usar self.data_lock para proteger mempool y known_tx_hashes. La Tx espera en
+        pending_transactions: las firmas de la rafaga se verifican juntas al vaciarse la cola
+        de entrada (o al llegar a TX_BATCH_MAX), con _verify_pending_transactions
+        '''
         with self.data_lock:
             tx_hash = transaction.calculate_hash()
             if tx_hash in self.known_tx_hashes:
                 return
             self.known_tx_hashes.add(tx_hash)
-            if transaction.is_valid() and transaction not in self.mempool:
-                #print(f"Nodo {self.node_id}: Anadida Tx {tx_hash[:8]} a memepool")
-                self.mempool.add(transaction)
-                needs_broadcast = True
-            else:
-                needs_broadcast = False
-                print(f"Nodo {self.node_id}: Tx {tx_hash[:8]} no valida o ya en mempool")
-        if needs_broadcast:
+            self.pending_transactions.append(transaction)
+            batch_full = len(self.pending_transactions) >= TX_BATCH_MAX
+        if batch_full:
+            self._verify_pending_transactions()
+
+    def _verify_pending_transactions(self):
+        '''Verifica las firmas de las Tx recibidas en un solo lote (sin data_lock) y admite las validas en el mempool'''
+        with self.data_lock:
+            batch, self.pending_transactions = self.pending_transactions, []
+        if not batch:
+            return
+        valid = batch
+        if not self._verify_transactions(batch): # Alguna firma no valida: se busca cual (las ya verificadas estan en signature_cache)
+            valid = []
+            for transaction in batch:
+                if transaction.is_valid(self.signature_cache):
+                    valid.append(transaction)
+                else:
+                    print(f"Nodo {self.node_id}: Tx {transaction.calculate_hash()[:8]} no valida")
+        accepted = []
+        with self.data_lock:
+            for transaction in valid:
+                if transaction not in self.mempool and self._accept_to_mempool(transaction):
+                    accepted.append(transaction)
+                else:
+                    print(f"Nodo {self.node_id}: Tx {transaction.calculate_hash()[:8]} ya en mempool o rechazada")
+        for transaction in accepted:
             self._broadcast("transaction", transaction)
     
     def _handle_block(self, block: Block):
@@ -83,25 +167,22 @@ class Node(threading.Thread):
             return
         
         # 2. Validar transaciones internas
-        for tx in block.transactions:
-            if not tx.is_valid():
-                print(f"Nodo {self.node_id}: Bloque {block.index} no valido, (Tx interna no valida)")
-                return
+        if not self._verify_transactions(block.transactions):
+            print(f"Nodo {self.node_id}: Bloque {block.index} no valido, (Tx interna no valida)")
+            return
         
         # --- MODIFICACION ESTADO  (necesita lock)---  
         with self.data_lock:
             last_local_block = self.blockchain.last_block #Leer ultimo bloque
             #print(f"Nodo {self.node_id}: Validando bloque {block.index}. Previous hash del bloque a validar: {block.previous_hash[:8]}.Hash del ultimo bloque de la blockchain: {last_local_block.calculate_hash()[:8]}")
-            # 3. Validar enlace (previous hash e index)
-            if block.index == last_local_block.index + 1 and block.previous_hash == last_local_block.calculate_hash():
+            # 3. Validar enlace (previous hash e index) y gastos contra el UTXO de la cadena, O(Tx del bloque)
+            linked = block.index == last_local_block.index + 1 and block.previous_hash == last_local_block.calculate_hash()
+            if linked and self.blockchain.connect_block(block):
                 #Bloque valido, extiende la cadena actual
                 print(f"Nodo {self.node_id}: Bloque {block.index} VALIDA, anadiendlo a blockchain")
-                self.blockchain.chain.append(block)
 
-                # Limpiar mempool
-                block_tx_hashes = {tx.calculate_hash() for tx in block.transactions}
-                self.mempool.difference_update(block_tx_hashes)
-                self.known_tx_hashes.difference_update(block_tx_hashes)
+                # Limpiar mempool: O(Tx del bloque), por txid y por las monedas que gastan
+                self._remove_block_transactions(block)
 
                 #Paramos minado
                 if self.is_minig:
@@ -109,22 +190,268 @@ class Node(threading.Thread):
                 need_broadcast = True
             else:
                 #Blqoue no valido
-                print(f"Nodo {self.node_id}: Bloque {block.index} no valido, (index o previous hash incorrecto)")
+                reason = "gasta monedas inexistentes o ya gastadas" if linked else "index o previous hash incorrecto"
+                print(f"Nodo {self.node_id}: Bloque {block.index} no valido, ({reason})")
                 need_broadcast = False
         # 4. Enviar bloque a los peers
         if need_broadcast:
             print(f"Nodo {self.node_id}: Transmitiendo bloque {block.index} ({block_hash[:8]}...)")
             self._broadcast("block", block)
 
+    def _verify_transactions(self, transactions: List[Transaction]) -> bool:
+        '''Firmas de un lote de Tx, en el pool si hay motor de verificacion. Para en la primera no valida'''
+        if self.verification_engine is not None:
+            return self.verification_engine.verify_batch(transactions, self.signature_cache)
+        return all(tx.is_valid(self.signature_cache) for tx in transactions)
+
+    def _accept_to_mempool(self, transaction: Transaction) -> bool:
+        '''
+        Admite la Tx si gasta monedas del emisor (confirmadas o salidas del mempool) que ninguna
+        Tx del mempool gasta ya. Conflictos en O(entradas) con mempool_spends. Llamar con data_lock
+        '''
+        tx_hash = transaction.calculate_hash()
+        outpoints = transaction_outpoints(transaction)
+        if any(outpoint in self.mempool_spends for outpoint in outpoints):
+            self.utxo_stats["double_spends"] += 1
+            print(f"Nodo {self.node_id}: Tx {tx_hash[:8]} rechazada, doble gasto")
+            return False
+        input_value = self.blockchain.utxo.input_value(transaction, fallback=self.mempool_outputs)
+        if input_value is None:
+            self.utxo_stats["invalid_inputs"] += 1
+            print(f"Nodo {self.node_id}: Tx {tx_hash[:8]} rechazada, entradas inexistentes, ya gastadas o insuficientes")
+            return False
+        if not self.mempool.add(transaction):
+            print(f"Nodo {self.node_id}: Tx {tx_hash[:8]} rechazada, mempool lleno y fee rate demasiado bajo")
+            return False
+        for outpoint in outpoints:
+            self.mempool_spends[outpoint] = tx_hash
+        self.mempool_outputs.add_outputs(transaction, input_value)
+        return True
+
+    def _remove_block_transactions(self, block: Block):
+        '''
+        Quita del mempool las Tx confirmadas (por txid) y las que gastaban alguna de las mismas
+        monedas (perdieron el doble gasto), con sus descendientes. Solo se miran las entradas del
+        bloque en mempool_spends, el coste no depende del tamano del mempool. Llamar con data_lock
+        '''
+        conflicts = []
+        for tx in block.transactions:
+            tx_hash = tx.calculate_hash()
+            for outpoint in transaction_outpoints(tx):
+                spender = self.mempool_spends.get(outpoint)
+                if spender is not None and spender != tx_hash:
+                    conflicts.append(spender)
+        self.mempool.difference_update(block.transactions)
+        self._release_mempool_spends(block)
+        self.utxo_stats["conflicts"] += self._remove_with_descendants(conflicts)
+
+    def _mempool_children(self, tx_hash: str) -> List[str]:
+        '''Tx del mempool que gastan alguna salida de `tx_hash`, por mempool_spends. Llamar con data_lock'''
+        return [self.mempool_spends[(tx_hash, index)] for index in range(MAX_OUTPUTS) if (tx_hash, index) in self.mempool_spends]
+
+    def _remove_with_descendants(self, tx_hashes: List[str]) -> int:
+        '''Quita del mempool las Tx indicadas y sus descendientes. Devuelve cuantas se han quitado. Llamar con data_lock'''
+        removed = 0
+        while tx_hashes:
+            tx_hash = tx_hashes.pop()
+            # Las Tx que gastan sus salidas tampoco se podran confirmar
+            tx_hashes.extend(self._mempool_children(tx_hash))
+            if self.mempool.remove(tx_hash) is not None:
+                removed += 1
+        return removed
+
+    def _release_mempool_spends(self, block: Block):
+        '''Lo que gasta y crea el bloque ya esta en el UTXO de la cadena, sale de los indices del mempool'''
+        for tx in block.transactions:
+            for outpoint in transaction_outpoints(tx):
+                self.mempool_spends.pop(outpoint, None)
+            self.mempool_outputs.remove_outputs(tx)
+
+    def _forget_mempool_transaction(self, transaction: Transaction, reason: Optional[str] = None):
+        '''
+        Llamada por el mempool al salir una Tx (confirmada, expulsada o expirada): libera sus
+        entradas y salidas. Si se ha expulsado o ha expirado sus salidas ya no existen, asi que
+        tambien salen sus descendientes (si se confirma, sus hijas gastan monedas confirmadas)
+        '''
+        tx_hash = transaction.calculate_hash()
+        for outpoint in transaction_outpoints(transaction):
+            if self.mempool_spends.get(outpoint) == tx_hash:
+                del self.mempool_spends[outpoint]
+        self.mempool_outputs.remove_outputs(transaction)
+        if reason is not None:
+            self.utxo_stats["orphans"] += self._remove_with_descendants(self._mempool_children(tx_hash))
+
+    def _select_coins(self, amount: float) -> List[tuple]:
+        '''Monedas propias no gastadas en el mempool hasta cubrir amount, o None. Llamar con data_lock'''
+        address = self.get_address()
+        selected, total = [], 0.0
+        for coins in (self.blockchain.utxo, self.mempool_outputs): # Primero las confirmadas, despues el cambio pendiente
+            for outpoint in coins.coins(address):
+                if outpoint in self.mempool_spends:
+                    continue
+                selected.append(outpoint)
+                total += coins.get(outpoint)[1]
+                if total >= amount:
+                    return selected
+        return None
+
     def _broadcast(self, msg_type:str, data:any):
-        '''Envia mensaje a las colas de todos los peers conocidos'''
-        #print(f"Nodo {self.node_id}: transmitiendo {msg_type}...")
-        message = (msg_type, data) #Empaquetar tipo y datos
-        for peer_id, peer_queue in self.peers_queues.items():
+        '''Difunde un objeto a los peers: completo, solo su hash (inventory_relay) o como bloque compacto (compact_blocks)'''
+        if msg_type == "block" and self.compact_blocks:
+            self._relay_compact_block(data)
+        elif self.inventory_relay:
+            self._announce(msg_type, data)
+        else:
+            self._send_to_peers((msg_type, data)) # Empaquetar tipo y datos
+
+    def _send_to_peers(self, message: tuple):
+        '''Envia un mensaje a las colas de los peers conocidos (a gossip_fanout de ellos si esta definido)'''
+        peers = self.peers_queues.items()
+        if self.gossip_fanout is not None and len(self.peers_queues) > self.gossip_fanout:
+            # Gossip acotado: el resto de la red lo recibe de los peers que lo reenvian
+            peers = random.sample(list(peers), self.gossip_fanout)
+        for peer_id, peer_queue in peers:
             try:
-                peer_queue.put(message,block=False) #No bloquear si la cola esta llena
+                peer_queue.put(message,block=False) # No bloquear si la cola esta llena
             except queue.Full:
                 print(f"Nodo {self.node_id}: WARN - Cola del peer {peer_id} llena. Mensaje descartado")
+
+    # --- RELAY POR INVENTARIO (inv/getdata) ---
+    def _announce(self, msg_type: str, data: Any):
+        '''Guarda el objeto para responder a getdata y anuncia su hash: bloques al momento, Tx en el siguiente tick'''
+        item_hash = data.hash if msg_type == "block" else data.calculate_hash()
+        with self.relay_lock:
+            self._remember(item_hash, (msg_type, data))
+            if msg_type != "block":
+                self.pending_announcements.append((msg_type, item_hash))
+                return
+        self._send_to_peers(("inv", (self.node_id, [(msg_type, item_hash)])))
+
+    def _remember(self, item_hash: str, message: tuple):
+        '''Guarda un objeto en el inventario, descartando el mas antiguo si esta lleno. Llamar con relay_lock'''
+        self.inventory[item_hash] = message
+        while len(self.inventory) > INVENTORY_SIZE:
+            del self.inventory[next(iter(self.inventory))]
+
+    def _flush_announcements(self):
+        '''Envia en un solo inv las Tx aceptadas desde el ultimo anuncio'''
+        now = self.clock()
+        with self.relay_lock:
+            if not self.pending_announcements or now - self.last_announcement < ANNOUNCE_INTERVAL:
+                return
+            items, self.pending_announcements = self.pending_announcements, []
+            self.last_announcement = now
+        self._send_to_peers(("inv", (self.node_id, items)))
+
+    def _handle_inv(self, data: tuple):
+        '''Pide con getdata solo los objetos anunciados que no conocemos ni hemos pedido ya'''
+        sender_id, items = data
+        now = self.clock()
+        wanted = []
+        with self.data_lock:
+            for msg_type, item_hash in items:
+                known = self.known_block_hashes if msg_type == "block" else self.known_tx_hashes
+                if item_hash in known:
+                    continue
+                requested_at = self.requested_items.get(item_hash)
+                if requested_at is not None and now - requested_at < REQUEST_TIMEOUT:
+                    continue # Ya pedido a otro peer, esperar su respuesta
+                self.requested_items[item_hash] = now
+                wanted.append((msg_type, item_hash))
+            if len(self.requested_items) > INVENTORY_SIZE: # Olvidar peticiones caducadas
+                self.requested_items = {h: t for h, t in self.requested_items.items() if now - t < REQUEST_TIMEOUT}
+        peer_queue = self.peers_queues.get(sender_id)
+        if wanted and peer_queue is not None:
+            try:
+                peer_queue.put(("getdata", (self.node_id, wanted)), block=False)
+            except queue.Full:
+                print(f"Nodo {self.node_id}: WARN - Cola del peer {sender_id} llena. getdata descartado")
+
+    def _handle_getdata(self, data: tuple):
+        '''Envia al peer que los pide los objetos de nuestro inventario'''
+        sender_id, items = data
+        peer_queue = self.peers_queues.get(sender_id)
+        if peer_queue is None:
+            return
+        with self.relay_lock:
+            found = [self.inventory.get(item_hash) for _, item_hash in items]
+        for message in found:
+            if message is None:
+                continue # Ya descartado del inventario
+            try:
+                peer_queue.put(message, block=False)
+            except queue.Full:
+                print(f"Nodo {self.node_id}: WARN - Cola del peer {sender_id} llena. Mensaje descartado")
+
+    # --- COMPACT BLOCKS (cmpctblock/getblocktxn/blocktxn) ---
+    def _relay_compact_block(self, block: Block):
+        '''Envia cabecera + short IDs y guarda el bloque para servir las Tx que falten'''
+        with self.relay_lock:
+            self._remember(block.hash, ("block", block))
+        self._send_to_peers(("cmpctblock", (self.node_id, CompactBlock(block))))
+
+    def _handle_compact_block(self, data: tuple):
+        '''Reconstruye el bloque con el mempool; si faltan Tx se piden solo esas al emisor'''
+        sender_id, compact = data
+        with self.data_lock:
+            if compact.hash in self.known_block_hashes or compact.hash in self.partial_blocks:
+                return
+            self.compact_stats["received"] += 1
+            mempool_by_short_id = {short_tx_id(tx): tx for tx in self.mempool}
+        transactions = [mempool_by_short_id.get(short_id) for short_id in compact.short_ids]
+        if None not in transactions:
+            block = compact.to_block(transactions)
+            if compact.matches(block):
+                with self.data_lock:
+                    self.compact_stats["reconstructed"] += 1
+                self._handle_block(block)
+                return
+            transactions = [None] * len(transactions) # Colision de short ID: pedir todas
+        self._request_block_transactions(sender_id, compact, transactions)
+
+    def _request_block_transactions(self, sender_id: str, compact: CompactBlock, transactions: List[Transaction]):
+        missing = [i for i, tx in enumerate(transactions) if tx is None]
+        with self.data_lock:
+            self.partial_blocks[compact.hash] = (compact, transactions)
+            while len(self.partial_blocks) > MAX_PARTIAL_BLOCKS:
+                del self.partial_blocks[next(iter(self.partial_blocks))] # Peticion sin respuesta mas antigua
+            self.compact_stats["missing_txs"] += len(missing)
+        peer_queue = self.peers_queues.get(sender_id)
+        if peer_queue is None:
+            return
+        try:
+            peer_queue.put(("getblocktxn", (self.node_id, compact.hash, missing)), block=False)
+        except queue.Full:
+            print(f"Nodo {self.node_id}: WARN - Cola del peer {sender_id} llena. getblocktxn descartado")
+
+    def _handle_getblocktxn(self, data: tuple):
+        '''Envia las Tx del bloque que el peer no ha podido reconstruir'''
+        sender_id, block_hash, indexes = data
+        with self.relay_lock:
+            entry = self.inventory.get(block_hash)
+        peer_queue = self.peers_queues.get(sender_id)
+        if entry is None or peer_queue is None:
+            return
+        block = entry[1]
+        try:
+            peer_queue.put(("blocktxn", (self.node_id, block_hash, [block.transactions[i] for i in indexes])), block=False)
+        except queue.Full:
+            print(f"Nodo {self.node_id}: WARN - Cola del peer {sender_id} llena. blocktxn descartado")
+
+    def _handle_blocktxn(self, data: tuple):
+        '''Completa el bloque pendiente con las Tx recibidas y lo valida como uno normal'''
+        sender_id, block_hash, received = data
+        with self.data_lock:
+            pending = self.partial_blocks.pop(block_hash, None)
+        if pending is None:
+            return
+        compact, transactions = pending
+        received = iter(received)
+        transactions = [tx if tx is not None else next(received, None) for tx in transactions]
+        if None in transactions:
+            print(f"Nodo {self.node_id}: blocktxn incompleto para el bloque {block_hash[:8]}")
+            return
+        self._handle_block(compact.to_block(transactions))
     
     def _start_mining(self):
         '''Inicia el hilo de minado'''  
@@ -132,7 +459,10 @@ class Node(threading.Thread):
             if self.is_minig:
                 print(f"Nodo {self.node_id}: Minado ya en curso")
                 return
-            mempool_copy = list(self.mempool)
+            # Las de mayor fee rate que caben en un bloque, en orden de creacion (determinista)
+            mempool_copy = self.mempool.build_block_template(BLOCK_MAX_TXS, BLOCK_MAX_BYTES)
+            mempool_copy = self.blockchain.select_transactions(mempool_copy) # Sin Tx ya confirmadas ni en conflicto con la cadena
+            mempool_sequence = self.mempool.next_sequence # _refresh_candidate solo mirara las Tx admitidas despues
             #print(f"Nodo {self.node_id}: Copiando mempool ({len(mempool_copy)}) transacciones")
 
             if not mempool_copy:
@@ -141,8 +471,12 @@ class Node(threading.Thread):
 
             
             self.is_minig = True
+            if self.runtime is not None:
+                # El runtime (p.ej. eventos discretos) decide cuando se ejecuta el minado
+                self.runtime.start_mining(self, (mempool_copy, mempool_sequence))
+                return
             # Crear hilo de minado
-            self.mining_thread = threading.Thread(target=self._mine_worker, args=(mempool_copy,), daemon=True)
+            self.mining_thread = threading.Thread(target=self._mine_worker, args=(mempool_copy, mempool_sequence), daemon=True)
             self.mining_thread.start() #Iniciar hilo de minado            
         
     
@@ -153,7 +487,7 @@ class Node(threading.Thread):
             self.is_minig = False
             self.mining_thread = None
     
-    def _mine_worker(self, transactions_to_mine: List[Transaction]):
+    def _mine_worker(self, transactions_to_mine: List[Transaction], mempool_sequence: int = 0):
         '''Funcion ejecutada por el hilo de minado'''
         if not transactions_to_mine:
             print(f"Nodo {self.node_id}: No hay transacciones para minar")
@@ -166,100 +500,164 @@ class Node(threading.Thread):
 
         new_block_candidate = Block(
             index=last_block.index +1,
-            timestamp=time.time(),
+            timestamp=self.clock(),
             transactions=transactions_to_mine,
             previous_hash=hash_last_block,
             mined_by=self.node_id,
-            nonce=0
+            nonce=0,
+            version=self.blockchain.header_version
         )
 
         # --- BUCLE PoW ---
-        target = '0' * self.blockchain.difficulty
-        nonce = 0
+        # La cabecera fija se serializa una vez, en cada intento solo se hashea el nonce
+        header_template = new_block_candidate.header_template()
         #print(f"Nodo {self.node_id}. Hash original del bloque candidato {new_block_candidate.index}: {new_block_candidate.calculate_hash()[:8]}...")
         start_mining_time = time.time()
-        while self.is_minig:
-            new_block_candidate.nonce = nonce
-            hash_result = new_block_candidate.calculate_hash()
-            if hash_result.startswith(target):
-                print(f"Nodo {self.node_id}: BLOQUE MINADO! con nonce {nonce} ({hash_result[:8]}...). Tiempo de minado: {(time.time()-start_mining_time):.2f}")
-                self.incoming_queue.put(("mined_block", new_block_candidate)) #Enviar bloque minado a la cola de entrada
-                self.is_minig = False #Parar el hilo de minado
-                return
-            nonce += 1
-            #Pequeño delay para evitar bucle infinito
-            if nonce % 10000==0:
-                if not self.is_minig or self.stop_event.is_set():
-                    print(f"Nodo {self.node_id}: Minado detenido por evento de parada")
-                    self.is_minig = False
-                    return
-        print(f"Nodo {self.node_id}: Minado detenido por evento de parada")
+        result = None
+        if self.mining_engine is not None:
+            # Rangos de nonces repartidos entre los procesos del motor. Se cancela al recibir un bloque valido
+            result = self.mining_engine.mine(header_template, self.blockchain.difficulty,
+                                             should_stop=lambda: not self.is_minig or self.stop_event.is_set())
+        else:
+            nonce = 0
+            candidate = MiningCandidate(new_block_candidate, mempool_sequence) # Tx nuevas del mempool entre bloques de nonces
+            CHECK_INTERVAL = 10000 # Nonces probados entre comprobaciones de parada
+            while self.is_minig and not self.stop_event.is_set():
+                result = header_template.search(self.blockchain.difficulty, start=nonce, stop=nonce + CHECK_INTERVAL)
+                if result is not None:
+                    break
+                nonce += CHECK_INTERVAL
+                if self._refresh_candidate(candidate):
+                    header_template = new_block_candidate.header_template() # Nueva raiz Merkle, se empieza de nuevo
+                    nonce = 0
+
+        if result is None:
+            print(f"Nodo {self.node_id}: Minado detenido por evento de parada")
+            self.is_minig = False
+            return
+        nonce, hash_result = result
+        new_block_candidate.nonce = nonce
+        new_block_candidate.hash = hash_result
+        print(f"Nodo {self.node_id}: BLOQUE MINADO! con nonce {nonce} ({hash_result[:8]}...). Tiempo de minado: {(time.time()-start_mining_time):.2f}")
+        self.incoming_queue.put(("mined_block", new_block_candidate)) #Enviar bloque minado a la cola de entrada
+        self.is_minig = False #Parar el hilo de minado
+
+    def _refresh_candidate(self, candidate: MiningCandidate) -> bool:
+        '''
+        Anade al bloque que se esta minando las Tx llegadas al mempool despues de crearlo, si caben.
+        Solo con cabecera Merkle: la raiz se extiende en O(k log n) sin rehashear las Tx ya incluidas.
+        Solo se miran las Tx admitidas desde la ultima comprobacion: sin Tx nuevas cuesta O(1)
+        '''
+        block = candidate.block
+        if block.version not in MERKLE_HEADER_VERSIONS or len(block.transactions) >= BLOCK_MAX_TXS:
+            return False
+        with self.data_lock:
+            new = [tx for tx in self.mempool.build_block_template(BLOCK_MAX_TXS - len(block.transactions), BLOCK_MAX_BYTES - candidate.size,
+                                                                  since=candidate.mempool_sequence)
+                   if tx.calculate_hash() not in candidate.txids]
+            candidate.mempool_sequence = self.mempool.next_sequence
+            if not new:
+                return False
+            selected = self.blockchain.select_transactions(block.transactions + new)
+        if selected[:len(block.transactions)] != block.transactions:
+            return False # Alguna Tx del candidato ya no es valida (ha llegado un bloque), se dejara de minar
+        added = selected[len(block.transactions):] # La plantilla ya respeta los limites de Tx y bytes que quedan
+        if not added:
+            return False
+        candidate.append_transactions(added)
+        print(f"Nodo {self.node_id}: {len(added)} Txs nuevas en el bloque candidato ({len(block.transactions)} en total)")
+        return True
+
+    def _process_message(self, message_type: str, data: Any):
+        '''Despacha un mensaje de la cola de entrada a su manejador'''
+        #print(f"Nodo {self.node_id}: Recibo mensaje {message_type}")
+        if message_type != "transaction":
+            self._verify_pending_transactions() # Las Tx recibidas antes que un bloque entran antes en el mempool
+        if message_type == "transaction":
+            self._handle_transaction(data)
+        elif message_type == "block":
+            print(f"Nodo {self.node_id}: Recibo bloque")
+            self._handle_block(data)
+        elif message_type == "mined_block":
+            print(f"Nodo {self.node_id}: Recibo bloque minado")
+            self._handle_block(data)
+        elif message_type == "inv":
+            self._handle_inv(data)
+        elif message_type == "getdata":
+            self._handle_getdata(data)
+        elif message_type == "cmpctblock":
+            self._handle_compact_block(data)
+        elif message_type == "getblocktxn":
+            self._handle_getblocktxn(data)
+        elif message_type == "blocktxn":
+            self._handle_blocktxn(data)
+
+    def _random_action(self):
+        '''Accion aleatoria cuando no hay mensajes: crear una Tx o empezar a minar'''
+        action = random.random()
+        # 2. Posibilidad de crear una transaccion
+        if action < 0.1: #10% de probabilidad por ciclo
+            if len(self.peers_queues) > 0 :#Hay mas de un nodo conectado)
+                if self.node_list and len (self.node_list) > 1:
+                    # Eleccion O(1): con miles de nodos no se recorre node_list en cada accion
+                    recipient_node = random.choice(self.node_list)
+                    while recipient_node.node_id == self.node_id:
+                        recipient_node = random.choice(self.node_list)
+                    amount = round(random.uniform(0.1,1.0),2 )
+                    print(f"Nodo {self.node_id}: Tx a {recipient_node.node_id} por {amount}")
+                    self._create_and_broadcast_transaction(recipient_node.get_address(), amount)
+        # 3. Posibilidad de minar un bloque
+        elif action < 0.3: #20% de probabilidad por ciclo
+            with self.data_lock: #Necesario para chequear mempool
+                can_mine =  not self.is_minig and len(self.mempool) > 0
+            if can_mine:
+                self._start_mining()
 
     def run(self):
         '''Ejecuta el hilo del nodo, procesando mensajes de la cola de entrada'''
         print(f"Nodo {self.node_id}: Iniciando hilo de procesamiento")
         while not self.stop_event.is_set():
             try:
-                # 1. Procesar mensajes entrantes (no bloqueante)
-                message_type, data = self.incoming_queue.get(block=False)
-                #print(f"Nodo {self.node_id}: Recibo mensaje {message_type}")
-                if message_type == "transaction":
-                    self._handle_transaction(data)
-                elif message_type == "block":
-                    print(f"Nodo {self.node_id}: Recibo bloque")
-                    self._handle_block(data)
-                elif message_type == "mined_block":
-                    print(f"Nodo {self.node_id}: Recibo bloque minado")
-                    self._handle_block(data)
+                # 1. Procesar mensajes entrantes. Sin mensajes se espera entre 0.1 y 0.5 segundos, pero
+                # un mensaje que llega durante la espera se procesa en el acto (no sobre un tip viejo)
+                message_type, data = self.incoming_queue.get(timeout=random.uniform(0.1, 0.5))
+                self._process_message(message_type, data)
                 self.incoming_queue.task_done() #Marcar tarea como completada
+                if self.incoming_queue.empty():
+                    self._verify_pending_transactions() # Fin de la rafaga: sus firmas en un solo lote
+                self._flush_announcements() # No esperar a un ciclo libre si no paran de llegar mensajes
             except queue.Empty:
                 #No hay mensajes en la cola
-                action = random.random()
-                # 2. Posibilidad de crear una transaccion
-                if action < 0.1: #10% de probabilidad por ciclo
-                    if len(self.peers_queues) > 0 :#Hay mas de un nodo conectado)
-                        if self.node_list and len (self.node_list) > 1:
-                            possible_recipients = [n for n in self.node_list if n.node_id != self.node_id]
-                            if possible_recipients:
-                                recipient_node = random.choice(possible_recipients)
-                                amount = round(random.uniform(0.1,1.0),2 )
-                                print(f"Nodo {self.node_id}: Tx a {recipient_node.node_id} por {amount}")
-                                self._create_and_broadcast_transaction(recipient_node.get_address(), amount)
-                            else:
-                                print(f"Nodo {self.node_id}: No hay nodos disponibles para enviar Tx")
-                # 3. Posibilidad de minar un bloque
-                elif action < 0.3: #20% de probabilidad por ciclo
-                    with self.data_lock: #Necesario para chequear mempool
-                        can_mine =  not self.is_minig and len(self.mempool) > 0
-                    if can_mine:
-                        self._start_mining()
-                #Pausa para evitar consumo excesivo de CPU
-                time.sleep(random.uniform(0.1, 0.5)) #Pausa aleatoria entre 0.1 y 0.5 segundos
+                self._verify_pending_transactions()
+                self._flush_announcements()
+                self._random_action()
         print(f"Nodo {self.node_id}: Hilo detenido")        
     
     def _create_and_broadcast_transaction(self, recipient_address:str, amount:float):
         '''Metodo auxiliar para crear Tx desde el hilo'''
-        tx = Transaction(
-            sender_address=self.get_address(),
-            recipient_address=recipient_address,
-            amount=amount,
-            inputs=[]
-        )
-        tx.sign_transaction(self.wallet)
-        tx_hash = tx.calculate_hash()
-        if tx.is_valid():
-            with self.data_lock: #Acceso a mempool y known_tx_hashes
-                if tx not in self.mempool and tx_hash not in self.known_tx_hashes:
-                    #print(f"Nodo {self.node_id}: Transacción válida {tx_hash[:8]}...")
-                    self.mempool.add(tx)
-                    self.known_tx_hashes.add(tx_hash)
-                    needs_broadcast = True
-                else:
-                    needs_broadcast = False
-                if needs_broadcast:
-                    self._broadcast("transaction", tx)
-        else:
-            print(f"Nodo {self.node_id}: ERROR Tx {tx_hash[:8]}...")
+        with self.data_lock: # Eleccion de monedas, mempool y known_tx_hashes: otra Tx no puede gastar las mismas
+            fee = round(random.uniform(*TX_FEE_RANGE), 4)
+            inputs = self._select_coins(amount + fee)
+            if inputs is None:
+                print(f"Nodo {self.node_id}: Saldo insuficiente para enviar {amount}")
+                return
+            tx = Transaction(
+                sender_address=self.get_address(),
+                recipient_address=recipient_address,
+                amount=amount,
+                inputs=inputs,
+                timestamp=self.clock(),
+                fee=fee
+            )
+            tx.sign_transaction(self.wallet)
+            tx_hash = tx.calculate_hash()
+            if not tx.is_valid(self.signature_cache):
+                print(f"Nodo {self.node_id}: ERROR Tx {tx_hash[:8]}...")
+                return
+            needs_broadcast = tx_hash not in self.known_tx_hashes and self._accept_to_mempool(tx)
+            if needs_broadcast:
+                self.known_tx_hashes.add(tx_hash)
+                self._broadcast("transaction", tx)
 
     # --- UTILITIES ---
     def visualize_chain(self, filename: str = None, max_blocks: int = None):
@@ -316,7 +714,7 @@ class Node(threading.Thread):
             node_id = block.hash
             dot.node(node_id, label=label) # El label ahora tiene saltos de línea
 
-            if block.previous_hash == "0":
+            if block.index == 0:
                  dot.node(node_id, _attributes={'style': 'filled', 'color':'lightgreen'})
 
         # 4. Añadir aristas (conexiones) - Irán de Izquierda a Derecha
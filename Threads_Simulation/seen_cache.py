@@ -0,0 +1,118 @@
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+
+class RollingBloomFilter:
+    '''
+    Bloom filter de dos generaciones con memoria fija. Cuando la generacion actual llega a
+    `capacity` elementos pasa a ser la anterior y se empieza una vacia, asi que recuerda
+    entre capacity y 2 * capacity elementos recientes. Cada generacion tiene una tasa de
+    falsos positivos ~fp_rate (~2 * fp_rate consultando las dos).
+    '''
+    def __init__(self, capacity: int, fp_rate: float = 0.001):
+        if capacity <= 0:
+            raise ValueError("La capacidad del Bloom filter debe ser positiva")
+        if not 0 < fp_rate < 1:
+            raise ValueError(f"Tasa de falsos positivos fuera de rango: {fp_rate}")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._current = bytearray((self.num_bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._count = 0 # Elementos en la generacion actual
+
+    def _positions(self, digest: bytes) -> List[int]:
+        # El digest ya es SHA-256: dos trozos de 64 bits sirven como hashes independientes (doble hashing)
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, digest: bytes):
+        if self._count >= self.capacity:
+            self._previous, self._current = self._current, bytearray(len(self._current))
+            self._count = 0
+        for position in self._positions(digest):
+            self._current[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        positions = self._positions(digest)
+        for bits in (self._current, self._previous):
+            if all(bits[position >> 3] & (1 << (position & 7)) for position in positions):
+                return True
+        return False
+
+
+class SeenCache:
+    '''
+    Conjunto acotado de hashes ya vistos para known_tx_hashes y known_block_hashes.
+    Guarda el digest binario (32 bytes en lugar de la cadena hex de 64) en un LRU que expulsa
+    por numero (max_items) y, si se indica max_age, por antiguedad segun `clock`. Con fp_rate
+    los hashes expulsados pasan a un RollingBloomFilter y se siguen reconociendo con memoria
+    fija, a cambio de falsos positivos. Cuenta aciertos y fallos de las consultas.
+    '''
+    def __init__(self,
+                 max_items: int = 50000,
+                 max_age: Optional[float] = None,
+                 fp_rate: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        if max_items <= 0:
+            raise ValueError("max_items debe ser positivo")
+        self.max_items = max_items
+        self.max_age = max_age
+        self.clock = clock
+        self._entries: OrderedDict = OrderedDict() # digest -> ultimo uso, del mas antiguo al mas reciente
+        self.bloom = RollingBloomFilter(max_items, fp_rate) if fp_rate is not None else None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(item_hash: str) -> bytes:
+        try:
+            return bytes.fromhex(item_hash)
+        except ValueError:
+            return hashlib.sha256(item_hash.encode()).digest() # Identificadores que no son hex
+
+    def __contains__(self, item_hash: str) -> bool:
+        digest = self._digest(item_hash)
+        self._expire()
+        if digest in self._entries:
+            self._entries[digest] = self.clock()
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return True
+        if self.bloom is not None and digest in self.bloom:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, item_hash: str):
+        digest = self._digest(item_hash)
+        self._entries[digest] = self.clock()
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_items:
+            self._evict()
+        self._expire()
+
+    def _evict(self):
+        digest, _ = self._entries.popitem(last=False)
+        if self.bloom is not None:
+            self.bloom.add(digest)
+
+    def _expire(self):
+        if self.max_age is None:
+            return
+        limit = self.clock() - self.max_age
+        while self._entries and next(iter(self._entries.values())) < limit:
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"items": len(self._entries), "hits": self.hits, "misses": self.misses}
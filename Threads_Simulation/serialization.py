@@ -0,0 +1,239 @@
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+from transactions import Transaction
+from block import Block
+
+FORMAT_VERSION = 1 # Primer byte de cada objeto codificado; cambia si cambia el formato
+
+# Bits del byte de flags de una Tx. Los numeros van como float64 salvo que sean int (el txid distingue 1 y 1.0)
+TX_SIGNED = 1
+TX_INT_AMOUNT = 2
+TX_INT_FEE = 4
+TX_INT_TIMESTAMP = 8
+
+BLOCK_HAS_MERKLE_ROOT = 1
+BLOCK_INT_TIMESTAMP = 2
+
+_FLOAT = struct.Struct("<d")
+_INT = struct.Struct("<q")
+# amount, fee y timestamp de una Tx segun sus bits TX_INT_* (un solo unpack por Tx)
+_TX_NUMBERS = {flags: struct.Struct("<" + "".join("q" if flags & bit else "d" for bit in (TX_INT_AMOUNT, TX_INT_FEE, TX_INT_TIMESTAMP)))
+               for flags in range(0, 16, 2)}
+_BLOCK_FIELDS = struct.Struct("<BB") # version de cabecera, flags
+_DIGEST_SIZE = 32
+_SMALL_VARINTS = [bytes([value]) for value in range(0x80)]
+
+
+def encode_varint(value: int) -> bytes:
+    '''Entero no negativo en 7 bits por byte (LEB128): 1 byte hasta 127'''
+    if 0 <= value < 0x80:
+        return _SMALL_VARINTS[value]
+    if value < 0:
+        raise ValueError(f"Varint negativo: {value}")
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+class Reader:
+    '''Lectura secuencial de un buffer codificado'''
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+        self.offset = 0
+
+    def take(self, size: int) -> bytes:
+        end = self.offset + size
+        if end > len(self.data):
+            raise ValueError("Datos codificados truncados")
+        chunk = self.data[self.offset:end]
+        self.offset = end
+        return chunk
+
+    def byte(self) -> int:
+        if self.offset >= len(self.data):
+            raise ValueError("Datos codificados truncados")
+        self.offset += 1
+        return self.data[self.offset - 1]
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        if self.offset + fmt.size > len(self.data):
+            raise ValueError("Datos codificados truncados")
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def varint(self) -> int:
+        if self.offset < len(self.data) and self.data[self.offset] < 0x80: # Caso habitual: 1 byte
+            self.offset += 1
+            return self.data[self.offset - 1]
+        value = shift = 0
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def done(self):
+        if self.offset != len(self.data):
+            raise ValueError(f"{len(self.data) - self.offset} bytes sobrantes tras decodificar")
+
+
+# --- CAMPOS ---
+def _write_hex(out: bytearray, value: str):
+    '''Cadena hex (direccion, firma) como bytes crudos con su longitud: la mitad de tamano'''
+    raw = bytes.fromhex(value)
+    out += encode_varint(len(raw))
+    out += raw
+
+
+def _read_hex(reader: Reader) -> str:
+    return reader.take(reader.varint()).hex()
+
+
+def _write_digest(out: bytearray, value: str):
+    raw = bytes.fromhex(value)
+    if len(raw) != _DIGEST_SIZE:
+        raise ValueError(f"Digest de {len(raw)} bytes, se esperaban {_DIGEST_SIZE}")
+    out += raw
+
+
+def _read_digest(reader: Reader) -> str:
+    return reader.take(_DIGEST_SIZE).hex()
+
+
+def _write_text(out: bytearray, value: str):
+    raw = value.encode()
+    out += encode_varint(len(raw))
+    out += raw
+
+
+def _read_text(reader: Reader) -> str:
+    return reader.take(reader.varint()).decode()
+
+
+def _write_number(out: bytearray, value: Any):
+    out += _INT.pack(value) if isinstance(value, int) else _FLOAT.pack(value)
+
+
+def _read_number(reader: Reader, is_int: bool) -> Any:
+    return reader.unpack(_INT if is_int else _FLOAT)[0]
+
+
+def _check_version(reader: Reader):
+    version = reader.byte()
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Version de formato {version} no soportada (se esperaba {FORMAT_VERSION})")
+
+
+def _write_address(out: bytearray, address: str, addresses: Optional[Dict[str, int]]):
+    if addresses is None:
+        _write_hex(out, address)
+    else:
+        out += encode_varint(addresses[address])
+
+
+def _read_address(reader: Reader, addresses: Optional[List[str]]) -> str:
+    if addresses is None:
+        return _read_hex(reader)
+    index = reader.varint()
+    if index >= len(addresses):
+        raise ValueError(f"Direccion {index} fuera de la tabla del bloque ({len(addresses)})")
+    return addresses[index]
+
+
+# --- TRANSACCIONES ---
+def write_transaction(out: bytearray, tx: Transaction, addresses: Optional[Dict[str, int]] = None):
+    '''Con `addresses` (tabla del bloque) las direcciones van como su posicion en la tabla'''
+    flags = ((TX_SIGNED if tx.signature else 0) | (TX_INT_AMOUNT if isinstance(tx.amount, int) else 0)
+             | (TX_INT_FEE if isinstance(tx.fee, int) else 0) | (TX_INT_TIMESTAMP if isinstance(tx.timestamp, int) else 0))
+    out.append(flags)
+    _write_address(out, tx.sender, addresses)
+    _write_address(out, tx.recipient, addresses)
+    out += _TX_NUMBERS[flags & ~TX_SIGNED].pack(tx.amount, tx.fee, tx.timestamp)
+    out += encode_varint(len(tx.inputs))
+    for txid, index in tx.inputs:
+        _write_digest(out, txid)
+        out += encode_varint(index)
+    if tx.signature:
+        _write_hex(out, tx.signature)
+
+
+def read_transaction(reader: Reader, addresses: Optional[List[str]] = None) -> Transaction:
+    flags = reader.byte()
+    sender = _read_address(reader, addresses)
+    recipient = _read_address(reader, addresses)
+    amount, fee, timestamp = reader.unpack(_TX_NUMBERS[flags & ~TX_SIGNED])
+    inputs: List[Tuple[str, int]] = [(_read_digest(reader), reader.varint()) for _ in range(reader.varint())]
+    signature = _read_hex(reader) if flags & TX_SIGNED else None
+    tx = Transaction.__new__(Transaction) # Sin __init__ ni la comprobacion de firma de __setattr__
+    tx.__setstate__({"sender": sender, "recipient": recipient, "amount": amount, "inputs": inputs,
+                     "timestamp": timestamp, "fee": fee, "signature": signature, "_txid": None})
+    return tx
+
+
+def encode_transaction(tx: Transaction) -> bytes:
+    out = bytearray([FORMAT_VERSION])
+    write_transaction(out, tx)
+    return bytes(out)
+
+
+def decode_transaction(data: bytes) -> Transaction:
+    reader = Reader(data)
+    _check_version(reader)
+    tx = read_transaction(reader)
+    reader.done()
+    return tx
+
+
+# --- BLOQUES ---
+def encode_block(block: Block) -> bytes:
+    '''
+    Bloque completo: cabecera con los digests en crudo (32 bytes) y enteros como varint,
+    la tabla de direcciones del bloque (por orden de aparicion, cada una se repite en muchas Tx)
+    y las Tx. Es canonico: el mismo bloque da siempre los mismos bytes
+    '''
+    out = bytearray([FORMAT_VERSION])
+    flags = (BLOCK_HAS_MERKLE_ROOT if block.merkle_root is not None else 0) | (BLOCK_INT_TIMESTAMP if isinstance(block.timestamp, int) else 0)
+    out += _BLOCK_FIELDS.pack(block.version, flags)
+    _write_number(out, block.timestamp)
+    out += encode_varint(block.index)
+    out += encode_varint(block.nonce)
+    _write_digest(out, block.previous_hash)
+    if block.merkle_root is not None:
+        _write_digest(out, block.merkle_root)
+    _write_digest(out, block.hash)
+    _write_text(out, block.mined_by)
+    addresses: Dict[str, int] = {}
+    for tx in block.transactions:
+        addresses.setdefault(tx.sender, len(addresses))
+        addresses.setdefault(tx.recipient, len(addresses))
+    out += encode_varint(len(addresses))
+    for address in addresses:
+        _write_hex(out, address)
+    out += encode_varint(len(block.transactions))
+    for tx in block.transactions:
+        write_transaction(out, tx, addresses)
+    return bytes(out)
+
+
+def decode_block(data: bytes) -> Block:
+    reader = Reader(data)
+    _check_version(reader)
+    version, flags = reader.unpack(_BLOCK_FIELDS)
+    block = Block.__new__(Block) # Sin __init__: el hash viaja en los datos, no se recalcula
+    block.version = version
+    block.timestamp = _read_number(reader, flags & BLOCK_INT_TIMESTAMP)
+    block.index = reader.varint()
+    block.nonce = reader.varint()
+    block.previous_hash = _read_digest(reader)
+    block.merkle_root = _read_digest(reader) if flags & BLOCK_HAS_MERKLE_ROOT else None
+    block.hash = _read_digest(reader)
+    block.mined_by = _read_text(reader)
+    addresses = [_read_hex(reader) for _ in range(reader.varint())]
+    block.transactions = [read_transaction(reader, addresses) for _ in range(reader.varint())]
+    reader.done()
+    return block
@@ -0,0 +1,42 @@
+import random
+import networkx as nx
+from typing import List, Any
+
+TOPOLOGIES = ("full", "random_regular", "small_world", "scale_free")
+
+
+def build_topology(num_nodes: int,
+                   topology: str = "full",
+                   degree: int = 8,
+                   rewire_p: float = 0.1,
+                   seed: Any = None) -> nx.Graph:
+    '''
+    Grafo de conexiones entre nodos (vertice i = node_list[i]).
+        full: todos con todos, O(n^2) enlaces como en las simulaciones originales.
+        random_regular: cada nodo con `degree` peers al azar (num_nodes * degree debe ser par).
+        small_world: anillo con `degree` vecinos y reconexion aleatoria con prob. `rewire_p` (Watts-Strogatz).
+        scale_free: enlace preferente con degree // 2 enlaces por nodo nuevo (Barabasi-Albert), grado medio ~degree.
+    '''
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Topologia desconocida: {topology}. Opciones: {TOPOLOGIES}")
+    if topology == "full" or degree >= num_nodes - 1:
+        return nx.complete_graph(num_nodes)
+    rng = random.Random(seed) # networkx no acepta semillas de texto
+    if topology == "random_regular":
+        return nx.random_regular_graph(degree, num_nodes, seed=rng)
+    if topology == "small_world":
+        return nx.connected_watts_strogatz_graph(num_nodes, degree, rewire_p, seed=rng)
+    return nx.barabasi_albert_graph(num_nodes, max(1, degree // 2), seed=rng)
+
+
+def connect_nodes(node_list: List[Any],
+                  topology: str = "full",
+                  degree: int = 8,
+                  rewire_p: float = 0.1,
+                  seed: Any = None) -> nx.Graph:
+    '''Conecta en ambos sentidos los nodos de node_list segun la topologia elegida'''
+    graph = build_topology(len(node_list), topology, degree, rewire_p, seed)
+    for i, j in graph.edges():
+        node_list[i].add_peer(node_list[j])
+        node_list[j].add_peer(node_list[i])
+    return graph
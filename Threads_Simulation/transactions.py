@@ -1,69 +1,148 @@
-from ecdsa import SigningKey, VerifyingKey, SECP256k1
+from ecdsa import SigningKey, SECP256k1
+from crypto_backend import get_backend
 import binascii 
 import hashlib
 import json
+import random
+from collections import OrderedDict
 from time import time
 from typing import List, Any 
 
 class Wallet:
 
-    def __init__(self):
-        self.private_key = SigningKey.generate(curve=SECP256k1)
-        self.public_key = self.private_key.get_verifying_key()
+    def __init__(self, seed: Any = None):
+        # Con semilla las claves son reproducibles (simulaciones deterministas), sin ella son aleatorias
+        entropy = random.Random(seed).randbytes if seed is not None else None
+        secret = SigningKey.generate(curve=SECP256k1, entropy=entropy).to_string()
+        self.backend = get_backend() # Backend activo al crear la cartera, firma siempre con el
+        self.private_key = self.backend.signing_key(secret)
+        public_key_bytes = self.backend.public_key_bytes(self.private_key) # Clave publica x||y
+        # Convertir bytes a cadena hexadecimal y decodificar a string UTF-8
+        self.address = binascii.hexlify(public_key_bytes).decode('utf-8')
 
     def get_address(self)-> str:
-        public_key_bytes = self.public_key.to_string() # Obtener bytes de la clave pública
-        # Convertir bytes a cadena hexadecimal y decodificar a string UTF-8
-        hex_address = binascii.hexlify(public_key_bytes).decode('utf-8')
-        return hex_address
+        return self.address
 
     def sign(self, data:bytes) -> str:
-        signature = self.private_key.sign(data)
+        signature = self.backend.sign(self.private_key, data)
         return binascii.hexlify(signature).decode()
     
 
+def verify_signature(sender: str, signature: str, tx_hash: str) -> bool:
+    '''Verificacion ECDSA de la firma (hex) del txid con la clave publica del emisor (su direccion)'''
+    try:
+        # La clave publica se parsea una vez por direccion (cache del backend)
+        signature_bytes = binascii.unhexlify(signature)
+        return get_backend().verify(sender, signature_bytes, tx_hash.encode())
+    except Exception as e:
+        print(f"Error en  la Verificacion de firma {e}")
+        return False
+
+class SignatureCache:
+    '''
+    Firmas ya verificadas, por (txid, firma). Una Tx verificada al entrar en el mempool no se
+    vuelve a verificar al validar el bloque que la incluye. Acotada: al llenarse se descarta
+    la entrada usada hace mas tiempo.
+    '''
+    def __init__(self, max_items: int = 100000):
+        self.max_items = max_items
+        self._verified: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, transaction: 'Transaction') -> bool:
+        key = (transaction.calculate_hash(), transaction.signature)
+        if key in self._verified:
+            self._verified.move_to_end(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, transaction: 'Transaction'):
+        self._verified[(transaction.calculate_hash(), transaction.signature)] = True
+        while len(self._verified) > self.max_items:
+            self._verified.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._verified)
+
+def _freeze_inputs(inputs: Any) -> tuple:
+    '''Entradas como tupla de outpoints (tuplas): no se pueden cambiar sin pasar por __setattr__'''
+    return tuple(tuple(outpoint) if isinstance(outpoint, list) else outpoint for outpoint in inputs)
+
 class Transaction:
-    def __init__(self, sender_address:str, recipient_address:str, amount: float, inputs:List[Any]):
+    # Sin __dict__ por objeto: menos memoria con mempools y cadenas grandes
+    __slots__ = ("sender", "recipient", "amount", "inputs", "timestamp", "fee", "signature", "_txid")
+
+    def __init__(self, sender_address:str, recipient_address:str, amount: float, inputs:List[Any], timestamp: float = None, fee: float = 0.0):
         self.sender = sender_address
         self.recipient = recipient_address
         self.amount = amount
         self.inputs = inputs
-        self.timestamp = time()
+        self.timestamp = timestamp if timestamp is not None else time()
+        self.fee = fee # Comision para el minero; el mempool ordena por fee rate (fee / bytes)
         self.signature = None  # Se añade a posteriori en la cartera
 
+    def __setattr__(self, name: str, value: Any):
+        # Una vez firmada la transaccion es inmutable, asi el txid cacheado no puede quedar desfasado
+        if getattr(self, "signature", None) is not None:
+            raise AttributeError(f"Transaccion firmada, no se puede modificar '{name}'")
+        if name == "inputs":
+            value = _freeze_inputs(value) # Misma serializacion JSON que la lista: el txid no cambia
+        object.__setattr__(self, name, value)
+        if name != "_txid":
+            object.__setattr__(self, "_txid", None) # Los datos han cambiado, recalcular el txid
+
+    def __getstate__(self):
+        # Sin el txid cacheado: el receptor lo recalcula de los datos que firma la Tx
+        return {name: getattr(self, name) for name in self.__slots__ if name != "_txid" and hasattr(self, name)}
+
+    def __setstate__(self, state: dict):
+        # Copias y procesos: se restaura sin pasar por la comprobacion de firma, pero nunca se
+        # confia en un txid recibido (otro peer podria enviar uno que no corresponde a los datos)
+        for name, value in state.items():
+            object.__setattr__(self, name, _freeze_inputs(value) if name == "inputs" else value)
+        object.__setattr__(self, "_txid", None)
+
     def calculate_hash(self) -> str:
-        tx_data = {
-            "sender": self.sender,
-            "recipient":self.recipient,
-            "amount":self.amount,
-            "inputs":self.inputs,
-            "timestamp": self.timestamp
-        }
-        tx_string = json.dumps(tx_data,sort_keys=True).encode()
-        return hashlib.sha256(tx_string).hexdigest()
+        '''txid de la transaccion. Se calcula una vez y se reutiliza'''
+        if self._txid is None:
+            tx_data = {
+                "sender": self.sender,
+                "recipient":self.recipient,
+                "amount":self.amount,
+                "inputs":self.inputs,
+                "timestamp": self.timestamp,
+                "fee": self.fee
+            }
+            tx_string = json.dumps(tx_data,sort_keys=True).encode()
+            object.__setattr__(self, "_txid", hashlib.sha256(tx_string).hexdigest())
+        return self._txid
+
+    def to_dict(self) -> dict:
+        return {"sender": self.sender, "recipient": self.recipient, "amount": self.amount,
+                "inputs": self.inputs, "timestamp": self.timestamp, "fee": self.fee, "signature": self.signature}
     
     def sign_transaction(self, wallet:Wallet):
         if wallet.get_address() != self.sender:
             raise ValueError("No puedes firmar una transacción para otra cartera")
         tx_hash = self.calculate_hash().encode()
-        self.signature = wallet.sign(tx_hash)
+        signature = wallet.sign(tx_hash)
+        object.__setattr__(self, "signature", signature) # A partir de aqui la transaccion queda congelada
 
-    def is_valid(self) -> bool:
+    def is_valid(self, signature_cache: SignatureCache = None) -> bool:
+        '''Verifica la firma ECDSA. Con signature_cache solo se verifica la primera vez'''
         if not self.signature:
             print("Transaction no firmada")
             return False
         
-        try:
-            public_key_bytes = binascii.unhexlify(self.sender)
-            verifying_key = VerifyingKey.from_string(public_key_bytes, curve=SECP256k1)
-
-            signature_bytes = binascii.unhexlify(self.signature)
-            tx_hash = self.calculate_hash().encode()
-
-            return verifying_key.verify(signature_bytes, tx_hash)
-        except Exception as e:
-            print(f"Error en  la Verificacion de firma {e}")
-            return False
+        if signature_cache is not None and self in signature_cache:
+            return True
+        valid = verify_signature(self.sender, self.signature, self.calculate_hash())
+        if valid and signature_cache is not None:
+            signature_cache.add(self)
+        return valid
         
     def __str__(self) :
         sig_preview = self.signature[:10] + "..." if self.signature else "None"